@@ -0,0 +1,433 @@
+#
+# Time-stamp: <2026/10/19 16:20:03 (CST) daisuke>
+#
+
+#
+# batched centroid measurements and PSF fitting of many stars
+#
+#   This module is shared by the whole-frame centroid and PSF scripts of
+#   sessions 12 and 13. All the stars are fitted at once using arrays of
+#   shape (N, ...) for N stars, instead of a Python loop over stars.
+#   Cutouts around many positions are also extracted at once.
+#
+
+# importing numpy module
+import numpy
+
+#
+# function to calculate PSF models and their derivatives
+#
+#   p is an array of parameters of shape (N, k) for N stars, and x and y
+#   are pixel coordinates of shape (M,). Model values of shape (N, M) and
+#   analytic Jacobian of shape (N, M, k) are returned.
+#
+#     Gaussian : p = (amplitude, x_0, y_0, x_stddev, y_stddev, theta)
+#       f = A exp (-(a dx^2 + b dx dy + c dy^2))
+#       (the same definition as astropy.modeling.models.Gaussian2D)
+#     Moffat   : p = (amplitude, x_0, y_0, gamma, alpha)
+#       f = A (1 + (dx^2 + dy^2) / gamma^2)^(-alpha)
+#       (the same definition as astropy.modeling.models.Moffat2D)
+#
+def calc_psf (p, x, y, psf_model):
+    # offsets from the centre
+    dx = x[numpy.newaxis, :] - p[:, 1, numpy.newaxis]
+    dy = y[numpy.newaxis, :] - p[:, 2, numpy.newaxis]
+    # Gaussian
+    if (psf_model == '2dg'):
+        # parameters
+        amp   = p[:, 0, numpy.newaxis]
+        sx    = p[:, 3, numpy.newaxis]
+        sy    = p[:, 4, numpy.newaxis]
+        theta = p[:, 5, numpy.newaxis]
+        cos   = numpy.cos (theta)
+        sin   = numpy.sin (theta)
+        sin2  = numpy.sin (2.0 * theta)
+        cos2  = numpy.cos (2.0 * theta)
+        sx2   = sx**2
+        sy2   = sy**2
+        a     = cos**2 / (2.0 * sx2) + sin**2 / (2.0 * sy2)
+        b     = sin2 / (2.0 * sx2) - sin2 / (2.0 * sy2)
+        c     = sin**2 / (2.0 * sx2) + cos**2 / (2.0 * sy2)
+        # model
+        dx2  = dx * dx
+        dxdy = dx * dy
+        dy2  = dy * dy
+        e    = numpy.exp (- (a * dx2 + b * dxdy + c * dy2) )
+        f    = amp * e
+        # derivatives of a, b, and c
+        da_dsx = - cos**2 / sx**3
+        db_dsx = - sin2 / sx**3
+        dc_dsx = - sin**2 / sx**3
+        da_dsy = - sin**2 / sy**3
+        db_dsy = sin2 / sy**3
+        dc_dsy = - cos**2 / sy**3
+        da_dt  = 0.5 * sin2 * (1.0 / sy2 - 1.0 / sx2)
+        db_dt  = cos2 * (1.0 / sx2 - 1.0 / sy2)
+        dc_dt  = - da_dt
+        # Jacobian
+        jac = numpy.empty (f.shape + (6,) )
+        jac[:, :, 0] = e
+        jac[:, :, 1] = f * (2.0 * a * dx + b * dy)
+        jac[:, :, 2] = f * (b * dx + 2.0 * c * dy)
+        jac[:, :, 3] = - f * (da_dsx * dx2 + db_dsx * dxdy + dc_dsx * dy2)
+        jac[:, :, 4] = - f * (da_dsy * dx2 + db_dsy * dxdy + dc_dsy * dy2)
+        jac[:, :, 5] = - f * (da_dt * dx2 + db_dt * dxdy + dc_dt * dy2)
+    # Moffat
+    elif (psf_model == '2dm'):
+        # parameters
+        amp    = p[:, 0, numpy.newaxis]
+        gamma  = p[:, 3, numpy.newaxis]
+        alpha  = p[:, 4, numpy.newaxis]
+        gamma2 = gamma**2
+        # model
+        r2 = dx * dx + dy * dy
+        u  = 1.0 + r2 / gamma2
+        e  = u**(-alpha)
+        f  = amp * e
+        # Jacobian
+        g   = 2.0 * alpha * f / (gamma2 * u)
+        jac = numpy.empty (f.shape + (5,) )
+        jac[:, :, 0] = e
+        jac[:, :, 1] = g * dx
+        jac[:, :, 2] = g * dy
+        jac[:, :, 3] = g * r2 / gamma
+        jac[:, :, 4] = - f * numpy.log (u)
+    # returning model and Jacobian
+    return (f, jac)
+
+#
+# function to make initial guess of PSF parameters
+#
+#   Centre and width are estimated from the first and second moments of
+#   positive pixel values, and amplitude from the peak value.
+#
+def guess_psf (z, x, y, psf_model):
+    # weights
+    w     = numpy.clip (z, 0.0, None)
+    sum_w = numpy.sum (w, axis=1)
+    sum_w = numpy.where (sum_w > 0.0, sum_w, 1.0)
+    # centre
+    xc = numpy.sum (w * x, axis=1) / sum_w
+    yc = numpy.sum (w * y, axis=1) / sum_w
+    # width
+    var   = numpy.sum (w * ( (x - xc[:, numpy.newaxis])**2 \
+                             + (y - yc[:, numpy.newaxis])**2), axis=1) / sum_w
+    sigma = numpy.clip (numpy.sqrt (var / 2.0), 0.5, \
+                        max (numpy.ptp (x), numpy.ptp (y)) / 4.0 + 0.5)
+    # amplitude
+    amp = numpy.amax (z, axis=1)
+    # parameters
+    if (psf_model == '2dg'):
+        p = numpy.stack ( (amp, xc, yc, sigma, sigma, \
+                           numpy.zeros_like (amp) ), axis=1)
+    elif (psf_model == '2dm'):
+        p = numpy.stack ( (amp, xc, yc, 2.0 * sigma, \
+                           numpy.full_like (amp, 2.5) ), axis=1)
+    # returning initial guess
+    return (p)
+
+#
+# function to solve many small linear systems at once
+#
+#   All the systems are solved by a single call of numpy.linalg.solve. If
+#   any of them is singular, e.g. for a noise peak whose Jacobian has a
+#   column of zeros, the systems are solved one by one instead, and NaN is
+#   returned for singular systems, so that a bad star does not stop the
+#   fitting of other stars.
+#
+def solve_batch (a, b):
+    # solving all the systems at once
+    try:
+        return (numpy.linalg.solve (a, b)[:, :, 0])
+    # solving the systems one by one
+    except numpy.linalg.LinAlgError:
+        x = numpy.full (b.shape[:2], numpy.nan)
+        for n in range (a.shape[0]):
+            try:
+                x[n] = numpy.linalg.solve (a[n], b[n])[:, 0]
+            except numpy.linalg.LinAlgError:
+                pass
+        return (x)
+
+#
+# function to fit PSF models to many cutouts at once
+#
+#   Levenberg-Marquardt iterations are carried out for all the stars
+#   simultaneously. Normal equations of all the stars are built from
+#   analytic Jacobians using batched matrix products, and solved at once
+#   by solve_batch (). Each star has its own damping parameter, and stars
+#   which have converged are removed from further iterations. Stars whose
+#   normal equations cannot be solved are also removed, and NaN is
+#   returned for them.
+#
+#   Parameters:
+#     cutouts   : background subtracted cutouts of shape (N, ny, nx)
+#     psf_model : '2dg' (Gaussian) or '2dm' (Moffat)
+#     maxiter   : maximum number of iterations
+#     p_init    : initial parameters of shape (N, k) (None for guess)
+#
+#   Returned value:
+#     an array of fitted parameters of shape (N, k) (NaN for failed stars)
+#
+def fit_psf_batch (cutouts, psf_model='2dg', maxiter=100, p_init=None):
+    # pixel coordinates and values
+    n_star = cutouts.shape[0]
+    (y, x) = numpy.indices (cutouts.shape[1:])
+    x      = x.ravel ().astype (numpy.float64)
+    y      = y.ravel ().astype (numpy.float64)
+    z      = cutouts.reshape (n_star, -1).astype (numpy.float64)
+
+    # initial parameters
+    if (p_init is None):
+        p = guess_psf (z, x, y, psf_model)
+    else:
+        p = numpy.array (p_init, dtype=numpy.float64)
+
+    # residuals and Jacobian for initial parameters
+    (f, jac) = calc_psf (p, x, y, psf_model)
+    r        = z - f
+    chi2     = numpy.sum (r * r, axis=1)
+
+    # damping parameters and flags of stars still being fitted and failed
+    lam    = numpy.full (n_star, 1.0E-3)
+    active = numpy.ones (n_star, dtype=bool)
+    failed = numpy.zeros (n_star, dtype=bool)
+
+    # Levenberg-Marquardt iterations
+    with numpy.errstate (all='ignore'):
+        for i in range (maxiter):
+            # indices of stars still being fitted
+            index = numpy.nonzero (active)[0]
+            if (index.size == 0):
+                break
+            # normal equations
+            j_a   = jac[index]
+            j_t   = numpy.transpose (j_a, (0, 2, 1))
+            jtj   = numpy.matmul (j_t, j_a)
+            jtr   = numpy.matmul (j_t, r[index, :, numpy.newaxis])
+            diag  = numpy.einsum ('nkk->nk', jtj)
+            scale = diag * (1.0 + lam[index, numpy.newaxis]) + 1.0E-30
+            a     = jtj.copy ()
+            numpy.einsum ('nkk->nk', a)[...] = scale
+            # new parameters
+            # (stars whose normal equations cannot be solved are removed)
+            delta  = solve_batch (a, jtr)
+            solved = numpy.all (numpy.isfinite (delta), axis=1)
+            failed[index[~solved]] = True
+            active[index[~solved]] = False
+            index  = index[solved]
+            delta  = delta[solved]
+            if (index.size == 0):
+                continue
+            p_new = p[index] + delta
+            # residuals for new parameters
+            (f_new, jac_new) = calc_psf (p_new, x, y, psf_model)
+            r_new    = z[index] - f_new
+            chi2_new = numpy.sum (r_new * r_new, axis=1)
+            # accepting steps which decrease chi-square
+            better = (chi2_new < chi2[index])
+            small  = (chi2[index] - chi2_new <= 1.0E-10 * chi2[index])
+            ib     = index[better]
+            p[ib]    = p_new[better]
+            jac[ib]  = jac_new[better]
+            r[ib]    = r_new[better]
+            chi2[ib] = chi2_new[better]
+            # updating damping parameters
+            lam[ib]                 /= 10.0
+            lam[index[~better]]     *= 10.0
+            # stars which have converged
+            # (a small decrease of chi-square, or no possible improvement)
+            active[index[better & small]] = False
+            active[lam > 1.0E10]          = False
+            active[~numpy.isfinite (chi2)] = False
+
+    # NaN for failed stars
+    p[failed] = numpy.nan
+
+    # returning fitted parameters
+    return (p)
+
+#
+# function to convert fitted parameters into x_0, y_0, fwhm, theta, and
+# amplitude
+#
+def psf_results (p, psf_model):
+    # Gaussian (FWHM is an average of FWHMs along two axes)
+    if (psf_model == '2dg'):
+        fwhm  = 2.0 * numpy.sqrt (2.0 * numpy.log (2.0)) \
+            * (numpy.abs (p[:, 3]) + numpy.abs (p[:, 4])) / 2.0
+        theta = p[:, 5]
+    # Moffat (circular model, and theta is always zero)
+    elif (psf_model == '2dm'):
+        fwhm  = 2.0 * numpy.abs (p[:, 3]) \
+            * numpy.sqrt (2.0**(1.0 / p[:, 4]) - 1.0)
+        theta = numpy.zeros (p.shape[0])
+    # returning results
+    return ( {'x_0': p[:, 1], 'y_0': p[:, 2], 'fwhm': fwhm, 'theta': theta, \
+              'amplitude': p[:, 0]} )
+
+#
+# function to extract cutouts around many positions at once
+#
+#   A sliding-window view of the image is made by stride tricks without
+#   copying, and all the cutouts are gathered by one fancy indexing. Given
+#   positions are rounded to the nearest pixels, and must be at least
+#   "half_width" pixels away from the edge of the image.
+#
+def extract_cutouts (data, x, y, half_width):
+    # size of cutouts
+    size = 2 * half_width + 1
+    # sliding-window view of the image
+    windows = numpy.lib.stride_tricks.sliding_window_view (data, (size, size))
+    # lower-left corners of cutouts
+    x_min = numpy.rint (x).astype (numpy.int64) - half_width
+    y_min = numpy.rint (y).astype (numpy.int64) - half_width
+    # gathering cutouts
+    cutouts = windows[y_min, x_min]
+    # returning cutouts and their lower-left corners
+    return (cutouts, x_min, y_min)
+
+#
+# function to calculate centre-of-mass centroids of many cutouts
+#
+#   The definition is the same as photutils.centroids.centroid_com.
+#
+def centroid_com_batch (cutouts):
+    # pixel coordinates
+    (y, x) = numpy.indices (cutouts.shape[1:])
+    # total and first moments
+    total    = numpy.sum (cutouts, axis=(1, 2), dtype=numpy.float64)
+    x_centre = numpy.sum (cutouts * x, axis=(1, 2)) / total
+    y_centre = numpy.sum (cutouts * y, axis=(1, 2)) / total
+    # returning centroids
+    return (x_centre, y_centre)
+
+#
+# function to fit 1-dim. Gaussian plus constant to many profiles at once
+#
+#   The model is f = A exp (-(x - mu)^2 / (2 sigma^2)) + c. Initial
+#   parameters are estimated from moments of profiles, and Levenberg-
+#   Marquardt iterations are carried out for all the profiles
+#   simultaneously using analytic Jacobian. NaN is returned for profiles
+#   whose normal equations cannot be solved.
+#
+def fit_gauss1d_batch (profiles, maxiter=100):
+    # coordinates and values
+    n_prof = profiles.shape[0]
+    x      = numpy.arange (profiles.shape[1], dtype=numpy.float64)
+    z      = profiles.astype (numpy.float64)
+
+    # initial parameters from moments
+    c     = numpy.amin (z, axis=1)
+    w     = z - c[:, numpy.newaxis]
+    sum_w = numpy.sum (w, axis=1)
+    sum_w = numpy.where (sum_w > 0.0, sum_w, 1.0)
+    mu    = numpy.sum (w * x, axis=1) / sum_w
+    sigma = numpy.sqrt (numpy.sum (w * (x - mu[:, numpy.newaxis])**2, \
+                                   axis=1) / sum_w)
+    sigma = numpy.clip (sigma, 0.5, x.size / 2.0)
+    amp   = numpy.amax (w, axis=1)
+    p     = numpy.stack ( (amp, mu, sigma, c), axis=1)
+
+    # function to calculate model and Jacobian
+    def calc_model (p):
+        dx  = x[numpy.newaxis, :] - p[:, 1, numpy.newaxis]
+        s   = p[:, 2, numpy.newaxis]
+        e   = numpy.exp (- dx * dx / (2.0 * s * s) )
+        g   = p[:, 0, numpy.newaxis] * e
+        jac = numpy.empty (g.shape + (4,) )
+        jac[:, :, 0] = e
+        jac[:, :, 1] = g * dx / (s * s)
+        jac[:, :, 2] = g * dx * dx / (s * s * s)
+        jac[:, :, 3] = 1.0
+        return (g + p[:, 3, numpy.newaxis], jac)
+
+    # residuals and Jacobian for initial parameters
+    (f, jac) = calc_model (p)
+    r        = z - f
+    chi2     = numpy.sum (r * r, axis=1)
+
+    # damping parameters and flags of profiles still being fitted and failed
+    lam    = numpy.full (n_prof, 1.0E-3)
+    active = numpy.ones (n_prof, dtype=bool)
+    failed = numpy.zeros (n_prof, dtype=bool)
+
+    # Levenberg-Marquardt iterations
+    with numpy.errstate (all='ignore'):
+        for i in range (maxiter):
+            # indices of profiles still being fitted
+            index = numpy.nonzero (active)[0]
+            if (index.size == 0):
+                break
+            # normal equations
+            j_a = jac[index]
+            j_t = numpy.transpose (j_a, (0, 2, 1))
+            jtj = numpy.matmul (j_t, j_a)
+            jtr = numpy.matmul (j_t, r[index, :, numpy.newaxis])
+            a   = jtj.copy ()
+            numpy.einsum ('nkk->nk', a)[...] \
+                = numpy.einsum ('nkk->nk', jtj) \
+                * (1.0 + lam[index, numpy.newaxis]) + 1.0E-30
+            # new parameters and residuals
+            # (profiles whose normal equations cannot be solved are removed)
+            delta  = solve_batch (a, jtr)
+            solved = numpy.all (numpy.isfinite (delta), axis=1)
+            failed[index[~solved]] = True
+            active[index[~solved]] = False
+            index  = index[solved]
+            if (index.size == 0):
+                continue
+            p_new            = p[index] + delta[solved]
+            (f_new, jac_new) = calc_model (p_new)
+            r_new            = z[index] - f_new
+            chi2_new         = numpy.sum (r_new * r_new, axis=1)
+            # accepting steps which decrease chi-square
+            better = (chi2_new < chi2[index])
+            small  = (chi2[index] - chi2_new <= 1.0E-10 * chi2[index])
+            ib     = index[better]
+            p[ib]    = p_new[better]
+            jac[ib]  = jac_new[better]
+            r[ib]    = r_new[better]
+            chi2[ib] = chi2_new[better]
+            # updating damping parameters and flags
+            lam[ib]             /= 10.0
+            lam[index[~better]] *= 10.0
+            active[index[better & small]]  = False
+            active[lam > 1.0E10]           = False
+            active[~numpy.isfinite (chi2)] = False
+
+    # NaN for failed profiles
+    p[failed] = numpy.nan
+
+    # returning fitted parameters
+    return (p)
+
+#
+# function to calculate centroids of many cutouts by fitting 1-dim.
+# Gaussians to marginal distributions along X and Y axes
+#
+#   The method is the same as that of photutils.centroids.centroid_1dg.
+#
+def centroid_1dg_batch (cutouts, maxiter=100):
+    # marginal distributions
+    profile_x = numpy.sum (cutouts, axis=1, dtype=numpy.float64)
+    profile_y = numpy.sum (cutouts, axis=2, dtype=numpy.float64)
+    # fitting 1-dim. Gaussians to both of them at once
+    p = fit_gauss1d_batch (numpy.concatenate ( (profile_x, profile_y) ), \
+                           maxiter=maxiter)
+    # returning centroids
+    n = cutouts.shape[0]
+    return (p[:n, 1], p[n:, 1])
+
+#
+# function to calculate centroids of many cutouts by fitting 2-dim.
+# Gaussians
+#
+#   Gaussian2D is fitted to all the cutouts by the batched fitter. Cutouts
+#   must be background subtracted.
+#
+def centroid_2dg_batch (cutouts, maxiter=100):
+    # fitting 2-dim. Gaussians
+    p = fit_psf_batch (cutouts, psf_model='2dg', maxiter=maxiter)
+    # returning centroids
+    return (p[:, 1], p[:, 2])
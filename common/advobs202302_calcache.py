@@ -0,0 +1,163 @@
+#
+# Time-stamp: <2026/10/19 15:32:44 (CST) daisuke>
+#
+
+#
+# cache of master calibration frames
+#
+#   Master dark and flatfield frames are read only once, and kept in the
+#   cache as read-only arrays. A cache is a dictionary made by
+#   make_calibration_cache (), and is given to the functions of this
+#   module as the first argument.
+#
+#   An entry of the cache is identified by data type, exposure time,
+#   filter name, and file name, and carries the modification time of the
+#   file. A master frame replaced during a run is read again, and its old
+#   entry is removed at the same time. When total size of frames exceeds
+#   the limit, least recently used frames are removed from the cache.
+#
+#   A child process made by fork () has its own copy of the cache. The
+#   counters in "stats" are incremented in the child only, so a script
+#   using worker processes has to return the increments to the parent.
+#
+
+# importing pathlib module
+import pathlib
+
+# importing collections module
+import collections
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+#
+# function to make an empty cache of calibration frames
+#
+#   Parameters:
+#     size_max : maximum total size of frames in MB
+#     dtype    : data type of frames in memory
+#                (None for keeping data as they are in the file, as
+#                 read-only memory maps if data are not scaled)
+#
+def make_calibration_cache (size_max=2048.0, dtype=None):
+    # making a cache
+    cache = {'frames': collections.OrderedDict (), \
+             'size_max': size_max * 1024**2, 'dtype': dtype, \
+             'stats': {'hit': 0, 'read': 0, 'model': 0}}
+    # returning the cache
+    return (cache)
+
+#
+# function to find a frame in the cache
+#
+#   None is returned if the frame is not in the cache, or if the entry was
+#   made from files of other modification times.
+#
+def find_calibration_frame (cache, name, version):
+    # entry of the frame
+    entry = cache['frames'].get (name)
+    if ( (entry is None) or (entry[0] != version) ):
+        return (None)
+    # moving the entry to the end, as the most recently used one
+    cache['frames'].move_to_end (name)
+    cache['stats']['hit'] += 1
+    # returning header and data
+    return (entry[1:])
+
+#
+# function to store header and data of a calibration frame in the cache
+#
+#   An old entry of the same name is replaced by the new one.
+#
+def store_calibration_frame (cache, name, version, header, data):
+    # making data read-only
+    data.flags.writeable = False
+    # storing header and data in the cache
+    cache['frames'][name] = (version, header, data)
+    cache['frames'].move_to_end (name)
+    # removing least recently used frames, if the cache is too large
+    while ( (len (cache['frames']) > 1) \
+            and (sum ([e[2].nbytes for e in cache['frames'].values ()]) \
+                 > cache['size_max']) ):
+        cache['frames'].popitem (last=False)
+
+#
+# function to get header and data of a master calibration frame
+#
+def read_calibration_frame (cache, datatype, exptime, filter_name, \
+                            file_cal):
+    # absolute path and modification time of the file
+    path_cal = pathlib.Path (file_cal).resolve ()
+    name     = (datatype, exptime, filter_name, str (path_cal))
+    version  = (path_cal.stat ().st_mtime_ns, )
+    # if the frame is in the cache, then use it
+    entry = find_calibration_frame (cache, name, version)
+    if (entry is not None):
+        return (entry)
+    # opening FITS file
+    # ("denywrite" mode gives a read-only memory map for unscaled data)
+    with astropy.io.fits.open (file_cal, mode='denywrite') as hdu_list:
+        # header and data of HDU of image data
+        hdu    = find_image_hdu (hdu_list)
+        header = hdu.header
+        data   = hdu.data
+        # converting data type, if needed
+        if ( (cache['dtype'] is not None) and (data.dtype != cache['dtype']) ):
+            data = data.astype (cache['dtype'])
+    # storing header and data in the cache
+    store_calibration_frame (cache, name, version, header, data)
+    cache['stats']['read'] += 1
+    # returning header and data
+    return (header, data)
+
+#
+# function to get header and data of a model dark frame
+#
+#   A dark frame of given exposure time is modelled as
+#   "offset + rate * exptime", using the dark current rate and offset maps
+#   made by advobs202302_s07_06_02.py (or a master bias as the offset), so
+#   that one series of dark frames serves all the exposure times of a
+#   night. The maps are read through the cache, and the model frame of each
+#   exposure time is also kept in the cache.
+#
+def model_dark_frame (cache, exptime, file_rate, file_offset):
+    # reading rate and offset maps from the cache
+    (header_rate, data_rate) \
+        = read_calibration_frame (cache, 'DARKRATE', 0.0, '__NONE__', \
+                                  file_rate)
+    (header_offset, data_offset) \
+        = read_calibration_frame (cache, 'DARKOFFS', 0.0, '__NONE__', \
+                                  file_offset)
+    # name and version of the model
+    # (file names and modification times of the maps are included)
+    name    = ('DARKMODEL', exptime, '__NONE__')
+    version = ()
+    for file_map in (file_rate, file_offset):
+        path_map = pathlib.Path (file_map).resolve ()
+        name    += (str (path_map), )
+        version += (path_map.stat ().st_mtime_ns, )
+    # if the frame is in the cache, then use it
+    entry = find_calibration_frame (cache, name, version)
+    if (entry is not None):
+        return (entry)
+    # model dark frame
+    dtype = numpy.float64 if (cache['dtype'] is None) else cache['dtype']
+    data  = numpy.multiply (data_rate, exptime, dtype=dtype)
+    data += data_offset
+    # header of model dark frame
+    header = astropy.io.fits.Header ()
+    header['IMAGETYP'] = 'DARK'
+    header['EXPTIME']  = exptime
+    header['EXPMIN']   = header_rate.get ('EXPMIN', exptime)
+    header['EXPMAX']   = header_rate.get ('EXPMAX', exptime)
+    # storing header and data in the cache
+    store_calibration_frame (cache, name, version, header, data)
+    cache['stats']['model'] += 1
+    # returning header and data
+    return (header, data)
@@ -0,0 +1,179 @@
+#
+# Time-stamp: <2026/10/19 14:05:27 (CST) daisuke>
+#
+
+#
+# reading and writing FITS image files
+#
+#   This module is shared by scripts of several sessions. A script adds
+#   this directory to the module search path by
+#
+#     sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+#                           / 'common'))
+#
+#   and then imports functions from this module.
+#
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header_offset
+
+# output formats of FITS file
+choices_format   = ['native', 'float32', 'int16', 'rice', 'hcompress']
+dict_compression = {'rice': 'RICE_1', 'hcompress': 'HCOMPRESS_1'}
+
+# data types of pixel values for BITPIX
+dict_bitpix = {8: '>u1', 16: '>i2', 32: '>i4', -32: '>f4', -64: '>f8'}
+
+# keywords needed to read pixel data directly
+list_keywords_data = ['BITPIX', 'NAXIS', 'NAXIS1', 'NAXIS2', 'BSCALE', \
+                      'BZERO']
+
+#
+# function to find HDU of image data
+#
+#   For a tile-compressed FITS file (e.g. made by fpack), primary HDU is
+#   empty and the image is stored in the first extension.
+#
+def find_image_hdu (hdu_list):
+    # primary HDU, if it has image data
+    if (hdu_list[0].header['NAXIS'] > 0):
+        return (hdu_list[0])
+    # otherwise, the first extension having image data
+    for hdu in hdu_list[1:]:
+        if (hdu.is_image and (hdu.header['NAXIS'] > 0)):
+            return (hdu)
+    # returning primary HDU
+    return (hdu_list[0])
+
+#
+# function to read a frame
+#
+#   For an uncompressed image in primary HDU, pixel data are read directly
+#   from the file at the end of the header, without parsing the whole
+#   header. Integers are converted into 32-bit floating point numbers, which
+#   represent 16-bit integers exactly. Other files (e.g. tile-compressed
+#   files) are read by astropy.io.fits.
+#
+#   Returned value:
+#     (dict_values, data)
+#       dict_values : values of given keywords (None for missing keywords)
+#       data        : pixel data
+#
+def read_frame (file_fits, list_keywords):
+    # reading header keywords
+    list_keywords_all = list_keywords \
+        + [key for key in list_keywords_data if not (key in list_keywords)]
+    (dict_values, offset) = scan_header_offset (file_fits, list_keywords_all)
+    # reading pixel data directly
+    if ( (offset is not None) and (dict_values['NAXIS'] == 2) \
+         and (dict_values['BITPIX'] in dict_bitpix) ):
+        shape = (dict_values['NAXIS2'], dict_values['NAXIS1'])
+        dtype = dict_bitpix[dict_values['BITPIX']]
+        raw   = numpy.fromfile (file_fits, dtype=dtype, \
+                                count=shape[0] * shape[1], offset=offset)
+        if (dict_values['BITPIX'] in (32, -64)):
+            data = raw.reshape (shape).astype (numpy.float64)
+        else:
+            data = raw.reshape (shape).astype (numpy.float32)
+        # scaling
+        bscale = dict_values['BSCALE']
+        bzero  = dict_values['BZERO']
+        if not (bscale in (None, 1)):
+            data *= bscale
+        if not (bzero in (None, 0)):
+            data += bzero
+    # reading pixel data by astropy
+    else:
+        with astropy.io.fits.open (file_fits) as hdu_list:
+            hdu = find_image_hdu (hdu_list)
+            if (hdu.data is None):
+                raise ValueError (f'no image data')
+            for key in list_keywords_all:
+                if (key in hdu.header):
+                    dict_values[key] = hdu.header[key]
+            data = hdu.data.astype (numpy.float32)
+    # returning values of keywords and data
+    return (dict_values, data)
+
+#
+# function to write an image into a FITS file in given output format
+#
+#   native    : data are written as they are
+#   float32   : data are converted into 32-bit floating point numbers
+#   int16     : data are scaled into 16-bit integers by BSCALE and BZERO,
+#               and NaN, infinity, and outliers are stored as BLANK
+#   rice      : tile-compressed image HDU (RICE_1) after empty primary HDU
+#   hcompress : tile-compressed image HDU (HCOMPRESS_1) after empty
+#               primary HDU
+#
+#   For rice and hcompress, data are quantized so that the noise of each
+#   tile is sampled by "quantize_level" levels. A larger value gives a
+#   smaller quantization error and a larger file.
+#
+def write_fits_image (file_fits, data, header, output_format='native', \
+                      quantize_level=16.0):
+    # writing data as they are
+    if (output_format == 'native'):
+        astropy.io.fits.writeto (file_fits, data, header=header)
+        return
+    # 32-bit floating point numbers
+    if (output_format == 'float32'):
+        hdu = astropy.io.fits.PrimaryHDU (data=data.astype (numpy.float32), \
+                                          header=header)
+        hdu_list = astropy.io.fits.HDUList ([hdu])
+    # 16-bit integers scaled by BSCALE and BZERO
+    # (the range of finite values is mapped into -32767 to +32767, and
+    #  -32768 is used as BLANK. If a step of 1/65534 of the range is
+    #  larger than 0.35 times the noise estimated from median absolute
+    #  deviation, i.e. quantization error is larger than 10 % of the noise,
+    #  the range is narrowed to the median +/- 32767 steps of 0.35 times
+    #  the noise, and values outside of it are also stored as BLANK, so
+    #  that a few outliers do not spoil the precision. A frame having no
+    #  finite value is stored as BLANK only.)
+    elif (output_format == 'int16'):
+        finite = numpy.isfinite (data)
+        values = data[finite]
+        if (values.size > 0):
+            data_min = numpy.min (values)
+            data_max = numpy.max (values)
+            median   = numpy.median (values)
+            step_max = 0.35 * 1.4826 * numpy.median (numpy.abs (values \
+                                                                - median))
+            if ( (step_max > 0.0) \
+                 and (data_max - data_min > 65534.0 * step_max) ):
+                data_min = max (data_min, median - 32767.0 * step_max)
+                data_max = min (data_max, median + 32767.0 * step_max)
+        else:
+            data_min = 0.0
+            data_max = 0.0
+        bscale   = (data_max - data_min) / 65534.0
+        if (bscale == 0.0):
+            bscale = 1.0
+        bzero    = (data_max + data_min) / 2.0
+        blank    = ~finite | (data < data_min) | (data > data_max)
+        hdu = astropy.io.fits.PrimaryHDU \
+            (data=numpy.where (blank, bzero, data).astype (numpy.float64), \
+             header=header)
+        hdu.scale ('int16', bscale=bscale, bzero=bzero)
+        hdu.data[blank]     = -32768
+        hdu.header['BLANK'] = -32768
+        hdu_list = astropy.io.fits.HDUList ([hdu])
+    # tile-compressed image
+    elif (output_format in dict_compression):
+        hdu = astropy.io.fits.CompImageHDU \
+            (data=data.astype (numpy.float32), header=header, \
+             compression_type=dict_compression[output_format], \
+             quantize_level=quantize_level)
+        hdu_list = astropy.io.fits.HDUList ([astropy.io.fits.PrimaryHDU (), \
+                                             hdu])
+    # unknown output format
+    else:
+        raise ValueError (f'unknown output format "{output_format}"')
+    # writing a FITS file
+    hdu_list.writeto (file_fits)
@@ -0,0 +1,97 @@
+#
+# Time-stamp: <2026/10/19 14:48:10 (CST) daisuke>
+#
+
+#
+# reading FITS header keywords without astropy
+#
+#   This module is shared by scripts of several sessions. Only the
+#   standard library is used, so that scripts reading headers of many
+#   files do not pay for importing astropy.
+#
+
+#
+# function to convert value field of a header card into a Python object
+#
+def parse_value (field):
+    # character string enclosed by single quotes
+    # (two successive single quotes stand for a single quote)
+    if (field.startswith ("'")):
+        value = ''
+        i     = 1
+        while (i < len (field)):
+            if (field[i] == "'"):
+                if (field[i+1:i+2] == "'"):
+                    value += "'"
+                    i     += 2
+                    continue
+                break
+            value += field[i]
+            i     += 1
+        return (value.rstrip ())
+    # removing comment
+    field = field.split ('/')[0].strip ()
+    # logical value
+    if (field == 'T'):
+        return (True)
+    if (field == 'F'):
+        return (False)
+    # integer
+    try:
+        return (int (field))
+    except ValueError:
+        pass
+    # floating point number
+    try:
+        return (float (field.replace ('D', 'E')))
+    except ValueError:
+        return (field)
+
+#
+# function to read values of given keywords and offset of data
+#
+#   Only 2880-byte header blocks up to the END card are read, and only the
+#   cards of given keywords are parsed. Pixel data are never touched.
+#
+#   Returned value:
+#     (dict_values, offset)
+#       dict_values : values of keywords (None for missing keywords)
+#       offset      : byte offset of the data of primary HDU
+#                     (None if the file ends before the END card)
+#
+def scan_header_offset (file_fits, list_keywords):
+    # values of keywords (None for missing keywords)
+    dict_values = dict.fromkeys (list_keywords)
+    # set of keywords
+    set_keywords = set (list_keywords)
+    # opening file
+    with open (file_fits, 'rb') as fh:
+        # reading header blocks
+        while True:
+            # reading a block
+            block = fh.read (2880)
+            # if the file ends before END card, then stop reading
+            if (len (block) < 2880):
+                break
+            # processing 36 cards in a block
+            for i in range (0, 2880, 80):
+                # keyword
+                key = block[i:i+8].decode ('ascii', 'replace').rstrip ()
+                # END card
+                if (key == 'END'):
+                    return (dict_values, fh.tell ())
+                # parsing the card of a requested keyword
+                if ( (key in set_keywords) and (block[i+8:i+10] == b'= ') ):
+                    field = block[i+10:i+80].decode ('ascii', 'replace')
+                    dict_values[key] = parse_value (field.strip ())
+    # returning values
+    return (dict_values, None)
+
+#
+# function to read values of given keywords from primary header
+#
+def scan_header (file_fits, list_keywords):
+    # values of keywords
+    (dict_values, offset) = scan_header_offset (file_fits, list_keywords)
+    # returning values
+    return (dict_values)
@@ -7,6 +7,9 @@
 # importing argparse module
 import argparse
 
+# importing pathlib module
+import pathlib
+
 # importing sys module
 import sys
 
@@ -19,6 +22,14 @@ import numpy
 # importing astropy module
 import astropy.io.fits
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
 # construction of parser object
 desc   = 'Normalising a FITS file'
 parser = argparse.ArgumentParser (description=desc)
@@ -26,13 +37,21 @@ parser = argparse.ArgumentParser (description=desc)
 # adding arguments
 parser.add_argument ('fits', help='name of a FITS file')
 parser.add_argument ('-o', help='output FITS file name')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 
 # command-line argument analysis
 args = parser.parse_args ()
 
 # input parameters
-file_input  = args.fits
-file_output = args.o
+file_input     = args.fits
+file_output    = args.o
+output_format  = args.output_format
+quantize_level = args.quantize_level
 
 # if the extension of the file is not '.fits', then skip
 if (file_input[-5:] != '.fits'):
@@ -48,13 +67,13 @@ datetime_str = "%04d-%02d-%02dT%02d:%02d:%06.3f" \
 
 # opening FITS file
 with astropy.io.fits.open (file_input) as hdu_list:
-    # primary HDU
-    hdu0 = hdu_list[0]
+    # HDU of image data
+    hdu0 = find_image_hdu (hdu_list)
     
-    # header of primary HDU
+    # header of HDU of image data
     header0 = hdu0.header
 
-    # data of primary HDU
+    # data of HDU of image data
     data0 = hdu0.data
 
     # calculations of mean
@@ -69,4 +88,5 @@ with astropy.io.fits.open (file_input) as hdu_list:
     header0['history'] = f'normalised on {datetime_str}'
 
     # writing a FITS file
-    astropy.io.fits.writeto (file_output, data=normalised, header=header0)
+    write_fits_image (file_output, normalised, header0, output_format, \
+                      quantize_level)
@@ -0,0 +1,452 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 15:20:32 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# construction of parser object
+desc   = 'Calculating statistical values of FITS files in a single pass'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+choices_median = ['auto', 'histogram', 'partition']
+parser.add_argument ('-k', '--chunk', type=int, default=64, \
+                     help='number of rows read at once (default: 64)')
+parser.add_argument ('-m', '--median', choices=choices_median, \
+                     default='auto', \
+                     help='method to calculate median (default: auto,' \
+                     + ' histogram for integer data and partition for' \
+                     + ' floating point data)')
+parser.add_argument ('-b', '--binsize', type=float, default=1.0, \
+                     help='bin size of histogram for median (default: 1.0)')
+parser.add_argument ('-n', '--max-bins', type=int, default=1048576, \
+                     help='maximum number of bins of histogram' \
+                     + ' (default: 1048576)')
+parser.add_argument ('-t', '--total', action='store_true', default=False, \
+                     help='printing statistical values of all the files')
+parser.add_argument ('files', nargs='+', help='input FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+nrows_chunk   = args.chunk
+method_median = args.median
+binsize       = args.binsize
+max_bins      = args.max_bins
+print_total   = args.total
+list_fits     = args.files
+
+# checking parameters
+if (nrows_chunk < 1):
+    # printing a message
+    print (f'ERROR: number of rows read at once must be 1 or larger!')
+    # exit
+    sys.exit (1)
+if (binsize <= 0.0):
+    # printing a message
+    print (f'ERROR: bin size of histogram must be positive!')
+    # exit
+    sys.exit (1)
+if (max_bins < 1):
+    # printing a message
+    print (f'ERROR: maximum number of bins must be 1 or larger!')
+    # exit
+    sys.exit (1)
+
+#
+# function to calculate moments of pixel values in a chunk
+#
+#   n, mean, min, and max are stored together with the sums of 2nd, 3rd,
+#   and 4th powers of deviations from the mean (m2, m3, and m4).
+#
+def calc_moments (x):
+    # number of pixels
+    n = x.size
+    # for an empty chunk
+    if (n == 0):
+        return ( {'n': 0, 'mean': 0.0, 'm2': 0.0, 'm3': 0.0, 'm4': 0.0, \
+                  'min': numpy.inf, 'max': -numpy.inf} )
+    # mean
+    mean = numpy.mean (x, dtype=numpy.float64)
+    # deviations from the mean
+    d  = x - mean
+    d2 = d * d
+    # returning moments
+    return ( {'n': n, 'mean': mean, 'm2': numpy.sum (d2), \
+              'm3': numpy.sum (d2 * d), 'm4': numpy.sum (d2 * d2), \
+              'min': numpy.amin (x), 'max': numpy.amax (x)} )
+
+#
+# function to merge moments of two sets of pixels
+#
+#   Chan et al. (1979) and Pebay (2008) formulae are used, so that moments
+#   of a whole frame or of many frames are obtained without reading pixels
+#   again.
+#
+def merge_moments (a, b):
+    # trivial cases
+    if (b['n'] == 0):
+        return (a)
+    if (a['n'] == 0):
+        return (b)
+    # numbers of pixels
+    na = a['n']
+    nb = b['n']
+    n  = na + nb
+    # difference of means
+    delta = b['mean'] - a['mean']
+    # merged moments
+    mean = a['mean'] + delta * nb / n
+    m2   = a['m2'] + b['m2'] + delta**2 * na * nb / n
+    m3   = a['m3'] + b['m3'] + delta**3 * na * nb * (na - nb) / n**2 \
+        + 3.0 * delta * (na * b['m2'] - nb * a['m2']) / n
+    m4   = a['m4'] + b['m4'] \
+        + delta**4 * na * nb * (na**2 - na * nb + nb**2) / n**3 \
+        + 6.0 * delta**2 * (na**2 * b['m2'] + nb**2 * a['m2']) / n**2 \
+        + 4.0 * delta * (na * b['m3'] - nb * a['m3']) / n
+    # returning merged moments
+    return ( {'n': n, 'mean': mean, 'm2': m2, 'm3': m3, 'm4': m4, \
+              'min': min (a['min'], b['min']), \
+              'max': max (a['max'], b['max'])} )
+
+#
+# function to change the range of a histogram
+#
+#   The histogram covers bins from "offset" to "end - 1". Counts of bins
+#   outside of the new range are moved to the numbers of pixels below
+#   ("low") and above ("high") the range.
+#
+def resize_histogram (hist, offset, end):
+    # current counts and range
+    counts     = hist['counts']
+    old_offset = hist['offset']
+    old_end    = old_offset + counts.size
+    # new counts
+    new_counts = numpy.zeros (end - offset, dtype=numpy.int64)
+    # copying the overlapping part
+    lo = max (offset, old_offset)
+    hi = min (end, old_end)
+    if (lo < hi):
+        new_counts[lo - offset:hi - offset] \
+            = counts[lo - old_offset:hi - old_offset]
+    # counts outside of the new range
+    hist['low']  += int (numpy.sum (counts[:max (0, offset - old_offset)]))
+    hist['high'] += int (numpy.sum (counts[max (0, end - old_offset):]))
+    # new histogram
+    hist['offset'] = offset
+    hist['counts'] = new_counts
+
+#
+# function to extend the range of a histogram
+#
+#   The range from "offset" to "end - 1" is extended to cover bins from
+#   "i_min" to "i_max", as long as number of bins does not exceed
+#   "max_bins". Returned values are new "offset" and "end".
+#
+def extend_range (offset, end, i_min, i_max):
+    # new range
+    new_offset = int (max (min (offset, i_min), end - max_bins))
+    new_end    = int (min (max (end, i_max + 1), new_offset + max_bins))
+    # returning new range
+    return (new_offset, new_end)
+
+#
+# function to add pixel values to a histogram
+#
+#   The histogram is a dictionary of bin counts, the bin index of the
+#   first element, and numbers of pixels below and above the range. It
+#   grows when pixel values outside of current range come, but the number
+#   of bins never exceeds "max_bins", so that a few outliers, such as a
+#   pixel of 1e12, do not make a huge histogram. If the first chunk is
+#   already too wide, the range is centred on the median of the chunk.
+#   Pixels outside of the range are counted as outliers.
+#
+def update_histogram (hist, x):
+    # for an empty chunk
+    if (x.size == 0):
+        return (hist)
+    # bin indices of pixel values
+    # (kept in floating point numbers, since outliers may not fit in
+    #  64-bit integers)
+    index = numpy.floor (x / binsize)
+    i_min = numpy.amin (index)
+    i_max = numpy.amax (index)
+    # for the first chunk
+    if (hist['counts'] is None):
+        if (i_max - i_min < max_bins):
+            hist['offset'] = int (i_min)
+            hist['counts'] = numpy.zeros (int (i_max - i_min) + 1, \
+                                          dtype=numpy.int64)
+        else:
+            hist['offset'] = int (numpy.median (index)) - max_bins // 2
+            hist['counts'] = numpy.zeros (max_bins, dtype=numpy.int64)
+    # extending the histogram
+    else:
+        offset = hist['offset']
+        end    = offset + hist['counts'].size
+        (new_offset, new_end) = extend_range (offset, end, i_min, i_max)
+        if ( (new_offset != offset) or (new_end != end) ):
+            resize_histogram (hist, new_offset, new_end)
+    # range of the histogram
+    offset = hist['offset']
+    end    = offset + hist['counts'].size
+    # counting outliers
+    below = index < offset
+    above = index >= end
+    hist['low']  += int (numpy.count_nonzero (below))
+    hist['high'] += int (numpy.count_nonzero (above))
+    # counting pixels within the range using bincount
+    inside = (index[~(below | above)] - offset).astype (numpy.int64)
+    if (inside.size > 0):
+        j_min  = int (numpy.amin (inside))
+        counts = numpy.bincount (inside - j_min)
+        hist['counts'][j_min:j_min + counts.size] += counts
+    # returning histogram
+    return (hist)
+
+#
+# function to merge two histograms
+#
+#   The range of the first histogram is extended toward that of the
+#   second one within "max_bins", and counts of the second histogram
+#   outside of the range are counted as outliers.
+#
+def merge_histogram (a, b):
+    # trivial cases
+    if (b['counts'] is None):
+        return (a)
+    if (a['counts'] is None):
+        return ( {'offset': b['offset'], 'counts': b['counts'].copy (), \
+                  'low': b['low'], 'high': b['high'], 'exact': b['exact']} )
+    # copy of the first histogram
+    merged = {'offset': a['offset'], 'counts': a['counts'].copy (), \
+              'low': a['low'] + b['low'], 'high': a['high'] + b['high'], \
+              'exact': a['exact'] and b['exact']}
+    # range of merged histogram
+    offset = a['offset']
+    end    = offset + a['counts'].size
+    (new_offset, new_end) \
+        = extend_range (offset, end, b['offset'], \
+                        b['offset'] + b['counts'].size - 1)
+    if ( (new_offset != offset) or (new_end != end) ):
+        resize_histogram (merged, new_offset, new_end)
+    # adding counts of the second histogram
+    # (counts outside of the range are moved to "low" and "high")
+    b_copy = {'offset': b['offset'], 'counts': b['counts'], \
+              'low': 0, 'high': 0}
+    resize_histogram (b_copy, new_offset, new_end)
+    merged['counts'] += b_copy['counts']
+    merged['low']    += b_copy['low']
+    merged['high']   += b_copy['high']
+    # returning merged histogram
+    return (merged)
+
+#
+# function to find median from a histogram
+#
+#   For integer data and bin size of 1, the median is exact. Otherwise, the
+#   centre of the bin containing the median is returned, and the error is
+#   less than the bin size. If the median is among outliers outside of the
+#   range of the histogram, NaN is returned.
+#
+def median_histogram (hist):
+    # for an empty histogram
+    if (hist['counts'] is None):
+        return (numpy.nan)
+    # cumulative counts including outliers below and above the range
+    cumulative = numpy.cumsum (numpy.concatenate ( ([hist['low']], \
+                                                    hist['counts'], \
+                                                    [hist['high']]) ) )
+    n          = cumulative[-1]
+    # bins of (n-1)/2-th and n/2-th smallest values
+    i0 = numpy.searchsorted (cumulative, (n - 1) // 2, side='right') - 1
+    i1 = numpy.searchsorted (cumulative, n // 2, side='right') - 1
+    # if the median is among outliers, then NaN is returned
+    if ( (i0 < 0) or (i1 >= hist['counts'].size) ):
+        return (numpy.nan)
+    # values of the bins
+    if (hist['exact']):
+        v0 = (hist['offset'] + i0) * binsize
+        v1 = (hist['offset'] + i1) * binsize
+    else:
+        v0 = (hist['offset'] + i0 + 0.5) * binsize
+        v1 = (hist['offset'] + i1 + 0.5) * binsize
+    # returning median
+    return (0.5 * (v0 + v1))
+
+#
+# function to calculate statistical values from moments
+#
+#   Definitions are the same as those of numpy.std, scipy.stats.skew, and
+#   scipy.stats.kurtosis with their default options.
+#
+def calc_stats (moments):
+    # for an empty data
+    if (moments['n'] == 0):
+        return (numpy.nan, numpy.nan, numpy.nan, numpy.nan)
+    # number of pixels
+    n = moments['n']
+    # standard deviation
+    stddev = numpy.sqrt (moments['m2'] / n)
+    # skewness and kurtosis
+    if (moments['m2'] > 0.0):
+        skew     = numpy.sqrt (n) * moments['m3'] / moments['m2']**1.5
+        kurtosis = n * moments['m4'] / moments['m2']**2 - 3.0
+    else:
+        skew     = numpy.nan
+        kurtosis = numpy.nan
+    # returning statistical values
+    return (moments['mean'], stddev, skew, kurtosis)
+
+# printing header
+print (f'# {"filename":20s} {"mean":>7s} {"median":>7s}', \
+       f'{"stddev":>7s} {"min":>7s} {"max":>7s}', \
+       f'{"skew":>7s} {"kurt":>7s}')
+
+# moments and histogram of all the files
+moments_total = calc_moments (numpy.array ([]))
+hist_total    = {'offset': 0, 'counts': None, 'low': 0, 'high': 0, \
+                 'exact': True}
+
+# histogram of all the files is available only if histogram method is used
+# for all the files
+hist_total_valid = True
+
+# processing FITS files one-by-one
+for file_input in list_fits:
+    # making a pathlib object
+    path_file_input = pathlib.Path (file_input)
+
+    # if input file is not a FITS file, then skip
+    if not (path_file_input.suffix == '.fits'):
+        # printing a message
+        print (f'ERROR: input file "{file_input}" is NOT a FITS file!')
+        # skip
+        continue
+
+    # file existence check using pathlib module
+    if not (path_file_input.exists ()):
+        # printing a message
+        print (f'ERROR: input file "{file_input}" does not exist!')
+        # skip
+        continue
+
+    # moments and histogram of this file
+    moments = calc_moments (numpy.array ([]))
+    hist    = {'offset': 0, 'counts': None, 'low': 0, 'high': 0, \
+               'exact': True}
+
+    # opening FITS file
+    # (file is memory-mapped, and "section" reads only required rows)
+    with astropy.io.fits.open (file_input) as hdu_list:
+        # primary HDU
+        hdu0 = hdu_list[0]
+
+        # size of data
+        shape = hdu0.shape
+
+        # integer data
+        integer = (hdu0.header['BITPIX'] > 0) \
+            and ('BSCALE' not in hdu0.header \
+                 or hdu0.header['BSCALE'] == 1.0)
+
+        # histogram gives exact median for integer data with bin size of 1
+        hist['exact'] = integer and (binsize == 1.0)
+
+        # method to calculate median
+        # (for "auto", histogram is used for integer data, and partition is
+        #  used for floating point data, since a histogram of fixed bin size
+        #  does not suit data of unknown range, such as normalised flats)
+        if (method_median == 'auto'):
+            method = 'histogram' if integer else 'partition'
+        else:
+            method = method_median
+        if (method != 'histogram'):
+            hist_total_valid = False
+
+        # an array to store all the pixel values for numpy.partition
+        if (method == 'partition'):
+            values = numpy.empty (int (numpy.prod (shape)), \
+                                  dtype=numpy.float64)
+            n_values = 0
+
+        # processing chunk by chunk
+        for y0 in range (0, shape[0], nrows_chunk):
+            # reading a chunk and flattening it
+            chunk = hdu0.section[y0:y0+nrows_chunk].ravel ()
+
+            # removing NaN and Inf, if any
+            finite = numpy.isfinite (chunk)
+            if not (finite.all ()):
+                chunk = chunk[finite]
+
+            # updating moments
+            moments = merge_moments (moments, calc_moments (chunk))
+
+            # updating histogram or storing pixel values for median
+            if (method == 'histogram'):
+                hist = update_histogram (hist, chunk)
+            elif (method == 'partition'):
+                values[n_values:n_values+chunk.size] = chunk
+                n_values += chunk.size
+
+    # median
+    if (method == 'histogram'):
+        median = median_histogram (hist)
+    elif (method == 'partition'):
+        if (n_values > 0):
+            values = values[:n_values]
+            k0     = (n_values - 1) // 2
+            k1     = n_values // 2
+            values.partition ( (k0, k1) )
+            median = 0.5 * (values[k0] + values[k1])
+        else:
+            median = numpy.nan
+        del values
+
+    # calculating statistical values
+    mean, stddev, skew, kurtosis = calc_stats (moments)
+    v_min = moments['min']
+    v_max = moments['max']
+
+    # printing results of calculations
+    print (f'{path_file_input.name:22s} {mean:7.2f} {median:7.2f}', \
+           f'{stddev:7.2f} {v_min:7.2f} {v_max:7.2f}', \
+           f'{skew:7.2f} {kurtosis:7.2f}')
+
+    # merging moments and histogram
+    moments_total = merge_moments (moments_total, moments)
+    if (method == 'histogram'):
+        hist_total = merge_histogram (hist_total, hist)
+
+# printing statistical values of all the files
+if (print_total):
+    # median is available only for histogram method
+    if (hist_total_valid):
+        median = median_histogram (hist_total)
+    else:
+        median = numpy.nan
+    # calculating statistical values
+    mean, stddev, skew, kurtosis = calc_stats (moments_total)
+    v_min = moments_total['min']
+    v_max = moments_total['max']
+    # printing results of calculations
+    print (f'{"(total)":22s} {mean:7.2f} {median:7.2f}', \
+           f'{stddev:7.2f} {v_min:7.2f} {v_max:7.2f}', \
+           f'{skew:7.2f} {kurtosis:7.2f}')
@@ -1,7 +1,7 @@
 #!/usr/pkg/bin/python3.9
 
 #
-# Time-stamp: <2023/03/23 16:11:09 (CST) daisuke>
+# Time-stamp: <2026/10/19 17:44:52 (CST) daisuke>
 #
 
 # importing argparse module
@@ -23,6 +23,9 @@ import astropy.io.fits
 import matplotlib.figure
 import matplotlib.backends.backend_agg
 
+# importing histogram function
+from advobs202302_s06_histogram import make_histogram
+
 # construction of parser object
 desc   = 'Reading a FITS file and constructing a histogram'
 parser = argparse.ArgumentParser (description=desc)
@@ -108,16 +111,10 @@ with astropy.io.fits.open (file_input) as hdu_list:
 
 # initialisation of Numpy arrays for histogram
 histogram_x = numpy.linspace (a, b, nbin)
-histogram_y = numpy.zeros (nbin, dtype='int64')
 
 # making a histogram
-for i in range ( len (data0) ):
-    for j in range ( len (data0[i]) ):
-        # skipping data if it is outside the range [a, b]
-        if ( (data0[i][j] > b) or (data0[i][j] < a) ):
-            continue
-        # counting
-        histogram_y[int ( (data0[i][j] - a) / width)] += 1
+# (data outside the range [a, b] are skipped)
+histogram_y = make_histogram (data0, a, b, width, nbin)
 
 # making objects "fig" and "ax"
 fig    = matplotlib.figure.Figure ()
@@ -1,7 +1,7 @@
 #!/usr/pkg/bin/python3.9
 
 #
-# Time-stamp: <2023/03/23 16:34:27 (CST) daisuke>
+# Time-stamp: <2026/10/19 17:44:52 (CST) daisuke>
 #
 
 # importing argparse module
@@ -23,6 +23,9 @@ import astropy.io.fits
 import matplotlib.figure
 import matplotlib.backends.backend_agg
 
+# importing histogram function
+from advobs202302_s06_histogram import make_histogram_edges
+
 # construction of parser object
 desc   = 'Reading a FITS file and constructing a histogram'
 parser = argparse.ArgumentParser (description=desc)
@@ -109,6 +112,11 @@ with astropy.io.fits.open (file_input) as hdu_list:
 # initialisation of Numpy arrays for histogram
 bins = numpy.linspace (a, b, nbin)
 
+# making a histogram
+# (counts of (nbin - 1) bins between edges, the same as those of ax.hist
+#  for the whole frame, without copying the frame)
+counts = make_histogram_edges (data0, bins)
+
 # making objects "fig" and "ax"
 fig    = matplotlib.figure.Figure ()
 canvas = matplotlib.backends.backend_agg.FigureCanvasAgg (fig)
@@ -119,7 +127,7 @@ ax.set_xlabel ('Pixel Value [ADU]')
 ax.set_ylabel ('Number of Pixels')
 
 # plotting histogram
-ax.hist (data0.flatten (), bins=bins, histtype='bar', \
+ax.hist (bins[:-1], bins=bins, weights=counts, histtype='bar', \
          edgecolor='black', linewidth=0.3, align='mid', \
          label='Pixel values')
 ax.legend ()
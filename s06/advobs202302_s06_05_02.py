@@ -0,0 +1,233 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 17:44:52 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing datetime module
+import datetime
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# importing histogram function
+from advobs202302_s06_histogram import make_histogram
+
+# construction of parser object
+desc   = 'Constructing histograms of many FITS files, one histogram per frame'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('files', nargs='+', help='input FITS files')
+parser.add_argument ('-o', default='histogram.fits', \
+                     help='output histogram file (default: histogram.fits)')
+parser.add_argument ('-a', type=float, default=0.0, \
+                     help='minimum value for histogram (default: 0.0)')
+parser.add_argument ('-b', type=float, default=65535.0, \
+                     help='maximum value for histogram (default: 65535.0)')
+parser.add_argument ('-w', type=float, default=1.0, \
+                     help='width of a bin for histogram (default: 1.0)')
+parser.add_argument ('-n', type=int, default=256, \
+                     help='number of rows read at once (default: 256)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input FITS files and output histogram file
+list_fits   = args.files
+file_output = args.o
+
+# parameters
+a     = args.a
+b     = args.b
+width = args.w
+nbin  = int ( (b - a) / width ) + 1
+nrows = args.n
+
+# command name
+command = sys.argv[0]
+
+# FITS keywords
+keyword_datatype = 'IMAGETYP'
+keyword_exptime  = 'EXPTIME'
+keyword_filter   = 'FILTER'
+
+# making pathlib object
+path_file_output = pathlib.Path (file_output)
+
+# if output file is not a FITS file, then stop
+if not (path_file_output.suffix == '.fits'):
+    # printing a message
+    print (f'ERROR: output file "{file_output}" is NOT a FITS file!')
+    # exit
+    sys.exit (1)
+
+# existence check of output file using pathlib module
+if (path_file_output.exists ()):
+    # printing a message
+    print (f'ERROR: output file "{file_output}" exists!')
+    # exit
+    sys.exit (1)
+
+# if a >= b, then stop
+if (a >= b):
+    # printing a message
+    print (f'maximum value "a" must be greater than minimum value "b".')
+    # exit
+    sys.exit (1)
+
+#
+# function to read pixel values of a FITS file by blocks of rows
+#
+#   The file is memory-mapped without scaling, and only "nrows" rows are
+#   read at once. BZERO and BSCALE are applied to each block, and pixels of
+#   BLANK are removed. For 16-bit unsigned integers (BZERO = 32768), values
+#   stay integers. Blocks are yielded as 1-D arrays.
+#
+def read_blocks (hdu, nrows):
+    # scaling parameters
+    bscale = hdu.header.get ('BSCALE', 1.0)
+    bzero  = hdu.header.get ('BZERO', 0.0)
+    blank  = hdu.header.get ('BLANK', None)
+    # number of rows
+    nrows_image = hdu.header['NAXIS2']
+    # reading blocks of rows
+    for i in range (0, nrows_image, nrows):
+        # raw values
+        block = numpy.ravel (hdu.section[i:min (i + nrows, nrows_image)])
+        # removing BLANK pixels
+        if (blank is not None):
+            block = block[block != blank]
+        # scaling
+        if ( (bscale == 1.0) and float (bzero).is_integer () \
+             and numpy.issubdtype (block.dtype, numpy.integer) ):
+            block = block.astype (numpy.int64) + int (bzero)
+        elif not ( (bscale == 1.0) and (bzero == 0.0) ):
+            block = block * bscale + bzero
+        # returning a block
+        yield (block)
+
+# list of headers and histograms
+list_header    = []
+list_histogram = []
+
+# flag for integer pixel values
+# (if all the pixel values are integers and bins start at an integer with
+#  an integer width, a bin j holds integers from HISTMIN + j * HISTWID to
+#  HISTMIN + (j + 1) * HISTWID - 1 only)
+integer = float (a).is_integer () and float (width).is_integer ()
+
+# processing FITS files
+for file_fits in list_fits:
+    # making pathlib object
+    path_file_fits = pathlib.Path (file_fits)
+
+    # if input file is not a FITS file, then skip
+    if not (path_file_fits.suffix == '.fits'):
+        # printing a message
+        print (f'WARNING: input file "{file_fits}" is NOT a FITS file!')
+        # skip
+        continue
+
+    # existence check of input file using pathlib module
+    if not (path_file_fits.exists ()):
+        # printing a message
+        print (f'WARNING: input file "{file_fits}" does not exist!')
+        # skip
+        continue
+
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True, \
+                               do_not_scale_image_data=True) as hdu_list:
+        # HDU of image data
+        hdu    = find_image_hdu (hdu_list)
+        header = hdu.header.copy ()
+
+        # initialisation of histogram of the frame
+        histogram = numpy.zeros (nbin, dtype=numpy.int64)
+        npix      = 0
+        nlow      = 0
+        nhigh     = 0
+
+        # accumulating histogram block-by-block
+        # (a block of rows is binned at once)
+        for block in read_blocks (hdu, nrows):
+            histogram += make_histogram (block, a, b, width, nbin, \
+                                         nrows=len (block) + 1)
+            npix      += len (block)
+            nlow      += numpy.count_nonzero (block < a)
+            nhigh     += numpy.count_nonzero (block > b)
+            integer    = integer \
+                and numpy.issubdtype (block.dtype, numpy.integer)
+
+    # appending results to lists
+    list_header.append ( (file_fits, \
+                          header.get (keyword_datatype, ''), \
+                          header.get (keyword_exptime, numpy.nan), \
+                          header.get (keyword_filter, ''), \
+                          npix, nlow, nhigh) )
+    list_histogram.append (histogram)
+
+    # printing status
+    print (f'{file_fits}: {npix} pixels, {nlow} below and {nhigh} above', \
+           f'the range')
+
+# checking number of frames
+if (len (list_histogram) == 0):
+    # printing a message
+    print (f'ERROR: no histogram is constructed!')
+    # exit
+    sys.exit (1)
+
+# histograms of all the frames as an image (one row per frame)
+# (32-bit integers are used, since number of pixels of a frame is less than
+#  2**31)
+hdu_histogram = astropy.io.fits.PrimaryHDU \
+    (data=numpy.array (list_histogram, dtype=numpy.int32) )
+
+# parameters of bins
+now = datetime.datetime.now ().isoformat ()
+hdu_histogram.header['HISTMIN'] = (a, 'minimum value of histogram')
+hdu_histogram.header['HISTMAX'] = (b, 'maximum value of histogram')
+hdu_histogram.header['HISTWID'] = (width, 'width of a bin')
+hdu_histogram.header['HISTINT'] = (integer, 'integer pixel values only')
+hdu_histogram.header['history'] = f'FITS file created by "{command}"'
+hdu_histogram.header['history'] = f'Updated on {now}'
+hdu_histogram.header['comment'] = f'row i is histogram of frame i in FRAMES'
+hdu_histogram.header['comment'] = f'bin j is [HISTMIN + j * HISTWID,' \
+    + f' HISTMIN + (j + 1) * HISTWID)'
+
+# information of frames as a table
+(files, datatypes, exptimes, filters, npixs, nlows, nhighs) \
+    = zip (*list_header)
+hdu_frames = astropy.io.fits.BinTableHDU.from_columns ( [
+    astropy.io.fits.Column (name='FILE', format='256A', array=files),
+    astropy.io.fits.Column (name='IMAGETYP', format='16A', array=datatypes),
+    astropy.io.fits.Column (name='EXPTIME', format='D', array=exptimes),
+    astropy.io.fits.Column (name='FILTER', format='16A', array=filters),
+    astropy.io.fits.Column (name='NPIX', format='K', array=npixs),
+    astropy.io.fits.Column (name='NLOW', format='K', array=nlows),
+    astropy.io.fits.Column (name='NHIGH', format='K', array=nhighs),
+], name='FRAMES')
+
+# writing histograms into a FITS file
+astropy.io.fits.HDUList ([hdu_histogram, hdu_frames]).writeto (file_output)
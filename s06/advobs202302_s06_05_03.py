@@ -0,0 +1,279 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 00:48:12 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# importing matplotlib module
+import matplotlib.figure
+import matplotlib.backends.backend_agg
+
+# construction of parser object
+desc   = 'Merging and re-binning histograms of frames without reading pixels'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('files', nargs='+', \
+                     help='histogram files made by advobs202302_s06_05_02.py')
+parser.add_argument ('-o', default='', \
+                     help='output image file (EPS, PDF, PNG, PS)')
+parser.add_argument ('-a', type=float, default=None, \
+                     help='minimum value for histogram (default: as stored)')
+parser.add_argument ('-b', type=float, default=None, \
+                     help='maximum value for histogram (default: as stored)')
+parser.add_argument ('-w', type=float, default=None, \
+                     help='width of a bin, multiple of stored width' \
+                     + ' (default: as stored)')
+parser.add_argument ('-t', default='', \
+                     help='data type of frames to be merged (default: all)')
+parser.add_argument ('-e', type=float, default=-1.0, \
+                     help='exposure time of frames to be merged' \
+                     + ' (default: all)')
+parser.add_argument ('-f', default='', \
+                     help='filter name of frames to be merged (default: all)')
+parser.add_argument ('-r', type=float, default=300.0, \
+                     help='resolution of output image file (default: 300 dpi)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input histogram files and output image file
+list_histogram_files = args.files
+file_output          = args.o
+
+# parameters
+a           = args.a
+b           = args.b
+width       = args.w
+datatype    = args.t
+exptime     = args.e
+filter_name = args.f
+resolution  = args.r
+
+# if output file is not either PNG, PDF, or PS, then stop
+if not (file_output == ''):
+    path_file_output = pathlib.Path (file_output)
+    if not (path_file_output.suffix in ['.eps', '.pdf', '.png', '.ps']):
+        # printing a message
+        print (f'ERROR: output file "{file_output}" is NOT either' \
+               + f' EPS,PNG,PDF,PS!')
+        # exit
+        sys.exit (1)
+    if (path_file_output.exists ()):
+        # printing a message
+        print (f'ERROR: output file "{file_output}" exists!')
+        # exit
+        sys.exit (1)
+
+#
+# function to merge histograms of the same bin width
+#
+#   Histograms may start at different values, as far as their bin edges are
+#   aligned. The merged histogram covers all the input histograms, and bins
+#   are added by slicing, so that no pixel value is needed.
+#
+def merge_histograms (list_histograms, width):
+    # ranges of histograms in units of bins
+    origin = min ([value_min for (value_min, counts) in list_histograms])
+    list_offset = []
+    for (value_min, counts) in list_histograms:
+        offset = (value_min - origin) / width
+        if not (numpy.isclose (offset, round (offset) ) ):
+            raise ValueError (f'bin edges of histograms are not aligned')
+        list_offset.append (int (round (offset) ) )
+    nbin = max ([offset + len (counts) for (offset, (value_min, counts)) \
+                 in zip (list_offset, list_histograms)])
+    # adding histograms
+    merged = numpy.zeros (nbin, dtype=numpy.int64)
+    for (offset, (value_min, counts)) in zip (list_offset, list_histograms):
+        merged[offset:offset + len (counts)] += counts
+    # returning merged histogram
+    return (origin, merged)
+
+#
+# function to re-bin a histogram
+#
+#   A new bin width must be a multiple of the old one, and new bin edges
+#   must be on old bin edges. Old bins are added into new bins by
+#   numpy.bincount. Old bins outside the new range [value_min, value_max]
+#   are dropped.
+#
+def rebin_histogram (origin, width, counts, value_min, value_max, \
+                     width_new):
+    # checking new bin width and new bin edges
+    factor = width_new / width
+    offset = (value_min - origin) / width
+    if not (numpy.isclose (factor, round (factor) ) and (factor >= 1) ):
+        raise ValueError (f'new bin width {width_new} is not a multiple of' \
+                          + f' {width}')
+    if not (numpy.isclose (offset, round (offset) ) ):
+        raise ValueError (f'new minimum value {value_min} is not on a bin' \
+                          + f' edge')
+    factor = int (round (factor) )
+    offset = int (round (offset) )
+    # number of new bins
+    nbin_new = int ( (value_max - value_min) / width_new ) + 1
+    # indices of new bins for old bins
+    index = (numpy.arange (len (counts)) - offset) // factor
+    used  = (index >= 0) & (index < nbin_new)
+    # adding old bins into new bins
+    # (weights are exact in 64-bit floating point numbers below 2**53)
+    rebinned = numpy.bincount (index[used], weights=counts[used], \
+                               minlength=nbin_new)
+    # returning re-binned histogram
+    return (numpy.rint (rebinned).astype (numpy.int64))
+
+# list of histograms
+list_histograms = []
+list_frames     = []
+list_width      = []
+integer         = True
+
+# reading histogram files
+for file_histogram in list_histogram_files:
+    # existence check of input file using pathlib module
+    if not (pathlib.Path (file_histogram).exists ()):
+        # printing a message
+        print (f'ERROR: input file "{file_histogram}" does not exist!')
+        # exit
+        sys.exit (1)
+
+    # opening histogram file
+    with astropy.io.fits.open (file_histogram) as hdu_list:
+        # bin parameters
+        header    = hdu_list[0].header
+        value_min = header['HISTMIN']
+        list_width.append (header['HISTWID'])
+        integer   = integer and header.get ('HISTINT', False)
+        # histograms and information of frames
+        counts = numpy.array (hdu_list[0].data, dtype=numpy.int64)
+        frames = hdu_list['FRAMES'].data
+
+        # selecting frames
+        for i in range (len (frames)):
+            if not ( (datatype == '') \
+                     or (frames['IMAGETYP'][i].strip () == datatype) ):
+                continue
+            if not ( (exptime < 0.0) or (frames['EXPTIME'][i] == exptime) ):
+                continue
+            if not ( (filter_name == '') \
+                     or (frames['FILTER'][i].strip () == filter_name) ):
+                continue
+            list_histograms.append ( (value_min, counts[i]) )
+            list_frames.append (frames['FILE'][i])
+
+# checking number of frames
+if (len (list_histograms) == 0):
+    # printing a message
+    print (f'ERROR: no frame is selected!')
+    # exit
+    sys.exit (1)
+
+# checking bin widths
+if not (numpy.allclose (list_width, list_width[0]) ):
+    # printing a message
+    print (f'ERROR: bin widths of histogram files are different!')
+    # exit
+    sys.exit (1)
+width_stored = list_width[0]
+
+# merging histograms of selected frames
+try:
+    (origin, merged) = merge_histograms (list_histograms, width_stored)
+except ValueError as error:
+    # printing a message
+    print (f'ERROR: {error}')
+    # exit
+    sys.exit (1)
+
+# range and width of re-binned histogram
+if (a is None):
+    a = origin
+if (b is None):
+    b = origin + (len (merged) - 1) * width_stored
+if (width is None):
+    width = width_stored
+
+# if a >= b, then stop
+if (a >= b):
+    # printing a message
+    print (f'maximum value "a" must be greater than minimum value "b".')
+    # exit
+    sys.exit (1)
+
+# re-binning
+try:
+    histogram_y = rebin_histogram (origin, width_stored, merged, a, b, width)
+except ValueError as error:
+    # printing a message
+    print (f'ERROR: {error}')
+    # exit
+    sys.exit (1)
+histogram_x = a + width * numpy.arange (len (histogram_y))
+
+# representative values of bins
+# (for integer pixel values, the mean of integers in a bin)
+if (integer):
+    values = histogram_x + (width - 1.0) / 2.0
+else:
+    values = histogram_x + width / 2.0
+
+# number of pixels
+npix = numpy.sum (histogram_y)
+if (npix == 0):
+    # printing a message
+    print (f'ERROR: no pixel is in the range [{a}, {b}]!')
+    # exit
+    sys.exit (1)
+
+# statistics calculated from histogram
+mean     = numpy.sum (values * histogram_y) / npix
+stddev   = numpy.sqrt (numpy.sum ( (values - mean)**2 * histogram_y) / npix)
+cumsum   = numpy.cumsum (histogram_y)
+median   = values[numpy.searchsorted (cumsum, npix / 2.0)]
+mode     = values[numpy.argmax (histogram_y)]
+
+# printing result
+print (f'number of frames = {len (list_frames)}')
+print (f'range            = [{a}, {b}], bin width = {width},' \
+       f' number of bins = {len (histogram_y)}')
+print (f'number of pixels = {npix}')
+print (f'mean             = {mean:.3f}')
+print (f'median           = {median:.3f}')
+print (f'mode             = {mode:.3f}')
+print (f'stddev           = {stddev:.3f}')
+
+# plotting histogram
+if not (file_output == ''):
+    # making objects "fig" and "ax"
+    fig    = matplotlib.figure.Figure ()
+    canvas = matplotlib.backends.backend_agg.FigureCanvasAgg (fig)
+    ax     = fig.add_subplot (111)
+
+    # labels
+    ax.set_xlabel ('Pixel Value [ADU]')
+    ax.set_ylabel ('Number of Pixels')
+
+    # plotting histogram
+    ax.bar (histogram_x, histogram_y, width, edgecolor='black', \
+            linewidth=0.3, align='edge', \
+            label=f'Pixel values ({len (list_frames)} frames)')
+    ax.legend ()
+
+    # saving the figure to a file
+    fig.savefig (file_output, dpi=resolution)
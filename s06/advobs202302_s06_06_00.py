@@ -13,6 +13,9 @@ import sys
 # importing pathlib module
 import pathlib
 
+# importing numpy module
+import numpy
+
 # importing astropy module
 import astropy.io.fits
 
@@ -65,78 +68,47 @@ for file_input in list_files:
         # reading data
         data0 = hdu0.data
 
-    # initial value for maximum value
-    v_max         = -9.99 * 10**10
-    v_max_clipped = -9.99 * 10**10
-    # initial value for minimum value
-    v_min         = +9.99 * 10**10
-    v_min_clipped = +9.99 * 10**10
-    # a variable for a sum of all the pixel values
-    total         = 0.0
-    total_clipped = 0.0
-    # a variable for a square of sum of all the pixel values
-    total_sq         = 0.0
-    total_sq_clipped = 0.0
+    # flattening numpy array
+    fdata0 = data0.flatten ()
     # total number of pixels
-    n = data0.size
+    n = fdata0.size
 
     # calculating statistical values
-    for row in data0:
-        for z in row:
-            # for calculation of a mean
-            total += z
-            # for calculation of a variance
-            total_sq += z**2
-            # for maximum value
-            if (z > v_max):
-                v_max = z
-            # for minimum value
-            if (z < v_min):
-                v_min = z
-
-    # mean
-    mean   = total / n
+    # (all the pixels are processed at once without Python loops,
+    #  and sums are calculated in 64-bit floating point)
+    mean   = numpy.sum (fdata0, dtype=numpy.float64) / n
     # variance
-    var    = total_sq / n - mean**2
+    var    = numpy.sum (fdata0.astype (numpy.float64)**2) / n - mean**2
     # standard deviation
     stddev = var**0.5
+    # minimum and maximum values
+    v_min  = numpy.amin (fdata0)
+    v_max  = numpy.amax (fdata0)
 
-    # lists for rejected and accepted values
-    rejected = []
-    accepted = []
+    # a boolean array for accepted pixels
+    # if the pixel value is outside of
+    # [mean-nsigma*stddev,mean+nsigma*stddev], then reject
+    mask_accepted = (fdata0 <= mean + nsigma * stddev) \
+        & (fdata0 >= mean - nsigma * stddev)
 
-    # calculating statistical values
-    for row in data0:
-        for z in row:
-            # if the pixel value is outside of
-            # [mean-nsigma*stddev,mean+nsigma*stddev], then reject
-            if ( (z > mean + nsigma * stddev) or (z < mean - nsigma * stddev) ):
-                # appending the pixel value to the list "rejected"
-                rejected.append (z)
-            else:
-                # appending the pixel value to the list "accepted"
-                accepted.append (z)
-                # for calculation of a mean
-                total_clipped += z
-                # for calculation of a variance
-                total_sq_clipped += z**2
-                # for maximum value
-                if (z > v_max_clipped):
-                    v_max_clipped = z
-                # for minimum value
-                if (z < v_min_clipped):
-                    v_min_clipped = z
+    # arrays for rejected and accepted values
+    rejected = fdata0[~mask_accepted]
+    accepted = fdata0[mask_accepted]
 
     # numbers of accepted and rejected pixels
-    n_accepted = len (accepted)
-    n_rejected = len (rejected)
+    n_accepted = accepted.size
+    n_rejected = rejected.size
 
     # mean
-    mean_clipped   = total_clipped / n_accepted
+    mean_clipped   = numpy.sum (accepted, dtype=numpy.float64) / n_accepted
     # variance
-    var_clipped    = total_sq_clipped / n_accepted - mean_clipped**2
+    var_clipped    = numpy.sum (accepted.astype (numpy.float64)**2) \
+        / n_accepted - mean_clipped**2
     # standard deviation
     stddev_clipped = var_clipped**0.5
+    # minimum and maximum values
+    v_min_clipped  = numpy.amin (accepted)
+    v_max_clipped  = numpy.amax (accepted)
 
     # printing result
     print (f'{file_input}')
@@ -154,4 +126,6 @@ for file_input in list_files:
     print (f'  results of sigma-clipping')
     print (f'    number of accepted pixels = {n_accepted:10d}')
     print (f'    number of rejected pixels = {n_rejected:10d}')
-    print (f'    rejected pixel values     = {sorted (rejected)}')
+    # (printed as a list, since numpy abbreviates a long array)
+    print (f'    rejected pixel values     =', \
+           f'{numpy.sort (rejected).tolist ()}')
@@ -71,42 +71,25 @@ for file_input in list_files:
         # reading data
         data0 = hdu0.data
 
-    # initial value for maximum value
-    v_max    = -9.99 * 10**10
-    # initial value for minimum value
-    v_min    = +9.99 * 10**10
-    # a variable for a sum of all the pixel values
-    total    = 0.0
-    # a variable for a square of sum of all the pixel values
-    total_sq = 0.0
-    # total number of pixels
-    n        = data0.size
-
     # flattening numpy array
     fdata0 = data0.flatten ()
-    
+    # total number of pixels
+    n      = fdata0.size
+
     # calculating statistical values
-    for z in fdata0:
-        # for calculation of a mean
-        total += z
-        # for calculation of a variance
-        total_sq += z**2
-        # for maximum value
-        if (z > v_max):
-            v_max = z
-        # for minimum value
-        if (z < v_min):
-            v_min = z
-
-    # mean
-    mean   = total / n
+    # (all the pixels are processed at once without Python loops,
+    #  and sums are calculated in 64-bit floating point)
+    mean   = numpy.sum (fdata0, dtype=numpy.float64) / n
     # variance
-    var    = total_sq / n - mean**2
+    var    = numpy.sum (fdata0.astype (numpy.float64)**2) / n - mean**2
     # standard deviation
     stddev = var**0.5
+    # minimum and maximum values
+    v_min  = numpy.amin (fdata0)
+    v_max  = numpy.amax (fdata0)
 
-    # lists for rejected and accepted values
-    rejected = []
+    # arrays for rejected and accepted values
+    rejected = numpy.array ([], dtype=fdata0.dtype)
     accepted = fdata0
 
     # number of iteration
@@ -120,56 +103,36 @@ for file_input in list_files:
         # printing status
         print (f'# iteration #{niter + 1:03d}...')
 
-        # initialising parameters
-        total_clipped    = 0.0
-        total_sq_clipped = 0.0
-        v_max_clipped    = -9.99 * 10**10
-        v_min_clipped    = +9.99 * 10**10
-        
         # number of rejected pixels before sigma-clipping
-        n_rejected_prev = len (rejected)
+        n_rejected_prev = rejected.size
+
+        # a boolean array for accepted pixels
+        # if the pixel value is outside of
+        # [mean-nsigma*stddev,mean+nsigma*stddev], then reject
+        mask_accepted = (accepted <= mean_clipped + nsigma * stddev_clipped) \
+            & (accepted >= mean_clipped - nsigma * stddev_clipped)
+
+        # new arrays of rejected and accepted pixels
+        rejected = numpy.concatenate ( (rejected, accepted[~mask_accepted]) )
+        accepted = accepted[mask_accepted]
 
-        # temporary list of accepted pixels
-        tmp_accepted = []
-        
-        # calculating statistical values
-        for i in range ( len (accepted) ):
-            # if the pixel value is outside of
-            # [mean-nsigma*stddev,mean+nsigma*stddev], then reject
-            if ( (accepted[i] > mean_clipped + nsigma * stddev_clipped) \
-                 or (accepted[i] < mean_clipped - nsigma * stddev_clipped) ):
-                # appending the pixel value to the list "rejected"
-                rejected.append (accepted[i])
-            else:
-                # appending the pixel value to the list "tmp_accepted"
-                tmp_accepted.append (accepted[i])
-                # for calculation of a mean
-                total_clipped += accepted[i]
-                # for calculation of a variance
-                total_sq_clipped += accepted[i]**2
-                # for maximum value
-                if (accepted[i] > v_max_clipped):
-                    v_max_clipped = accepted[i]
-                # for minimum value
-                if (accepted[i] < v_min_clipped):
-                    v_min_clipped = accepted[i]
-
-        # new list of accepted pixels
-        accepted = tmp_accepted
-                    
         # numbers of accepted and rejected pixels
-        n_accepted = len (accepted)
-        n_rejected = len (rejected)
+        n_accepted = accepted.size
+        n_rejected = rejected.size
 
         # printing status
         print (f'#  n_accepted = {n_accepted}, n_rejected = {n_rejected}')
         
         # mean
-        mean_clipped   = total_clipped / n_accepted
+        mean_clipped   = numpy.sum (accepted, dtype=numpy.float64) / n_accepted
         # variance
-        var_clipped    = total_sq_clipped / n_accepted - mean_clipped**2
+        var_clipped    = numpy.sum (accepted.astype (numpy.float64)**2) \
+            / n_accepted - mean_clipped**2
         # standard deviation
         stddev_clipped = var_clipped**0.5
+        # minimum and maximum values
+        v_min_clipped  = numpy.amin (accepted)
+        v_max_clipped  = numpy.amax (accepted)
 
         # checking whether or not leaving from iteration
         if (n_rejected == n_rejected_prev):
@@ -193,4 +156,6 @@ for file_input in list_files:
     print (f'  results of sigma-clipping')
     print (f'    number of accepted pixels = {n_accepted:10d}')
     print (f'    number of rejected pixels = {n_rejected:10d}')
-    print (f'    rejected pixel values     = {sorted (rejected)}')
+    # (printed as a list, since numpy abbreviates a long array)
+    print (f'    rejected pixel values     =', \
+           f'{numpy.sort (rejected).tolist ()}')
@@ -0,0 +1,114 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 13:05:44 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# importing vectorized sigma clipping function
+from advobs202302_s06_sigclip import sigma_clip
+
+# construction of parser object
+desc   = 'Calculating statistical values using vectorized sigma clipping'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+choices_cenfunc = ['mean', 'median']
+parser.add_argument ('files', nargs='+', help='input FITS files')
+parser.add_argument ('-s', type=float, default=3.0, \
+                     help='factor for sigma clipping (default: 3.0)')
+parser.add_argument ('-n', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-c', choices=choices_cenfunc, default='median', \
+                     help='method to estimate centre value (default: median)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input FITS file
+list_files = args.files
+nsigma     = args.s
+nmaxiter   = args.n
+cenfunc    = args.c
+
+# processing files one-by-one
+for file_input in list_files:
+    # making pathlib object
+    path_file_input = pathlib.Path (file_input)
+
+    # if input file is not a FITS file, then skip
+    if not (path_file_input.suffix == '.fits'):
+        # printing a message
+        print (f'ERROR: input file "{file_input}" is NOT a FITS file!')
+        # exit
+        sys.exit (1)
+
+    # file existence check using pathlib module
+    if not (path_file_input.exists ()):
+        # printing a message
+        print (f'ERROR: input file "{file_input}" does not exist!')
+        # exit
+        sys.exit (1)
+
+    # file name
+    filename = path_file_input.name
+
+    # opening FITS file
+    with astropy.io.fits.open (file_input) as hdu_list:
+        # reading data
+        data0 = hdu_list[0].data
+
+    # simple statistical values
+    mean   = numpy.mean (data0, dtype=numpy.float64)
+    median = numpy.median (data0)
+    stddev = numpy.std (data0, dtype=numpy.float64)
+    v_min  = numpy.amin (data0)
+    v_max  = numpy.amax (data0)
+
+    # sigma clipping
+    mask = sigma_clip (data0, sigma=nsigma, maxiters=nmaxiter, \
+                       cenfunc=cenfunc, output='mask')
+
+    # statistical values of accepted pixels
+    accepted       = data0[~mask]
+    mean_clipped   = numpy.mean (accepted, dtype=numpy.float64)
+    median_clipped = numpy.median (accepted)
+    stddev_clipped = numpy.std (accepted, dtype=numpy.float64)
+    v_min_clipped  = numpy.amin (accepted)
+    v_max_clipped  = numpy.amax (accepted)
+
+    # numbers of accepted and rejected pixels
+    n_accepted = accepted.size
+    n_rejected = data0.size - n_accepted
+
+    # printing result
+    print (f'{file_input}')
+    print (f'  clipping criterion: {cenfunc} +/- {nsigma:5.3f} sigma')
+    print (f'  before clipping:')
+    print (f'    {"filename":22s} {"mean":>10s} {"median":>10s}', \
+           f'{"stddev":>10s} {"min":>10s} {"max":>10s}')
+    print (f'    {filename:22s} {mean:10.3f} {median:10.3f}', \
+           f'{stddev:10.3f} {v_min:10.3f} {v_max:10.3f}')
+    print (f'  after clipping:')
+    print (f'    {"filename":22s} {"mean":>10s} {"median":>10s}', \
+           f'{"stddev":>10s} {"min":>10s} {"max":>10s}')
+    print (f'    {filename:22s} {mean_clipped:10.3f} {median_clipped:10.3f}', \
+           f'{stddev_clipped:10.3f} {v_min_clipped:10.3f}', \
+           f'{v_max_clipped:10.3f}')
+    print (f'  results of sigma-clipping')
+    print (f'    number of accepted pixels = {n_accepted:10d}')
+    print (f'    number of rejected pixels = {n_rejected:10d}')
@@ -0,0 +1,97 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 13:41:19 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing time module
+import time
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.stats
+
+# importing vectorized sigma clipping function
+from advobs202302_s06_sigclip import sigma_clip
+
+# construction of parser object
+desc   = 'Benchmark of vectorized sigma clipping vs Astropy'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-s', type=float, default=3.0, \
+                     help='factor for sigma clipping (default: 3.0)')
+parser.add_argument ('-n', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-l', '--sizes', default='512,1024,2048', \
+                     help='list of image sizes (default: 512,1024,2048)')
+parser.add_argument ('-z', '--nframes', type=int, default=16, \
+                     help='number of frames for clipping along axis 0' \
+                     + ' (default: 16)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+nsigma     = args.s
+nmaxiter   = args.n
+list_sizes = [int (size) for size in args.sizes.split (',')]
+nframes    = args.nframes
+
+#
+# function to measure elapsed time of a function call
+#
+def measure (func, *args, **kwargs):
+    # time at start
+    t0 = time.perf_counter ()
+    # calling function
+    result = func (*args, **kwargs)
+    # time at end
+    t1 = time.perf_counter ()
+    # returning elapsed time and result
+    return (t1 - t0, result)
+
+# random number generator
+rng = numpy.random.default_rng ()
+
+# printing header
+print (f'# sigma = {nsigma}, maxiters = {nmaxiter}, cenfunc = median')
+print (f'#')
+print (f'# {"data":>18s} {"astropy [s]":>12s} {"this [s]":>12s}', \
+       f'{"speed-up":>9s} {"max |diff|":>11s}')
+
+# measurements
+for size in list_sizes:
+    # synthetic bias frame with some hot pixels
+    data = rng.normal (1000.0, 10.0, size=(size, size)).astype (numpy.float32)
+    data.flat[rng.integers (0, data.size, size=data.size // 1000)] = 60000.0
+
+    # synthetic data cube
+    cube = rng.normal (1000.0, 10.0, size=(nframes, size, size)) \
+              .astype (numpy.float32)
+    cube[0, ::97, ::89] = 60000.0
+
+    # clipping using all the pixels, and clipping along axis 0
+    for name, array, axis in ( (f'{size}x{size}', data, None), \
+                               (f'{nframes}x{size}x{size}', cube, 0) ):
+        # Astropy
+        time_astropy, stats_astropy \
+            = measure (astropy.stats.sigma_clipped_stats, array, \
+                       sigma=nsigma, maxiters=nmaxiter, cenfunc='median', \
+                       stdfunc='std', axis=axis)
+        # vectorized sigma clipping
+        time_this, stats_this \
+            = measure (sigma_clip, array, sigma=nsigma, \
+                       maxiters=nmaxiter, cenfunc='median', axis=axis, \
+                       output='stats')
+        # maximum difference of results
+        diff = max ( [numpy.nanmax (numpy.abs (numpy.asarray (a) - b)) \
+                      for a, b in zip (stats_astropy, stats_this)] )
+        # printing result
+        print (f'  {name:>18s} {time_astropy:12.4f} {time_this:12.4f}', \
+               f'{time_astropy / time_this:9.2f} {diff:11.3e}')
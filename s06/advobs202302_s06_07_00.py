@@ -27,12 +27,18 @@ import astropy.stats
 desc   = 'Estimating readout noise from two bias frames'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 parser.add_argument ('files', nargs=2, help='file names of 2 bias frames')
 parser.add_argument ('-s', type=float, default=5.0, \
                      help='factor for sigma clipping')
 parser.add_argument ('-n', type=int, default=10, \
                      help='maximum number of iterations')
+parser.add_argument ('-p', choices=choices_precision, default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
 
 # command-line argument analysis
 args = parser.parse_args ()
@@ -41,6 +47,11 @@ args = parser.parse_args ()
 list_fits = args.files
 nsigma     = args.s
 nmaxiter   = args.n
+precision  = args.p
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # processing FITS files
 for file_fits in list_fits:
@@ -79,9 +90,9 @@ def read_fits (file_fits):
 (header0, data0) = read_fits (list_fits[0])
 (header1, data1) = read_fits (list_fits[1])
 
-# conversion of data from uint16 into float64
-bias0 = data0.astype (numpy.float64)
-bias1 = data1.astype (numpy.float64)
+# conversion of data from uint16 into floating point numbers
+bias0 = data0.astype (dtype_pixel)
+bias1 = data1.astype (dtype_pixel)
 
 # calculation of (bias0 - bias1)
 diff = bias0 - bias1
@@ -91,8 +102,8 @@ diff_sigclip  = astropy.stats.sigma_clip (diff, sigma=nsigma, \
                                           maxiters=nmaxiter, masked=False)
 
 # sigma clipped statistical values
-mean_sigclip     = numpy.mean (diff_sigclip)
-stddev_sigclip   = numpy.std  (diff_sigclip)
+mean_sigclip     = numpy.mean (diff_sigclip, dtype=numpy.float64)
+stddev_sigclip   = numpy.std  (diff_sigclip, dtype=numpy.float64)
 v_min_sigclip    = numpy.amin (diff_sigclip)
 v_max_sigclip    = numpy.amax (diff_sigclip)
 skew_sigclip     = scipy.stats.skew (diff_sigclip, axis=None)
@@ -0,0 +1,341 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 02:36:18 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# importing matplotlib module
+import matplotlib.figure
+import matplotlib.backends.backend_agg
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu, read_frame
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header
+
+# construction of parser object
+desc   = 'Estimating gain and readout noise by photon transfer curve'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('files', nargs='+', help='bias and flatfield frames')
+parser.add_argument ('-s', type=float, default=5.0, \
+                     help='factor for sigma clipping (default: 5.0)')
+parser.add_argument ('-n', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-t', type=int, default=64, \
+                     help='size of a tile in pixel (default: 64)')
+parser.add_argument ('-l', type=float, default=40000.0, \
+                     help='upper limit of signal for fitting' \
+                     + ' (default: 40000 ADU)')
+parser.add_argument ('-m', type=int, default=8, \
+                     help='number of pairs processed at once (default: 8)')
+parser.add_argument ('-o', default='', \
+                     help='output file of pairs (default: none)')
+parser.add_argument ('-g', default='', \
+                     help='output image file of photon transfer curve' \
+                     + ' (EPS, PDF, PNG, PS) (default: none)')
+parser.add_argument ('-r', type=int, default=300, \
+                     help='resolution of output image (default: 300)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input FITS files
+list_files   = args.files
+nsigma       = args.s
+nmaxiter     = args.n
+tile_size    = args.t
+signal_limit = args.l
+nbatch       = args.m
+file_output  = args.o
+file_graphic = args.g
+resolution   = args.r
+
+# FITS keywords read from header
+list_keywords = ['BITPIX', 'NAXIS', 'NAXIS1', 'NAXIS2', 'BSCALE', 'BZERO', \
+                 'DATE-OBS', 'TIME-OBS', 'IMAGETYP', 'EXPTIME', 'FILTER']
+
+# data types of bias and flatfield frames
+datatype_bias = 'BIAS'
+datatype_flat = 'FLAT'
+
+# checking parameters
+if ( (tile_size < 2) or (nbatch < 1) ):
+    # printing a message
+    print (f'ERROR: tile size must be 2 or larger, and number of pairs' \
+           + f' must be 1 or larger!')
+    # exit
+    sys.exit (1)
+
+# if output image file is not either EPS, PDF, PNG, or PS, then stop
+if not (file_graphic == ''):
+    if not (pathlib.Path (file_graphic).suffix \
+            in ['.eps', '.pdf', '.png', '.ps']):
+        # printing a message
+        print (f'ERROR: output file "{file_graphic}" is NOT either' \
+               + f' EPS,PNG,PDF,PS!')
+        # exit
+        sys.exit (1)
+
+# if output files exist, then stop
+for file_out in (file_output, file_graphic):
+    if ( (not file_out == '') and pathlib.Path (file_out).exists () ):
+        # printing a message
+        print (f'ERROR: output file "{file_out}" exists!')
+        # exit
+        sys.exit (1)
+
+#
+# function to calculate sigma-clipped mean and stddev along the last axis
+#
+#   Pixels deviating from the mean by more than "nsigma" times stddev are
+#   rejected iteratively. Sums are accumulated in 64-bit floating point
+#   numbers using a mask, so that all the tiles of all the pairs are clipped
+#   together without sorting. The mask of accepted pixels is also returned.
+#
+def clip_along_last_axis (data):
+    # initial mask of accepted pixels
+    mask = numpy.isfinite (data)
+    for i in range (nmaxiter):
+        # mean and stddev of accepted pixels
+        n      = numpy.count_nonzero (mask, axis=-1, keepdims=True)
+        mean   = numpy.sum (data, axis=-1, where=mask, keepdims=True, \
+                            dtype=numpy.float64) / n
+        dev    = data - mean.astype (data.dtype)
+        stddev = numpy.sqrt (numpy.sum (dev * dev, axis=-1, where=mask, \
+                                        keepdims=True, \
+                                        dtype=numpy.float64) / n)
+        # new mask
+        mask_new  = numpy.abs (dev) <= (nsigma * stddev).astype (data.dtype)
+        mask_new &= mask
+        # if no pixel is rejected, then stop
+        if (numpy.array_equal (mask_new, mask)):
+            break
+        mask = mask_new
+    # returning mean, stddev, and mask
+    return (mean[..., 0], stddev[..., 0], mask)
+
+#
+# function to measure pairs of successive frames by tiles
+#
+#   A stack of (n + 1) frames is cut into tiles by reshaping it into an
+#   array of (n + 1, ntile_y, ntile_x, tile_size**2). Differences of
+#   successive frames are sigma-clipped tile-by-tile, and mean levels of
+#   pairs are calculated with the same mask, so that cosmic rays in either
+#   frame are excluded. Arrays of (n, ntile_y, ntile_x) for level and
+#   variance of single frame (var (A - B) / 2) are returned.
+#
+def measure_pairs (cube):
+    # number of tiles
+    (nframes, ny, nx) = cube.shape
+    ntile_y = ny // tile_size
+    ntile_x = nx // tile_size
+    # making tiles
+    tiles = cube[:, :ntile_y * tile_size, :ntile_x * tile_size] \
+        .reshape (nframes, ntile_y, tile_size, ntile_x, tile_size) \
+        .transpose (0, 1, 3, 2, 4) \
+        .reshape (nframes, ntile_y, ntile_x, tile_size**2)
+    # differences of successive frames
+    diff = tiles[1:] - tiles[:-1]
+    (mean_diff, stddev_diff, mask) = clip_along_last_axis (diff)
+    # mean levels of pairs
+    level = numpy.sum (tiles[1:], axis=-1, where=mask, dtype=numpy.float64) \
+        + numpy.sum (tiles[:-1], axis=-1, where=mask, dtype=numpy.float64)
+    level /= 2.0 * numpy.count_nonzero (mask, axis=-1)
+    # returning levels and variances
+    return (level, stddev_diff**2 / 2.0)
+
+# reading headers and grouping frames
+# (frames of the same data type, exposure time, and filter are grouped, and
+#  sorted by date/time, and then successive frames make pairs)
+dict_groups = {}
+for file_fits in list_files:
+    # checking suffix and existence
+    if not (pathlib.Path (file_fits).suffix == '.fits'):
+        print (f'WARNING: input file "{file_fits}" is NOT a FITS file!')
+        continue
+    if not (pathlib.Path (file_fits).exists ()):
+        print (f'WARNING: input file "{file_fits}" does not exist!')
+        continue
+    # reading header keywords
+    dict_values = scan_header (file_fits, list_keywords)
+    if (dict_values['NAXIS'] == 0):
+        with astropy.io.fits.open (file_fits) as hdu_list:
+            header = find_image_hdu (hdu_list).header
+            for key in list_keywords:
+                if (key in header):
+                    dict_values[key] = header[key]
+    # data type
+    datatype = dict_values['IMAGETYP']
+    if not (datatype in (datatype_bias, datatype_flat)):
+        continue
+    # appending the file to a group
+    key = (datatype, dict_values['EXPTIME'], dict_values['FILTER'])
+    datetime_str = f"{dict_values['DATE-OBS']}T{dict_values['TIME-OBS']}"
+    dict_groups.setdefault (key, []).append ( (datetime_str, file_fits) )
+
+# list of pairs
+list_pairs_bias = []
+list_pairs_flat = []
+
+# lists of levels and variances of tiles
+list_level_bias    = []
+list_variance_bias = []
+list_level_flat    = []
+list_variance_flat = []
+
+# processing groups
+for (key, list_frames) in dict_groups.items ():
+    # sorting frames by date/time
+    list_frames = [file_fits for (datetime_str, file_fits) \
+                   in sorted (list_frames)]
+    # skipping a group of single frame
+    if (len (list_frames) < 2):
+        continue
+    # printing a message
+    print (f'Now processing {len (list_frames)} frames of {key[0]}', \
+           f'(exptime = {key[1]}, filter = {key[2]})...')
+    # processing stacks of (nbatch + 1) frames
+    # (the last frame of a stack is the first frame of next stack)
+    for i in range (0, len (list_frames) - 1, nbatch):
+        list_stack = list_frames[i:i + nbatch + 1]
+        list_data  = [read_frame (file_fits, list_keywords)[1] \
+                      for file_fits in list_stack]
+        cube = numpy.array (list_data, dtype=numpy.float32)
+        # measuring pairs
+        (level, variance) = measure_pairs (cube)
+        # storing results
+        list_pairs = list (zip (list_stack[:-1], list_stack[1:]))
+        if (key[0] == datatype_bias):
+            list_pairs_bias    += [pair + key for pair in list_pairs]
+            list_level_bias    .append (level)
+            list_variance_bias .append (variance)
+        else:
+            list_pairs_flat    += [pair + key for pair in list_pairs]
+            list_level_flat    .append (level)
+            list_variance_flat .append (variance)
+
+# checking number of pairs
+if ( (len (list_pairs_bias) == 0) or (len (list_pairs_flat) == 0) ):
+    # printing a message
+    print (f'ERROR: at least two bias frames and two flatfield frames of' \
+           + f' the same exposure are needed!')
+    # exit
+    sys.exit (1)
+
+# levels and variances of (pairs, tiles)
+level_bias    = numpy.concatenate (list_level_bias)
+variance_bias = numpy.concatenate (list_variance_bias)
+level_flat    = numpy.concatenate (list_level_flat)
+variance_flat = numpy.concatenate (list_variance_flat)
+
+# bias level and readout noise of each tile
+# (readout noise of a single frame is stddev (A - B) / sqrt (2))
+bias_tile          = numpy.median (level_bias, axis=0)
+readout_noise_tile = numpy.sqrt (numpy.median (variance_bias, axis=0))
+readout_noise_adu  = numpy.median (readout_noise_tile)
+
+# signal of flatfield pairs above bias level
+signal_flat = level_flat - bias_tile
+
+# fitting photon transfer curve
+#   variance = signal / gain + (readout noise)**2
+# (points above the upper limit are excluded to avoid non-linearity and
+#  saturation, and outliers are rejected iteratively)
+x = signal_flat.ravel ()
+y = variance_flat.ravel ()
+used = numpy.isfinite (x) & numpy.isfinite (y) & (x > 0.0) \
+    & (x < signal_limit)
+for i in range (nmaxiter):
+    (coeff, cov) = numpy.polyfit (x[used], y[used], 1, cov=True)
+    residual = y - numpy.polyval (coeff, x)
+    rms      = numpy.std (residual[used])
+    used_new = used & (numpy.abs (residual) <= nsigma * rms)
+    if (numpy.array_equal (used_new, used)):
+        break
+    used = used_new
+
+# gain and readout noise
+gain              = 1.0 / coeff[0]
+gain_err          = numpy.sqrt (cov[0][0]) / coeff[0]**2
+readout_noise_fit = numpy.sqrt (max (coeff[1], 0.0))
+
+# printing result
+print (f'number of tiles        = {bias_tile.size}' \
+       f' ({tile_size} x {tile_size} pixels each)')
+print (f'number of bias pairs   = {len (list_pairs_bias)}')
+print (f'number of flat pairs   = {len (list_pairs_flat)}')
+print (f'number of fitted points = {numpy.count_nonzero (used)}' \
+       f' / {used.size}')
+print (f'gain                   = {gain:10.4f} +/- {gain_err:.4f} e-/ADU')
+print (f'readout noise (bias)   = {readout_noise_adu:10.4f} ADU' \
+       f' = {readout_noise_adu * gain:10.4f} e-')
+print (f'readout noise (fit)    = {readout_noise_fit:10.4f} ADU' \
+       f' = {readout_noise_fit * gain:10.4f} e-')
+
+# writing results of pairs
+# (medians over tiles)
+if not (file_output == ''):
+    with open (file_output, 'w') as fh:
+        fh.write (f'# gain = {gain:.4f} +/- {gain_err:.4f} e-/ADU\n')
+        fh.write (f'# readout noise (bias) = {readout_noise_adu:.4f} ADU\n')
+        fh.write (f'# readout noise (fit)  = {readout_noise_fit:.4f} ADU\n')
+        fh.write (f'# file0, file1, imagetyp, exptime, filter,' \
+                  + f' signal [ADU], variance [ADU^2]\n')
+        for (list_pairs, signal, variance) \
+            in ( (list_pairs_bias, level_bias - bias_tile, variance_bias), \
+                 (list_pairs_flat, signal_flat, variance_flat) ):
+            signal_median   = numpy.median (signal, axis=(1, 2))
+            variance_median = numpy.median (variance, axis=(1, 2))
+            for (pair, s, v) in zip (list_pairs, signal_median, \
+                                     variance_median):
+                fh.write (f'{pair[0]} {pair[1]} {pair[2]} {pair[3]}' \
+                          + f' {pair[4]} {s:.3f} {v:.3f}\n')
+
+# plotting photon transfer curve
+if not (file_graphic == ''):
+    # making objects "fig" and "ax"
+    fig    = matplotlib.figure.Figure ()
+    canvas = matplotlib.backends.backend_agg.FigureCanvasAgg (fig)
+    ax     = fig.add_subplot (111)
+
+    # labels
+    ax.set_xlabel ('Signal [ADU]')
+    ax.set_ylabel ('Variance [ADU$^2$]')
+    ax.set_xscale ('log')
+    ax.set_yscale ('log')
+
+    # plotting data and fitted line
+    ax.plot (x[~used], y[~used], marker='.', markersize=1, \
+             linestyle='none', color='gray', label='Tiles (rejected)')
+    ax.plot (x[used], y[used], marker='.', markersize=1, \
+             linestyle='none', color='blue', label='Tiles (fitted)')
+    x_fit = numpy.logspace (numpy.log10 (max (numpy.min (x[used]), 1.0)), \
+                            numpy.log10 (numpy.max (x[used])), 100)
+    ax.plot (x_fit, numpy.polyval (coeff, x_fit), linestyle='-', \
+             color='red', label=f'gain = {gain:.3f} e-/ADU')
+    ax.legend ()
+
+    # saving the figure to a file
+    fig.savefig (file_graphic, dpi=resolution)
@@ -28,6 +28,9 @@ import matplotlib.backends.backend_agg
 desc = 'Examining time variation of mean bias level'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 parser.add_argument ('files', nargs='+', help='bias frames')
 parser.add_argument ('-s', type=float, default=5.0, \
@@ -38,6 +41,9 @@ parser.add_argument ('-o', default='bias.png', \
                      help='output file name (default: bias.png)')
 parser.add_argument ('-r', type=int, default=300, \
                      help='resolution of output image (default: 300)')
+parser.add_argument ('-p', choices=choices_precision, default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
 
 # command-line argument analysis
 args = parser.parse_args ()
@@ -48,11 +54,18 @@ nsigma      = args.s
 nmaxiter    = args.n
 file_output = args.o
 resolution  = args.r
+precision   = args.p
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
-# making empty Numpy arrays for storing data
-data_datetime = numpy.array ([], dtype='datetime64[ms]')
-data_mean     = numpy.array ([], dtype='float64')
-data_stddev   = numpy.array ([], dtype='float64')
+# making empty lists for storing data
+# (lists are converted into Numpy arrays after processing all the files,
+#  instead of reallocating arrays by numpy.append for every file)
+list_datetime = []
+list_mean     = []
+list_stddev   = []
 
 # if input file is not a FITS file, then stop
 for file_fits in list_files:
@@ -118,8 +131,8 @@ for file_fits in list_files:
     # reading a FITS file
     (header0, data0) = read_fits (file_fits)
 
-    # conversion from uint16 into float64
-    data_float = data0.astype (numpy.float64)
+    # conversion from uint16 into floating point numbers
+    data_float = data0.astype (dtype_pixel)
 
     # printing a message
     print (f'  finished reading pixels!')
@@ -142,13 +155,13 @@ for file_fits in list_files:
     # sigma clipped mean and stddev
     data_sigclip  = astropy.stats.sigma_clip (data_float, sigma=nsigma, \
                                                maxiters=nmaxiter, masked=False)
-    mean_sigclip   = numpy.mean (data_sigclip)
-    stddev_sigclip = numpy.std  (data_sigclip)
+    mean_sigclip   = numpy.mean (data_sigclip, dtype=numpy.float64)
+    stddev_sigclip = numpy.std  (data_sigclip, dtype=numpy.float64)
 
     # appending data to the lists
-    data_datetime = numpy.append (data_datetime, datetime64)
-    data_mean     = numpy.append (data_mean, mean_sigclip)
-    data_stddev   = numpy.append (data_stddev, stddev_sigclip)
+    list_datetime.append (datetime64)
+    list_mean.append (mean_sigclip)
+    list_stddev.append (stddev_sigclip)
 
     # printing a message
     print (f'  finished calculating sigma-clipped mean and stddev...')
@@ -156,6 +169,11 @@ for file_fits in list_files:
     # printing a message
     print (f'Finished processing the file "{file_fits}"!')
 
+# converting lists into Numpy arrays
+data_datetime = numpy.array (list_datetime, dtype='datetime64[ms]')
+data_mean     = numpy.array (list_mean, dtype='float64')
+data_stddev   = numpy.array (list_stddev, dtype='float64')
+
 # printing a message
 print (f'Now generating a plot "{file_output}"...')
     
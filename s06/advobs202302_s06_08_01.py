@@ -0,0 +1,274 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 01:27:44 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing re module
+import re
+
+# importing multiprocessing module
+import multiprocessing
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.stats
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu, read_frame
+
+# construction of parser object
+desc = 'Measuring bias levels of frames and regions into a time-series table'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('files', nargs='+', help='bias frames')
+parser.add_argument ('-s', type=float, default=5.0, \
+                     help='factor for sigma clipping (default: 5.0)')
+parser.add_argument ('-n', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-o', default='bias_drift.fits', \
+                     help='output table, new frames are appended' \
+                     + ' (default: bias_drift.fits)')
+parser.add_argument ('-x', type=int, default=1, \
+                     help='number of amplifiers along x-axis (default: 1)')
+parser.add_argument ('-y', type=int, default=1, \
+                     help='number of amplifiers along y-axis (default: 1)')
+parser.add_argument ('-g', action='append', default=[], \
+                     help='additional region, e.g. overscan, as' \
+                     + ' NAME=[x1:x2,y1:y2] (1-based, inclusive)')
+parser.add_argument ('-j', type=int, default=1, \
+                     help='number of worker processes (default: 1)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input FITS files
+list_files  = args.files
+nsigma      = args.s
+nmaxiter    = args.n
+file_output = args.o
+namp_x      = args.x
+namp_y      = args.y
+list_region = args.g
+njobs       = args.j
+
+# checking number of amplifiers and worker processes
+if ( (namp_x < 1) or (namp_y < 1) ):
+    # printing a message
+    print (f'ERROR: number of amplifiers must be 1 or larger!')
+    # exit
+    sys.exit (1)
+if (njobs < 1):
+    # printing a message
+    print (f'ERROR: number of worker processes must be 1 or larger!')
+    # exit
+    sys.exit (1)
+
+# if output file is not a FITS file, then stop
+if not (pathlib.Path (file_output).suffix == '.fits'):
+    # printing a message
+    print (f'ERROR: output file "{file_output}" is NOT a FITS file!')
+    # exit
+    sys.exit (1)
+
+# additional regions
+# (IRAF-style sections are converted into 0-based slices)
+dict_region = {}
+for region in list_region:
+    match = re.fullmatch (r'(\w+)=\[(\d+):(\d+),(\d+):(\d+)\]', region)
+    if (match is None):
+        # printing a message
+        print (f'ERROR: region "{region}" is not like NAME=[x1:x2,y1:y2]!')
+        # exit
+        sys.exit (1)
+    (x1, x2, y1, y2) = [int (v) for v in match.groups ()[1:]]
+    dict_region[match.group (1).upper ()] \
+        = (slice (y1 - 1, y2), slice (x1 - 1, x2))
+
+# names of regions
+# (ALL for whole frame, AMPij for amplifier at i-th column and j-th row)
+list_names = ['ALL'] \
+    + [f'AMP{i + 1}{j + 1}' for j in range (namp_y) for i in range (namp_x) \
+       if (namp_x * namp_y > 1)] \
+    + list (dict_region.keys ())
+
+# FITS keywords read from header
+list_keywords = ['BITPIX', 'NAXIS', 'NAXIS1', 'NAXIS2', 'BSCALE', 'BZERO', \
+                 'DATE-OBS', 'TIME-OBS', 'IMAGETYP']
+
+#
+# function to calculate sigma-clipped statistics of regions of a frame
+#
+#   Amplifiers have the same size, so that they are stacked into a 2-D
+#   array of (number of amplifiers, number of pixels) and clipped along
+#   the second axis in one call. Mean, median, and stddev of all the
+#   regions are returned as an array of (number of regions, 3).
+#
+def measure_regions (data):
+    # list of regions to be clipped together
+    list_stack = [data.reshape (1, -1)]
+    # amplifiers
+    if (namp_x * namp_y > 1):
+        (ny, nx) = data.shape
+        h = ny // namp_y
+        w = nx // namp_x
+        amps = data[:h * namp_y, :w * namp_x].reshape (namp_y, h, namp_x, w)
+        list_stack.append (amps.transpose (0, 2, 1, 3).reshape (-1, h * w))
+    # additional regions
+    for (slice_y, slice_x) in dict_region.values ():
+        list_stack.append (data[slice_y, slice_x].reshape (1, -1))
+    # sigma-clipped statistics
+    list_stats = []
+    for stack in list_stack:
+        (mean, median, stddev) \
+            = astropy.stats.sigma_clipped_stats (stack, sigma=nsigma, \
+                                                 maxiters=nmaxiter, axis=1)
+        list_stats.append (numpy.transpose ([mean, median, stddev]))
+    # returning statistics
+    return (numpy.concatenate (list_stats))
+
+#
+# function to measure a bias frame
+#
+def measure_frame (file_fits):
+    # reading frame
+    try:
+        (dict_values, data) = read_frame (file_fits, list_keywords)
+    except (OSError, ValueError) as error:
+        return (file_fits, None, \
+                f'WARNING: cannot read "{file_fits}": {error}')
+    # date/time
+    if ( (dict_values['DATE-OBS'] is None) \
+         or (dict_values['TIME-OBS'] is None) ):
+        return (file_fits, None, f'WARNING: no DATE-OBS or TIME-OBS in' \
+                + f' "{file_fits}"')
+    datetime_str = f"{dict_values['DATE-OBS']}T{dict_values['TIME-OBS']}"
+    # checking additional regions
+    for (name, (slice_y, slice_x)) in dict_region.items ():
+        if ( (slice_y.stop > data.shape[0]) \
+             or (slice_x.stop > data.shape[1]) ):
+            return (file_fits, None, f'WARNING: region {name} is outside' \
+                    + f' "{file_fits}"')
+    # statistics
+    stats = measure_regions (data)
+    # returning results
+    return (file_fits, (datetime_str, stats), f'{file_fits}: {datetime_str}' \
+            + f' mean = {stats[0][0]:.3f}, stddev = {stats[0][2]:.3f}')
+
+# reading existing table
+dict_rows = {}
+if (pathlib.Path (file_output).exists ()):
+    with astropy.io.fits.open (file_output) as hdu_list:
+        table = hdu_list[1].data
+        # checking regions
+        if not (hdu_list[1].header.get ('REGIONS', '') \
+                == ' '.join (list_names) ):
+            # printing a message
+            print (f'ERROR: regions of "{file_output}" are' \
+                   + f' "{hdu_list[1].header.get ("REGIONS", "")}"!')
+            # exit
+            sys.exit (1)
+        for i in range (len (table)):
+            stats = numpy.array ([[table[f'{key}_{name}'][i] \
+                                   for key in ('MEAN', 'MEDIAN', 'STDDEV')] \
+                                  for name in list_names])
+            dict_rows[table['FILE'][i]] = (table['DATETIME'][i], stats)
+
+# new frames
+list_new = []
+for file_fits in list_files:
+    # checking suffix and existence
+    if not (pathlib.Path (file_fits).suffix == '.fits'):
+        print (f'WARNING: input file "{file_fits}" is NOT a FITS file!')
+        continue
+    if not (pathlib.Path (file_fits).exists ()):
+        print (f'WARNING: input file "{file_fits}" does not exist!')
+        continue
+    # skipping frames already in the table
+    if (str (pathlib.Path (file_fits).resolve ()) in dict_rows):
+        continue
+    list_new.append (file_fits)
+
+# printing a message
+print (f'{len (dict_rows)} frames in "{file_output}",' \
+       f' {len (list_new)} new frames')
+
+# using "fork" to start worker processes
+context = multiprocessing.get_context ('fork')
+
+# measuring new frames
+if (njobs > 1):
+    with context.Pool (njobs) as pool:
+        list_results = list (pool.imap (measure_frame, list_new))
+else:
+    list_results = [measure_frame (file_fits) for file_fits in list_new]
+for (file_fits, results, message) in list_results:
+    print (message)
+    if (results is not None):
+        dict_rows[str (pathlib.Path (file_fits).resolve ())] = results
+
+# checking number of frames
+if (len (dict_rows) == 0):
+    # printing a message
+    print (f'ERROR: no frame is measured!')
+    # exit
+    sys.exit (1)
+
+# sorting frames by date/time
+list_files_sorted = sorted (dict_rows, key=lambda f: dict_rows[f][0])
+array_stats = numpy.array ([dict_rows[f][1] for f in list_files_sorted])
+
+# columns of table
+# (one column per quantity, so that a plot reads only needed columns)
+list_columns = [
+    astropy.io.fits.Column (name='FILE', format='256A', \
+                            array=list_files_sorted),
+    astropy.io.fits.Column (name='DATETIME', format='26A', \
+                            array=[dict_rows[f][0] \
+                                   for f in list_files_sorted]),
+]
+for (i, name) in enumerate (list_names):
+    for (j, key) in enumerate (('MEAN', 'MEDIAN', 'STDDEV')):
+        list_columns.append (astropy.io.fits.Column \
+                             (name=f'{key}_{name}', format='E', unit='adu', \
+                              array=array_stats[:, i, j]) )
+
+# making table
+hdu_table = astropy.io.fits.BinTableHDU.from_columns (list_columns, \
+                                                      name='BIAS')
+hdu_table.header['REGIONS']  = (' '.join (list_names), 'names of regions')
+hdu_table.header['NSIGMA']   = (nsigma, 'factor for sigma clipping')
+hdu_table.header['NMAXITER'] = (nmaxiter, 'maximum number of iterations')
+for region in list_region:
+    hdu_table.header['comment'] = f'region {region}'
+
+# writing table
+# (written into a temporary file first, and then renamed)
+file_tmp = f'{file_output}.tmp'
+hdu_list = astropy.io.fits.HDUList ([astropy.io.fits.PrimaryHDU (), \
+                                    hdu_table])
+hdu_list.writeto (file_tmp, overwrite=True)
+os.replace (file_tmp, file_output)
+
+# printing a message
+print (f'Finished writing {len (dict_rows)} frames into "{file_output}"!')
@@ -0,0 +1,150 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 01:49:05 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# importing matplotlib module
+import matplotlib.figure
+import matplotlib.backends.backend_agg
+import matplotlib.dates
+
+# construction of parser object
+desc = 'Plotting time variation of bias levels from a time-series table'
+parser = argparse.ArgumentParser (description=desc)
+
+# choices of statistics
+choices_stat = ['mean', 'median']
+
+# adding arguments
+parser.add_argument ('file', help='table made by advobs202302_s06_08_01.py')
+parser.add_argument ('-g', action='append', default=[], \
+                     help='region to be plotted (default: ALL)')
+parser.add_argument ('-m', choices=choices_stat, default='mean', \
+                     help='statistics to be plotted (default: mean)')
+parser.add_argument ('-a', default='', \
+                     help='start date/time, e.g. 2023-01-01 (default: all)')
+parser.add_argument ('-b', default='', \
+                     help='end date/time, e.g. 2023-02-01 (default: all)')
+parser.add_argument ('-o', default='bias_drift.png', \
+                     help='output file name (default: bias_drift.png)')
+parser.add_argument ('-r', type=int, default=300, \
+                     help='resolution of output image (default: 300)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input table and output file
+file_table  = args.file
+list_region = [region.upper () for region in args.g]
+stat        = args.m.upper ()
+start       = args.a
+end         = args.b
+file_output = args.o
+resolution  = args.r
+
+# default region
+if (len (list_region) == 0):
+    list_region = ['ALL']
+
+# making pathlib object
+path_file_output = pathlib.Path (file_output)
+
+# if output file is not either EPS, PDF, PNG, or PS, then stop
+if not (path_file_output.suffix in ['.eps', '.pdf', '.png', '.ps']):
+    # printing a message
+    print (f'ERROR: output file "{file_output}" is NOT either EPS,PNG,PDF,PS!')
+    # exit
+    sys.exit (1)
+
+# if output file exists, then stop
+if (path_file_output.exists ()):
+    # printing a message
+    print (f'ERROR: output file "{file_output}" exists!')
+    # exit
+    sys.exit (1)
+
+# if input file does not exist, then stop
+if not (pathlib.Path (file_table).exists ()):
+    # printing a message
+    print (f'ERROR: input file "{file_table}" does not exist!')
+    # exit
+    sys.exit (1)
+
+# reading columns of date/time and given regions only
+with astropy.io.fits.open (file_table) as hdu_list:
+    table = hdu_list[1].data
+    # checking regions
+    list_names = hdu_list[1].header['REGIONS'].split ()
+    for region in list_region:
+        if not (region in list_names):
+            # printing a message
+            print (f'ERROR: region "{region}" is not in "{file_table}"!')
+            print (f'       regions: {" ".join (list_names)}')
+            # exit
+            sys.exit (1)
+    # date/time
+    data_datetime = numpy.array (table['DATETIME'], dtype='datetime64[ms]')
+    # statistics
+    dict_value  = {}
+    dict_stddev = {}
+    for region in list_region:
+        dict_value[region]  = numpy.array (table[f'{stat}_{region}'])
+        dict_stddev[region] = numpy.array (table[f'STDDEV_{region}'])
+
+# selecting date/time range
+selected = numpy.ones (len (data_datetime), dtype=bool)
+if not (start == ''):
+    selected &= (data_datetime >= numpy.datetime64 (start))
+if not (end == ''):
+    selected &= (data_datetime < numpy.datetime64 (end))
+
+# checking number of frames
+if (numpy.count_nonzero (selected) == 0):
+    # printing a message
+    print (f'ERROR: no frame is in the given date/time range!')
+    # exit
+    sys.exit (1)
+
+# making objects "fig" and "ax"
+fig    = matplotlib.figure.Figure ()
+canvas = matplotlib.backends.backend_agg.FigureCanvasAgg (fig)
+ax     = fig.add_subplot (111)
+
+# labels
+ax.set_xlabel ('Date/Time [UT]')
+ax.set_ylabel (f'{stat.capitalize ()} Bias Level [ADU]')
+
+# date/time format of x-axis
+# (hours and minutes for a night, dates for longer period)
+span = data_datetime[selected].max () - data_datetime[selected].min ()
+if (span < numpy.timedelta64 (1, 'D')):
+    ax.xaxis.set_major_formatter (matplotlib.dates.DateFormatter ('%H:%M'))
+else:
+    ax.xaxis.set_major_formatter (matplotlib.dates.DateFormatter ('%m/%d'))
+
+# plotting data
+for region in list_region:
+    ax.errorbar (data_datetime[selected], dict_value[region][selected], \
+                 yerr=dict_stddev[region][selected], \
+                 marker='o', markersize=3, linestyle='none', capsize=2, \
+                 label=f'{stat.capitalize ()} bias level ({region})')
+ax.legend ()
+
+# saving the figure to a file
+fig.savefig (file_output, dpi=resolution)
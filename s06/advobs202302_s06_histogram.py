@@ -0,0 +1,76 @@
+#
+# Time-stamp: <2026/10/19 17:40:18 (CST) daisuke>
+#
+
+#
+# histograms of pixel values
+#
+#   This module is imported by advobs202302_s06_05_00.py,
+#   advobs202302_s06_05_01.py, and advobs202302_s06_05_02.py. Data are
+#   processed by blocks of rows, so that temporary arrays stay small, and
+#   counts are made by numpy.bincount instead of a loop over pixels.
+#
+
+# importing numpy module
+import numpy
+
+#
+# function to make a histogram of pixel values in bins of given width
+#
+#   Pixel values in [value_min, value_max] are counted in "nbin" bins of
+#   width "width" starting at value_min, and a value v goes into the bin of
+#   index int ((v - value_min) / width). Values equal to value_max are put
+#   into the last bin. For integer data, integer value_min, and integer
+#   width, indices are calculated by integer arithmetic.
+#
+def make_histogram (data, value_min, value_max, width, nbin, nrows=256):
+    # initialisation of histogram
+    histogram = numpy.zeros (nbin, dtype=numpy.int64)
+    # checking whether integer arithmetic can be used
+    integer = numpy.issubdtype (data.dtype, numpy.integer) \
+        and float (value_min).is_integer () and float (width).is_integer ()
+    # processing data by blocks of rows
+    for i in range (0, len (data), nrows):
+        # pixel values within the range [value_min, value_max]
+        block = numpy.ravel (data[i:i + nrows])
+        block = block[(block >= value_min) & (block <= value_max)]
+        # indices of bins
+        if (integer):
+            index = (block.astype (numpy.int64) - int (value_min)) \
+                // int (width)
+        else:
+            index = ( (block - value_min) / width).astype (numpy.int64)
+        numpy.minimum (index, nbin - 1, out=index)
+        # counting
+        histogram += numpy.bincount (index, minlength=nbin)
+    # returning histogram
+    return (histogram)
+
+#
+# function to make a histogram of pixel values in bins of given edges
+#
+#   Pixel values are counted in (len (bins) - 1) bins, as numpy.histogram
+#   and matplotlib's hist () do. A bin i is [bins[i], bins[i+1]), except
+#   for the last bin, which also includes bins[-1]. Values outside of
+#   [bins[0], bins[-1]] are not counted. Indices of bins are found by
+#   numpy.searchsorted, so that a value on an edge goes into the same bin
+#   as numpy.histogram even if the edges are not multiples of a width.
+#
+def make_histogram_edges (data, bins, nrows=256):
+    # number of bins
+    nbin = len (bins) - 1
+    # initialisation of histogram
+    histogram = numpy.zeros (nbin, dtype=numpy.int64)
+    # processing data by blocks of rows
+    for i in range (0, len (data), nrows):
+        # pixel values within the range [bins[0], bins[-1]]
+        block = numpy.ravel (data[i:i + nrows])
+        block = block[(block >= bins[0]) & (block <= bins[-1])]
+        # indices of bins
+        # (values equal to the last edge are put into the last bin)
+        index = numpy.searchsorted (bins, block, side='right') - 1
+        numpy.minimum (index, nbin - 1, out=index)
+        # counting
+        histogram += numpy.bincount (index, minlength=nbin)
+    # returning histogram
+    return (histogram)
@@ -0,0 +1,177 @@
+#
+# Time-stamp: <2026/10/19 10:12:31 (CST) daisuke>
+#
+
+#
+# vectorized sigma clipping
+#
+#   This module is imported by advobs202302_s06_06_04.py and
+#   advobs202302_s06_06_05.py. Other scripts which need only clipping of
+#   all the pixels of a frame carry a short copy of the same function.
+#
+
+# importing numpy module
+import numpy
+
+#
+# function to carry out sigma clipping
+#
+#   Pixels outside of [centre - sigma * stddev, centre + sigma * stddev]
+#   are rejected iteratively until no more pixels are rejected or the
+#   number of iterations reaches "maxiters". Once rejected, a pixel stays
+#   rejected. Non-finite values are always rejected. The algorithm is the
+#   same as that of astropy.stats.sigma_clip with stdfunc='std'.
+#
+#   Since only the smallest and largest values are rejected, accepted
+#   pixels always form a contiguous range of sorted pixel values. For
+#   clipping along an axis, pixel values are sorted once along the axis,
+#   and the range is updated using cumulative sums instead of masked arrays
+#   or NaN-aware functions.
+#
+#   Parameters:
+#     data     : input numpy array
+#     sigma    : rejection threshold in sigma
+#     maxiters : maximum number of iterations
+#     cenfunc  : 'median' or 'mean'
+#     axis     : axis along which clipping is carried out (None for all)
+#     output   : 'mask' or 'stats'
+#
+#   Returned value:
+#     for output='mask', a boolean array of the same shape as "data"
+#       (True for rejected pixels)
+#     for output='stats', (mean, median, stddev) of accepted pixels
+#
+def sigma_clip (data, sigma=3.0, maxiters=5, cenfunc='median', axis=None, \
+                output='mask'):
+    # pixel values
+    # (integers are converted into 64-bit floating point, while floating
+    #  point data are used as they are to avoid copying)
+    values = numpy.asarray (data)
+    if not (numpy.issubdtype (values.dtype, numpy.floating) ):
+        values = values.astype (numpy.float64)
+
+    # clipping using all the pixels
+    # (a 1-dim. array of accepted pixels is shrunk at each iteration)
+    if (axis is None):
+        # accepted pixels (non-finite values are rejected from the beginning)
+        accepted = values[numpy.isfinite (values)]
+        # lower and upper limits of accepted pixel values
+        low_max  = -numpy.inf
+        high_min = +numpy.inf
+        # iterations
+        for i in range (maxiters):
+            # leaving the loop, if no pixel is left
+            if (accepted.size == 0):
+                break
+            # centre value and standard deviation
+            if (cenfunc == 'median'):
+                centre = numpy.median (accepted)
+            elif (cenfunc == 'mean'):
+                centre = numpy.mean (accepted, dtype=numpy.float64)
+            stddev = numpy.std (accepted, dtype=numpy.float64)
+            # lower and upper limits
+            low  = centre - sigma * stddev
+            high = centre + sigma * stddev
+            # pixels within the limits
+            within = (accepted >= low) & (accepted <= high)
+            # leaving the loop, if no pixel is newly rejected
+            if (within.all ()):
+                break
+            # updating accepted pixels and limits
+            accepted = accepted[within]
+            low_max  = max (low_max, low)
+            high_min = min (high_min, high)
+        # returning results
+        if (output == 'mask'):
+            return ( ~(numpy.isfinite (values) & (values >= low_max) \
+                       & (values <= high_min) ) )
+        elif (output == 'stats'):
+            return (numpy.mean (accepted, dtype=numpy.float64), \
+                    numpy.median (accepted), \
+                    numpy.std (accepted, dtype=numpy.float64))
+
+    # clipping along given axis
+    # moving the axis to the first and sorting pixel values along it
+    # (non-finite values are replaced by +inf and placed at the end)
+    finite = numpy.isfinite (values)
+    work   = numpy.moveaxis (numpy.where (finite, values, numpy.inf), axis, 0)
+    work   = numpy.sort (work, axis=0)
+    # accepted pixels are work[lo:hi]
+    lo = numpy.zeros (work.shape[1:], dtype=numpy.intp)
+    hi = numpy.count_nonzero (numpy.moveaxis (finite, axis, 0), axis=0)
+
+    # function to pick up values at given indices along the first axis
+    def take (array, index):
+        return (numpy.take_along_axis (array, index[numpy.newaxis], \
+                                       axis=0)[0])
+
+    # cumulative sums of sorted values and their squares
+    # (a reference value is subtracted to avoid loss of precision)
+    ref   = take (work, hi // 2)
+    ref   = numpy.where (numpy.isfinite (ref), ref, 0.0)
+    fwork = numpy.subtract (work, ref, dtype=numpy.float64)
+    fwork[~numpy.isfinite (fwork)] = 0.0
+    csum  = numpy.zeros ( (work.shape[0] + 1,) + work.shape[1:] )
+    csum2 = numpy.zeros ( (work.shape[0] + 1,) + work.shape[1:] )
+    numpy.cumsum (fwork, axis=0, out=csum[1:])
+    numpy.square (fwork, out=fwork)
+    numpy.cumsum (fwork, axis=0, out=csum2[1:])
+    del fwork
+
+    # function to calculate statistical values of work[lo:hi]
+    def calc_stats (lo, hi):
+        # number of accepted pixels
+        n = hi - lo
+        # mean and standard deviation from cumulative sums
+        dmean  = (take (csum, hi) - take (csum, lo)) / n
+        var    = (take (csum2, hi) - take (csum2, lo)) / n - dmean**2
+        mean   = ref + dmean
+        stddev = numpy.sqrt (numpy.maximum (var, 0.0))
+        # median from the middle of the range
+        # (index is clipped to avoid invalid index for an empty range)
+        nmax   = work.shape[0] - 1
+        i0     = numpy.clip ( (lo + hi - 1) // 2, 0, nmax)
+        i1     = numpy.clip ( (lo + hi) // 2, 0, nmax)
+        median = numpy.where (n > 0, 0.5 * (take (work, i0) + take (work, i1)), \
+                              numpy.nan)
+        # returning statistical values
+        return (mean, median, stddev)
+
+    # ignoring warnings for an empty range
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        # iterations
+        for i in range (maxiters):
+            # centre value and standard deviation
+            mean, median, stddev = calc_stats (lo, hi)
+            if (cenfunc == 'median'):
+                centre = median
+            elif (cenfunc == 'mean'):
+                centre = mean
+            # lower and upper limits
+            low  = centre - sigma * stddev
+            high = centre + sigma * stddev
+            # new range of accepted pixels
+            lo_new = numpy.maximum (lo, numpy.count_nonzero (work < low, \
+                                                             axis=0) )
+            hi_new = numpy.minimum (hi, numpy.count_nonzero (work <= high, \
+                                                             axis=0) )
+            hi_new = numpy.maximum (lo_new, hi_new)
+            # leaving the loop, if no pixel is newly rejected
+            if ( numpy.array_equal (lo, lo_new) \
+                 and numpy.array_equal (hi, hi_new) ):
+                break
+            # updating range
+            lo = lo_new
+            hi = hi_new
+        # statistical values of accepted pixels
+        if (output == 'stats'):
+            return (calc_stats (lo, hi))
+
+    # smallest and largest accepted values
+    # (pixels of the same value are either all accepted or all rejected)
+    nmax   = work.shape[0] - 1
+    v_low  = numpy.expand_dims (take (work, numpy.clip (lo, 0, nmax)), axis)
+    v_high = numpy.expand_dims (take (work, numpy.clip (hi - 1, 0, nmax)), axis)
+    empty  = numpy.expand_dims (hi <= lo, axis)
+    # returning mask
+    return ( ~(finite & (values >= v_low) & (values <= v_high) & ~empty) )
@@ -23,10 +23,21 @@ import numpy
 import astropy.io.fits
 import astropy.stats
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
 # construction of parser object
 desc   = 'Combining images'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 choices_rejection = ['none', 'sigclip']
 choices_cenfunc   = ['mean', 'median']
@@ -42,18 +53,35 @@ parser.add_argument ('-c', '--cenfunc', choices=choices_cenfunc, \
                      help='method to estimate centre value (default: mean)')
 parser.add_argument ('-o', '--output', default='combined.fits', \
                      help='output FITS file')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('files', nargs='+', help='input FITS files')
 
 # command-line argument analysis
 args = parser.parse_args ()
 
 # parameters given by command-line arguments
-list_input  = args.files
-file_output = args.output
-rejection   = args.rejection
-threshold   = args.threshold
-cenfunc     = args.cenfunc
-maxiters    = args.maxiters
+list_input     = args.files
+file_output    = args.output
+rejection      = args.rejection
+threshold      = args.threshold
+cenfunc        = args.cenfunc
+maxiters       = args.maxiters
+output_format  = args.output_format
+quantize_level = args.quantize_level
+precision      = args.precision
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # command name
 command = sys.argv[0]
@@ -125,8 +153,8 @@ for i in range (len (list_input)):
         
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # primary HDU
-        hdu0 = hdu_list[0]
+        # HDU of image data
+        hdu0 = find_image_hdu (hdu_list)
 
         # reading header only for the first FITS file
         if (i == 0):
@@ -136,12 +164,20 @@ for i in range (len (list_input)):
         data0 = hdu0.data
 
     # constructing a data cube
+    # (a data cube is allocated only once and filled in place)
     if (i == 0):
-        tmp0 = data0
-    elif (i == 1):
-        cube = numpy.concatenate ( ([tmp0], [data0]), axis=0 )
-    else:
-        cube = numpy.concatenate ( (cube, [data0]), axis=0 )
+        if (precision == 'float32'):
+            dtype_cube = dtype_pixel
+        else:
+            dtype_cube = data0.dtype
+        cube = numpy.empty ( (len (list_input),) + data0.shape, \
+                             dtype=dtype_cube )
+    # (if a frame has a wider data type than the cube, the cube is
+    #  converted, as numpy.concatenate would do, except for float32)
+    elif ( (precision != 'float32') \
+           and (numpy.result_type (cube.dtype, data0.dtype) != cube.dtype) ):
+        cube = cube.astype (numpy.result_type (cube.dtype, data0.dtype))
+    cube[i] = data0
 
     # printing status
     print (f'# finished reading FITS file "{file_fits}"!')
@@ -159,7 +195,11 @@ if (rejection == 'sigclip'):
                                              axis=0)
 elif (rejection == 'none'):
     # combining using simple mean
-    combined = numpy.nanmean (cube, axis=0)
+    # (sums are accumulated in 64-bit floating point numbers)
+    combined = numpy.nanmean (cube, axis=0, dtype=numpy.float64)
+
+# keeping combined image in given precision
+combined = combined.astype (dtype_pixel, copy=False)
 
 # printing status
 print (f'# finished combining FITS files!')
@@ -180,7 +220,8 @@ header0['comment'] = "  maxiters  = %d" % (maxiters)
 header0['comment'] = "  cenfunc   = %s" % (cenfunc)
 
 # writing a new FITS file
-astropy.io.fits.writeto (file_output, combined, header=header0)
+write_fits_image (file_output, combined, header0, output_format, \
+                  quantize_level)
 
 # printing status
 print (f'# finished writing FITS file "{file_output}"!')
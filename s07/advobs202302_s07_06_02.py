@@ -0,0 +1,336 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 03:12:40 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing datetime module
+import datetime
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.stats
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# construction of parser object
+desc   = 'Fitting dark current rate and offset of each pixel over exposures'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+choices_rejection = ['none', 'sigclip']
+parser.add_argument ('-r', '--rejection', choices=choices_rejection, \
+                     default='sigclip', \
+                     help='outlier rejection algorithm (default: sigclip)')
+parser.add_argument ('-t', '--threshold', type=float, default=4.0, \
+                     help='rejection threshold in sigma (default: 4)')
+parser.add_argument ('-n', '--maxiters', type=int, default=5, \
+                     help='maximum number of iterations (default: 5)')
+parser.add_argument ('-k', '--hot-threshold', type=float, default=5.0, \
+                     help='threshold of hot pixels in sigma of rate map' \
+                     + ' (default: 5)')
+parser.add_argument ('-s', '--chunk-rows', type=int, default=0, \
+                     help='number of rows processed at once' \
+                     + ' (default: 0 = whole frame)')
+parser.add_argument ('-a', '--rate', default='dark_rate.fits', \
+                     help='output dark current rate map in ADU/sec' \
+                     + ' (default: dark_rate.fits)')
+parser.add_argument ('-b', '--offset', default='dark_offset.fits', \
+                     help='output offset (bias) map in ADU' \
+                     + ' (default: dark_offset.fits)')
+parser.add_argument ('-m', '--mask', default='dark_hot.fits', \
+                     help='output hot pixel mask (default: dark_hot.fits)')
+parser.add_argument ('-e', '--exptime', default='EXPTIME', \
+                     help='FITS keyword for exposure time (default: EXPTIME)')
+parser.add_argument ('files', nargs='+', \
+                     help='dark frames of various exposure times')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters given by command-line arguments
+list_input      = args.files
+rejection       = args.rejection
+threshold       = args.threshold
+maxiters        = args.maxiters
+hot_threshold   = args.hot_threshold
+nrows_chunk     = args.chunk_rows
+file_rate       = args.rate
+file_offset     = args.offset
+file_mask       = args.mask
+keyword_exptime = args.exptime
+
+# command name
+command = sys.argv[0]
+
+# date/time
+now = datetime.datetime.now ().isoformat ()
+
+# checking input files
+for file_fits in list_input:
+    # making pathlib object
+    path_fits = pathlib.Path (file_fits)
+
+    # if the file is not a FITS file, then stop the script
+    if not (path_fits.suffix == '.fits'):
+        # printing error message
+        print (f'ERROR: Input files must be FITS files!')
+        print (f'ERROR: The file "{file_fits}" is not a FITS file!')
+        # exit the script
+        sys.exit ()
+
+    # existence check
+    if not (path_fits.exists ()):
+        # printing error message
+        print (f'ERROR: the file "{file_fits}" does not exist!')
+        # exit the script
+        sys.exit ()
+
+# checking output files
+for file_output in (file_rate, file_offset, file_mask):
+    # if the file is not a FITS file, then stop the script
+    if not (pathlib.Path (file_output).suffix == '.fits'):
+        # printing error message
+        print (f'ERROR: the file "{file_output}" is not a FITS file!')
+        # exit the script
+        sys.exit ()
+    # existence check
+    if (pathlib.Path (file_output).exists ()):
+        # printing error message
+        print (f'ERROR: the file "{file_output}" exists!')
+        # exit the script
+        sys.exit ()
+
+#
+# function to read rows of an image
+#
+#   The file is memory-mapped without scaling, so that only given rows are
+#   read from the disk. BZERO and BSCALE are applied to the rows.
+#
+def read_rows (hdu, y_min, y_max):
+    # raw values
+    rows = hdu.section[y_min:y_max].astype (numpy.float32)
+    # scaling
+    bscale = hdu.header.get ('BSCALE', 1.0)
+    bzero  = hdu.header.get ('BZERO', 0.0)
+    if not (bscale == 1.0):
+        rows *= bscale
+    if not (bzero == 0.0):
+        rows += bzero
+    # returning rows
+    return (rows)
+
+#
+# function to solve normal equations of weighted linear least-squares
+#
+#   y = a * t + b is fitted along the first axis of an array of (N, npix)
+#   in closed form,
+#
+#     a = (S0 * Sty - St * Sy) / (S0 * Stt - St**2)
+#     b = (Sy - a * St) / S0
+#
+#   where S0, St, Stt, Sy, and Sty are weighted sums of 1, t, t**2, y, and
+#   t * y over frames. The sums are calculated for all the pixels at once
+#   in 64-bit floating point numbers. NaN is given to pixels having less
+#   than two exposure times.
+#
+def solve_normal_equations (t, weight, y):
+    # weighted sums
+    wy  = weight * y
+    s0  = numpy.sum (weight, axis=0, dtype=numpy.float64)
+    st  = numpy.sum (weight * t, axis=0)
+    stt = numpy.sum (weight * t**2, axis=0)
+    sy  = numpy.sum (wy, axis=0, dtype=numpy.float64)
+    sty = numpy.sum (wy * t, axis=0)
+    # slope and intercept
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        determinant = s0 * stt - st**2
+        a = (s0 * sty - st * sy) / determinant
+        b = (sy - a * st) / s0
+    a[determinant <= 0.0] = numpy.nan
+    b[determinant <= 0.0] = numpy.nan
+    # returning slope, intercept, and sum of weights
+    return (a, b, s0)
+
+#
+# function to fit a line to each pixel of a data cube
+#
+#   A line is fitted to each pixel of a cube of (N, ny, nx) along the first
+#   axis. For sigma-clipping, points deviating from the line by more than
+#   "threshold" times sigma of the pixel are given zero weight, and only
+#   the pixels having newly rejected points are fitted again. Sigma is
+#   estimated as 1.4826 times median absolute residual, since rms of
+#   residuals is inflated by the outlier itself (for N points, no residual
+#   can exceed sqrt (N - 2) times rms).
+#
+def fit_cube (t, cube):
+    # exposure times as an array of (N, 1)
+    t = numpy.asarray (t, dtype=numpy.float64).reshape (-1, 1)
+    # cube as an array of (N, number of pixels)
+    (nframes, ny, nx) = cube.shape
+    y = cube.reshape (nframes, ny * nx)
+    # fitting all the pixels with equal weights
+    weight = numpy.ones (y.shape, dtype=numpy.float32)
+    (a, b, s0) = solve_normal_equations (t, weight, y)
+    # indices of pixels to be examined
+    active = numpy.arange (ny * nx)
+    # iterations of rejection
+    for i in range (maxiters if (rejection == 'sigclip') else 0):
+        # residuals and weights of pixels to be examined
+        residual = numpy.abs (y[:, active] - (a[active] * t + b[active])) \
+            .astype (numpy.float32)
+        weight_active = weight[:, active]
+        # sigma of residuals of each pixel
+        # (rejected points are sorted to the end as infinity, and the median
+        #  of used points is picked up by index, which is faster than
+        #  numpy.nanmedian)
+        residual_sorted = numpy.sort (numpy.where (weight_active > 0.0, \
+                                                   residual, numpy.inf), \
+                                      axis=0)
+        nused    = numpy.maximum (s0[active].astype (numpy.int64), 1)
+        index_lo = ( (nused - 1) // 2)[numpy.newaxis]
+        index_hi = (nused // 2)[numpy.newaxis]
+        sigma    = 1.4826 * 0.5 \
+            * (numpy.take_along_axis (residual_sorted, index_lo, 0) \
+               + numpy.take_along_axis (residual_sorted, index_hi, 0))[0]
+        # (no point is rejected for pixels having only two points)
+        sigma[~(s0[active] > 2.0)] = numpy.inf
+        # new weights
+        weight_new = (residual <= threshold * sigma) \
+            .astype (numpy.float32) * weight_active
+        # pixels having newly rejected points
+        changed = numpy.any (weight_new != weight_active, axis=0)
+        if not (numpy.any (changed)):
+            break
+        active = active[changed]
+        weight[:, active] = weight_new[:, changed]
+        # fitting again
+        (a[active], b[active], s0[active]) \
+            = solve_normal_equations (t, weight[:, active], y[:, active])
+    # returning slope and intercept
+    return (a.reshape (ny, nx).astype (numpy.float32), \
+            b.reshape (ny, nx).astype (numpy.float32))
+
+# opening FITS files
+# (files are memory-mapped, and only the rows of a chunk are read at once)
+list_hdu_list = []
+list_hdu      = []
+list_exptime  = []
+for file_fits in list_input:
+    hdu_list = astropy.io.fits.open (file_fits, memmap=True, \
+                                     do_not_scale_image_data=True)
+    hdu      = find_image_hdu (hdu_list)
+    list_hdu_list.append (hdu_list)
+    list_hdu.append (hdu)
+    list_exptime.append (float (hdu.header[keyword_exptime]) )
+
+# checking image sizes and exposure times
+shape = list_hdu[0].shape
+for (file_fits, hdu) in zip (list_input, list_hdu):
+    if not (hdu.shape == shape):
+        # printing error message
+        print (f'ERROR: image size of "{file_fits}" is different!')
+        # exit the script
+        sys.exit ()
+if (len (set (list_exptime)) < 2):
+    # printing error message
+    print (f'ERROR: dark frames of at least two exposure times are needed!')
+    # exit the script
+    sys.exit ()
+
+# number of rows of a chunk
+(ny, nx) = shape
+if (nrows_chunk <= 0):
+    nrows_chunk = ny
+
+# printing status
+print (f'# {len (list_input)} dark frames of exposure times' \
+       f' {sorted (set (list_exptime))}')
+print (f'# image size = {nx} x {ny}, {nrows_chunk} rows at once')
+
+# output maps
+map_rate   = numpy.empty (shape, dtype=numpy.float32)
+map_offset = numpy.empty (shape, dtype=numpy.float32)
+
+# fitting chunk-by-chunk
+for y_min in range (0, ny, nrows_chunk):
+    y_max = min (y_min + nrows_chunk, ny)
+    # data cube of the chunk
+    cube = numpy.empty ( (len (list_hdu), y_max - y_min, nx), \
+                         dtype=numpy.float32 )
+    for i in range (len (list_hdu)):
+        cube[i] = read_rows (list_hdu[i], y_min, y_max)
+    # fitting
+    (map_rate[y_min:y_max], map_offset[y_min:y_max]) \
+        = fit_cube (list_exptime, cube)
+
+# closing FITS files
+for hdu_list in list_hdu_list:
+    hdu_list.close ()
+
+# hot pixels
+# (pixels of dark current rate higher than the clipped mean by more than
+#  "hot_threshold" times clipped stddev of the rate map)
+(rate_mean, rate_median, rate_stddev) \
+    = astropy.stats.sigma_clipped_stats (map_rate, sigma=threshold, \
+                                         maxiters=10)
+rate_limit = rate_mean + hot_threshold * rate_stddev
+map_hot    = numpy.zeros (shape, dtype=numpy.uint8)
+map_hot[~(map_rate <= rate_limit)] = 1
+
+# printing results
+print (f'# dark current rate = {rate_median:.5f} ADU/sec (median),' \
+       f' {rate_stddev:.5f} ADU/sec (stddev)')
+print (f'# offset            = {numpy.nanmedian (map_offset):.3f} ADU' \
+       f' (median)')
+print (f'# hot pixels        = {numpy.count_nonzero (map_hot)}' \
+       f' (rate > {rate_limit:.5f} ADU/sec)')
+
+# header of output files
+header = astropy.io.fits.Header ()
+header['EXPMIN']   = (min (list_exptime), 'minimum exposure time of darks')
+header['EXPMAX']   = (max (list_exptime), 'maximum exposure time of darks')
+header['NDARK']    = (len (list_input), 'number of dark frames')
+header['history']  = f'FITS file created by the command "{command}"'
+header['history']  = f'Updated on {now}'
+header['comment']  = f'per-pixel fit of "pixel value = rate * exptime' \
+    + f' + offset"'
+header['comment']  = f'rejection = {rejection}, threshold = {threshold},' \
+    + f' maxiters = {maxiters}'
+for file_fits in list_input:
+    header['comment'] = f'dark frame: {file_fits}'
+
+# writing rate map
+header_rate = header.copy ()
+header_rate['IMAGETYP'] = ('DARKRATE', 'dark current rate map')
+header_rate['BUNIT']    = ('adu/s', 'unit of pixel values')
+astropy.io.fits.writeto (file_rate, map_rate, header=header_rate)
+
+# writing offset map
+header_offset = header.copy ()
+header_offset['IMAGETYP'] = ('DARKOFFS', 'offset map of dark frames')
+header_offset['BUNIT']    = ('adu', 'unit of pixel values')
+astropy.io.fits.writeto (file_offset, map_offset, header=header_offset)
+
+# writing hot pixel mask
+header_mask = header.copy ()
+header_mask['IMAGETYP'] = ('HOTPIX', 'hot pixel mask (1 = hot)')
+header_mask['RATELIM']  = (rate_limit, 'rate limit for hot pixels [ADU/s]')
+astropy.io.fits.writeto (file_mask, map_hot, header=header_mask)
@@ -201,12 +201,16 @@ for file_fits in list_input:
     normalised0 = data0 / mean
     
     # constructing a data cube
+    # (a data cube is allocated only once and filled in place)
     if (i == 0):
-        tmp0 = normalised0
-    elif (i == 1):
-        cube = numpy.concatenate ( ([tmp0], [normalised0]), axis=0 )
-    else:
-        cube = numpy.concatenate ( (cube, [normalised0]), axis=0 )
+        cube = numpy.empty ( (len (list_input),) + normalised0.shape, \
+                             dtype=normalised0.dtype )
+    # (if a frame has a wider data type than the cube, the cube is
+    #  converted, as numpy.concatenate would do)
+    elif (numpy.result_type (cube.dtype, normalised0.dtype) \
+          != cube.dtype):
+        cube = cube.astype (numpy.result_type (cube.dtype, normalised0.dtype))
+    cube[i] = normalised0
     
     # incrementing the parameter "i"
     i += 1
@@ -214,6 +218,9 @@ for file_fits in list_input:
     # printing information
     print (f'#   {file_fits} (mean = {mean:8.2f})')
 
+# using only filled part of the data cube
+cube = cube[:i]
+
 # printing information
 print (f'# Output file name: {file_output}')
 print (f'# Parameters:')
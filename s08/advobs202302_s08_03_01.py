@@ -200,14 +200,17 @@ for file_fits in list_input:
     
     # constructing a data cube
     if (i == 0):
-        # for the first file, copying "data0" to "tmp0"
-        tmp0 = data0
-    elif (i == 1):
-        # for the second file, concatenating "tmp0" and "data0"
-        cube = numpy.concatenate ( ([tmp0], [data0]), axis=0 )
-    else:
-        # for the rest, concatenating "cube" and "data0"
-        cube = numpy.concatenate ( (cube, [data0]), axis=0 )
+        # for the first file, allocating a data cube large enough to
+        # store all the input files
+        cube = numpy.empty ( (len (list_input),) + data0.shape, \
+                             dtype=data0.dtype )
+    # (if a frame has a wider data type than the cube, the cube is
+    #  converted, as numpy.concatenate would do)
+    elif (numpy.result_type (cube.dtype, data0.dtype) \
+          != cube.dtype):
+        cube = cube.astype (numpy.result_type (cube.dtype, data0.dtype))
+    # storing "data0" in the data cube
+    cube[i] = data0
     
     # incrementing the parameter "i"
     i += 1
@@ -215,6 +218,9 @@ for file_fits in list_input:
     # printing file name of FITS file to be combined
     print (f'#  {file_fits}')
 
+# using only filled part of the data cube
+cube = cube[:i]
+
 # printing information
 print (f'#')
 print (f'# Output file name: "{file_output}"')
@@ -25,10 +25,25 @@ import scipy.stats
 # importing astropy module
 import astropy.io.fits
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
+# importing advobs202302_calcache module
+from advobs202302_calcache import make_calibration_cache, \
+    read_calibration_frame, model_dark_frame
+
 # construction of parser object
 desc   = 'Dark subtraction for multiple FITS files of different exposure time'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 choices_rejection = ['none', 'sigclip']
 choices_datatype  = ['LIGHT', 'FLAT', 'DARK', 'BIAS']
@@ -44,6 +59,25 @@ parser.add_argument ('-f', '--filtername', choices=choices_filter, \
                      default='__NONE__', help='accepted data type')
 parser.add_argument ('-s', '--subtrahend', default='dark_', \
                      help='prefix of subtrahend FITS file (default: "dark_")')
+parser.add_argument ('-m', '--max-cache', type=float, default=2048.0, \
+                     help='maximum size of calibration frame cache in MB' \
+                     + ' (default: 2048)')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-a', '--dark-rate', default='', \
+                     help='dark current rate map for dark model' \
+                     + ' (default: none)')
+parser.add_argument ('-b', '--dark-offset', default='', \
+                     help='offset map or master bias for dark model' \
+                     + ' (default: none)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('minuend', nargs='+', help='minuend (FITS file)')
 
 # command-line argument analysis
@@ -56,6 +90,19 @@ date             = args.date
 datatype         = args.datatype
 exptime          = args.exptime
 filtername       = args.filtername
+cache_size_max   = args.max_cache
+output_format    = args.output_format
+quantize_level   = args.quantize_level
+precision        = args.precision
+file_dark_rate   = args.dark_rate
+file_dark_offset = args.dark_offset
+
+# dark frames are made from offset and dark current rate maps, if given
+dark_model = (file_dark_rate != '')
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # command name
 command = sys.argv[0]
@@ -66,8 +113,8 @@ command = sys.argv[0]
 def read_fits (file_fits):
     # opening a FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # primary HDU
-        hdu0 = hdu_list[0]
+        # HDU of image data
+        hdu0 = find_image_hdu (hdu_list)
         # header
         header0 = hdu0.header
         # data
@@ -81,13 +128,33 @@ def read_fits (file_fits):
 def read_fits_header_only (file_fits):
     # opening a FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # primary HDU
-        hdu0 = hdu_list[0]
+        # HDU of image data
+        hdu0 = find_image_hdu (hdu_list)
         # header
         header0 = hdu0.header
     # returning header and data
     return (header0)
 
+# cache of master calibration frames
+# (for float32, frames are converted into 32-bit floating point numbers)
+cache_calibration = make_calibration_cache \
+    (cache_size_max, numpy.float32 if (precision == 'float32') else None)
+stats_cache       = cache_calibration['stats']
+
+# checking files of dark model
+# (both dark current rate map and offset map are needed)
+if ( (file_dark_rate == '') != (file_dark_offset == '') ):
+    # printing error message
+    print (f'ERROR: both dark current rate map and offset map are needed!')
+    # exit the script
+    sys.exit ()
+for file_map in (file_dark_rate, file_dark_offset):
+    if ( (file_map != '') and not (pathlib.Path (file_map).exists ()) ):
+        # printing error message
+        print (f'ERROR: file "{file_map}" does not exist!')
+        # exit the script
+        sys.exit ()
+
 # processing files
 for file_minuend in list_minuend:
     # making a pathlib object
@@ -151,36 +218,67 @@ for file_minuend in list_minuend:
     # exposure time of the FITS file
     target_exptime = header_minuend['EXPTIME']
 
-    # file name of combined dark frame
-    file_subtrahend = f'{file_dark_prefix}{int (target_exptime):04d}.fits'
+    # if maps are given, then a model dark frame is used
+    if (dark_model):
+        # description of model dark frame
+        file_subtrahend \
+            = f'({file_dark_offset} + {file_dark_rate} * {target_exptime})'
 
-    # making a pathlib object
-    path_subtrahend = pathlib.Path (file_subtrahend)
+        # printing message
+        print (f'#   now making a model dark frame "{file_subtrahend}"...')
 
-    # if the extension of the file is not '.fits', then skip
-    if (path_subtrahend.suffix != '.fits'):
-        # printing error message
-        print (f'ERROR: subtrahend file must be FITS file!')
-        print (f'ERROR: the file "{file_subtrahend}" is not a FITS file!')
-        # exiting
-        sys.exit ()
+        # making model dark frame from the cache
+        (header_subtrahend, data_subtrahend) \
+            = model_dark_frame (cache_calibration, target_exptime, \
+                                file_dark_rate, file_dark_offset)
 
-    # existence check of subtrahend FITS file
-    if not (path_subtrahend.exists ()):
-        # printing error message
-        print (f'ERROR: subtrahend file does not exist!')
-        print (f'ERROR: file "{file_fits}" does not exist!')
-        # exiting
-        sys.exit ()
+        # warning for extrapolation outside exposure times of darks
+        if not (header_subtrahend['EXPMIN'] <= target_exptime \
+                <= header_subtrahend['EXPMAX']):
+            print (f'#   WARNING: exposure time {target_exptime} is outside' \
+                   + f' the range of darks' \
+                   + f' ({header_subtrahend["EXPMIN"]} -' \
+                   + f' {header_subtrahend["EXPMAX"]})!')
 
-    # printing message
-    print (f'#   now reading the data from "{file_subtrahend}"...')
+        # printing message
+        print (f'#   finished making a model dark frame!')
+
+    # otherwise, combined dark frame of the same exposure time is used
+    else:
+        # file name of combined dark frame
+        file_subtrahend \
+            = f'{file_dark_prefix}{int (target_exptime):04d}.fits'
+
+        # making a pathlib object
+        path_subtrahend = pathlib.Path (file_subtrahend)
+
+        # if the extension of the file is not '.fits', then skip
+        if (path_subtrahend.suffix != '.fits'):
+            # printing error message
+            print (f'ERROR: subtrahend file must be FITS file!')
+            print (f'ERROR: the file "{file_subtrahend}" is not a FITS file!')
+            # exiting
+            sys.exit ()
+
+        # existence check of subtrahend FITS file
+        if not (path_subtrahend.exists ()):
+            # printing error message
+            print (f'ERROR: subtrahend file does not exist!')
+            print (f'ERROR: file "{file_subtrahend}" does not exist!')
+            # exiting
+            sys.exit ()
 
-    # opening FITS file
-    (header_subtrahend, data_subtrahend) = read_fits (file_subtrahend)
+        # printing message
+        print (f'#   now reading the data from "{file_subtrahend}"...')
 
-    # printing message
-    print (f'#   finished reading the data from "{file_subtrahend}"!')
+        # reading header and data from the cache
+        (header_subtrahend, data_subtrahend) \
+            = read_calibration_frame (cache_calibration, 'DARK', \
+                                      target_exptime, '__NONE__', \
+                                      file_subtrahend)
+
+        # printing message
+        print (f'#   finished reading the data from "{file_subtrahend}"!')
 
     #
     # image subtraction
@@ -201,7 +299,14 @@ for file_minuend in list_minuend:
     print (f'#   now, subtracting {file_subtrahend} from {file_minuend}...')
 
     # calculation for image subtraction
-    data_subtracted = data_minuend - data_subtrahend
+    # (for float32, minuend is converted into 32-bit floating point numbers
+    #  and subtrahend is subtracted in place)
+    if (precision == 'float32'):
+        data_subtracted = data_minuend.astype (numpy.float32)
+        numpy.subtract (data_subtracted, data_subtrahend, \
+                        out=data_subtracted, casting='unsafe')
+    else:
+        data_subtracted = data_minuend - data_subtrahend
 
     # printing status
     print (f'#   finished subtracting {file_subtrahend} from {file_minuend}!')
@@ -222,10 +327,15 @@ for file_minuend in list_minuend:
     header_minuend['comment'] = f'  output     = {file_output}'
 
     # writing a new FITS file
-    astropy.io.fits.writeto (file_output, data_subtracted, \
-                             header=header_minuend)
+    write_fits_image (file_output, data_subtracted, header_minuend, \
+                      output_format, quantize_level)
 
     # printing status
     print (f'#   finished writing a FITS file {file_output}!')
     print (f'# Finished processing the file "{file_minuend}"!')
     print (f'#')
+
+# printing statistics of the cache
+print (f'# calibration frame cache: {stats_cache["read"]} frames read,', \
+       f'{stats_cache["model"]} model darks made,', \
+       f'{stats_cache["hit"]} times reused')
@@ -0,0 +1,159 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 16:02:11 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing concurrent.futures module
+import concurrent.futures
+
+# importing numpy module
+import numpy
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header
+
+# construction of parser object
+desc   = 'Generating a simple observing log by reading only FITS headers'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+default_keyword = 'DATE-OBS,TIME-OBS,IMAGETYP,EXPTIME,FILTER'
+parser.add_argument ('-k', '--keywords', default=default_keyword, \
+                     help='a list of keywords to check (e.g. TIME-OBS,EXPTIME)')
+parser.add_argument ('-j', '--threads', type=int, default=8, \
+                     help='number of threads for reading files (default: 8)')
+parser.add_argument ('-o', '--output', default='', \
+                     help='output file for structured array (.npy)')
+parser.add_argument ('files', nargs='+', help='FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+keywords    = args.keywords
+nthreads    = args.threads
+file_output = args.output
+list_files  = args.files
+
+# a list of keywords
+list_keywords = keywords.split (',')
+
+# checking number of threads
+if (nthreads < 1):
+    # printing message
+    print (f'ERROR: number of threads must be 1 or larger!')
+    # exit
+    sys.exit ()
+
+# checking output file
+if not ( (file_output == '') or (file_output[-4:] == '.npy') ):
+    # printing message
+    print (f'ERROR: output file must be a .npy file!')
+    # exit
+    sys.exit ()
+
+#
+# function to make a structured array from values of keywords
+#
+#   Numerical keywords are stored as 64-bit floating point numbers (NaN for
+#   missing values), and others as strings ('__NONE__' for missing values).
+#
+def make_table (list_names, list_records):
+    # list of data types
+    list_dtype = [ ('FILENAME', f'U{max ([len (s) for s in list_names])}') ]
+    for key in list_keywords:
+        # values of the keyword
+        values = [record[key] for record in list_records \
+                  if record[key] is not None]
+        # numerical values
+        if ( (len (values) > 0) \
+             and all ( [isinstance (v, (int, float)) \
+                        and not isinstance (v, bool) for v in values] ) ):
+            list_dtype.append ( (key, numpy.float64) )
+        # character strings
+        else:
+            length = max ([len (str (v)) for v in values] + [8])
+            list_dtype.append ( (key, f'U{length}') )
+    # making a structured array
+    table = numpy.empty (len (list_records), dtype=list_dtype)
+    table['FILENAME'] = list_names
+    for key in list_keywords:
+        if (table.dtype[key] == numpy.float64):
+            table[key] = [numpy.nan if record[key] is None else record[key] \
+                          for record in list_records]
+        else:
+            table[key] = ['__NONE__' if record[key] is None \
+                          else str (record[key]) for record in list_records]
+    # returning table
+    return (table)
+
+# selecting FITS files
+list_target = []
+for file_fits in list_files:
+    # making a pathlib object
+    path_fits = pathlib.Path (file_fits)
+
+    # if the extension of the file is not '.fits', then skip
+    if (path_fits.suffix != '.fits'):
+        continue
+
+    # if the file does not exist, then skip
+    if not (path_fits.exists ()):
+        continue
+
+    # appending the file to the list
+    list_target.append (file_fits)
+
+# checking number of FITS files
+if (len (list_target) == 0):
+    # printing message
+    print (f'ERROR: no FITS file is found!')
+    # exit
+    sys.exit ()
+
+# reading headers concurrently
+# (threads are useful for hiding latency of network file systems)
+with concurrent.futures.ThreadPoolExecutor (max_workers=nthreads) as executor:
+    list_records = list (executor.map (scan_header, list_target, \
+                                       [list_keywords] * len (list_target)))
+
+# making a structured array
+list_names = [pathlib.Path (file_fits).stem for file_fits in list_target]
+table      = make_table (list_names, list_records)
+
+# writing structured array into a file
+if not (file_output == ''):
+    numpy.save (file_output, table)
+
+# printing header
+print (f'# FILENAME,{keywords}')
+
+# printing information
+for i in range (len (table)):
+    # gathering information from FITS header
+    record = f'{list_names[i]}  '
+    # processing for each keyword
+    for key in list_keywords:
+        value = list_records[i][key]
+        if (value is None):
+            value = f'__NONE__'
+        elif ( (key == 'DATE-OBS') and (len (str (value)) > 10) ):
+            value = value[:10]
+        # appending value to the end of "record"
+        record += f' {str (value):10s}'
+    # printing information
+    print (f'{record}')
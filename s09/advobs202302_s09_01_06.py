@@ -0,0 +1,140 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 16:37:50 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing pathlib module
+import pathlib
+
+# importing sys module
+import sys
+
+# importing tempfile module
+import tempfile
+
+# importing time module
+import time
+
+# importing concurrent.futures module
+import concurrent.futures
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header
+
+# construction of parser object
+desc   = 'Benchmark of reading FITS headers: Astropy vs header-only scanner'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+default_keyword = 'DATE-OBS,IMAGETYP,EXPTIME,FILTER'
+parser.add_argument ('-k', '--keywords', default=default_keyword, \
+                     help='a list of keywords to read')
+parser.add_argument ('-n', '--nfiles', type=int, default=2000, \
+                     help='number of FITS files (default: 2000)')
+parser.add_argument ('-s', '--size', type=int, default=512, \
+                     help='image size (default: 512)')
+parser.add_argument ('-j', '--threads', type=int, default=8, \
+                     help='number of threads (default: 8)')
+parser.add_argument ('-d', '--directory', default='', \
+                     help='directory for test files, e.g. on NFS' \
+                     + ' (default: temporary directory)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+list_keywords = args.keywords.split (',')
+nfiles        = args.nfiles
+size          = args.size
+nthreads      = args.threads
+dir_test      = args.directory
+
+#
+# function to read values of given keywords using Astropy
+#
+def read_astropy (file_fits):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits) as hdu_list:
+        # header of primary HDU
+        header = hdu_list[0].header
+        # values of keywords
+        dict_values = {}
+        for key in list_keywords:
+            if (key in header):
+                dict_values[key] = header[key]
+            else:
+                dict_values[key] = None
+    # returning values
+    return (dict_values)
+
+# making a temporary directory
+with tempfile.TemporaryDirectory (dir=dir_test or None) as dir_tmp:
+    # printing status
+    print (f'# generating {nfiles} FITS files of {size} x {size} pixels...')
+
+    # generating FITS files
+    list_files = []
+    data       = numpy.zeros ( (size, size), dtype=numpy.uint16 )
+    for i in range (nfiles):
+        # header
+        header = astropy.io.fits.Header ()
+        header['DATE-OBS'] = f'2023-04-{1 + i % 28:02d}T12:34:56.789'
+        header['IMAGETYP'] = ['BIAS', 'DARK', 'FLAT', 'LIGHT'][i % 4]
+        header['EXPTIME']  = float (i % 7) * 10.0
+        header['FILTER']   = 'rp_Astrodon_2019'
+        for j in range (100):
+            header[f'DUMMY{j:03d}'] = (j, 'a dummy keyword')
+        # writing a FITS file
+        file_fits = f'{dir_tmp}/frame_{i:05d}.fits'
+        astropy.io.fits.writeto (file_fits, data, header=header)
+        list_files.append (file_fits)
+
+    # Astropy
+    t0 = time.perf_counter ()
+    results_astropy = [read_astropy (file_fits) for file_fits in list_files]
+    t1 = time.perf_counter ()
+    time_astropy = t1 - t0
+
+    # header-only scanner
+    t0 = time.perf_counter ()
+    results_scanner = [scan_header (file_fits, list_keywords) \
+                       for file_fits in list_files]
+    t1 = time.perf_counter ()
+    time_scanner = t1 - t0
+
+    # header-only scanner using threads
+    t0 = time.perf_counter ()
+    with concurrent.futures.ThreadPoolExecutor (max_workers=nthreads) \
+         as executor:
+        results_threads = list (executor.map (scan_header, list_files, \
+                                              [list_keywords] * nfiles))
+    t1 = time.perf_counter ()
+    time_threads = t1 - t0
+
+    # checking results
+    agree = (results_astropy == results_scanner == results_threads)
+
+# printing results
+print (f'#')
+print (f'# {"method":32s} {"time [s]":>10s} {"files/s":>10s}')
+for name, elapsed in ( ('astropy.io.fits.open', time_astropy), \
+                       ('header-only scanner', time_scanner), \
+                       (f'header-only scanner ({nthreads} threads)', \
+                        time_threads) ):
+    print (f'  {name:32s} {elapsed:10.3f} {nfiles / elapsed:10.1f}')
+print (f'#')
+print (f'# results agree with each other: {agree}')
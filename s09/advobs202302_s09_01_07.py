@@ -0,0 +1,205 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 17:05:23 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing sqlite3 module
+import sqlite3
+
+# importing concurrent.futures module
+import concurrent.futures
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header
+
+# construction of parser object
+desc   = 'Building and refreshing an index of FITS headers (SQLite database)'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-d', '--database', default='obslog.db', \
+                     help='SQLite database file (default: obslog.db)')
+parser.add_argument ('-j', '--threads', type=int, default=8, \
+                     help='number of threads for reading files (default: 8)')
+parser.add_argument ('-p', '--prune', action='store_true', default=False, \
+                     help='removing entries of files which no longer exist')
+parser.add_argument ('files', nargs='*', \
+                     help='FITS files or directories containing FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+file_db    = args.database
+nthreads   = args.threads
+prune      = args.prune
+list_input = args.files
+
+# checking number of threads
+if (nthreads < 1):
+    # printing message
+    print (f'ERROR: number of threads must be 1 or larger!')
+    # exit
+    sys.exit ()
+
+# checking database file
+if not (file_db[-3:] == '.db'):
+    # printing message
+    print (f'ERROR: database file must be a .db file!')
+    # exit
+    sys.exit ()
+
+# keywords stored in the index and corresponding column names
+dict_columns = {
+    'DATE-OBS': 'date_obs',
+    'TIME-OBS': 'time_obs',
+    'IMAGETYP': 'imagetyp',
+    'EXPTIME':  'exptime',
+    'FILTER':   'filter',
+    'OBJECT':   'object',
+    'NAXIS1':   'naxis1',
+    'NAXIS2':   'naxis2',
+}
+list_keywords = list (dict_columns.keys ())
+
+# SQL statements for the index
+#
+#   A file is identified by its absolute path. Size and modification time
+#   are stored together, so that only new or modified files are read again
+#   when the index is refreshed. "date" is the date part of DATE-OBS.
+#
+sql_create = '''
+CREATE TABLE IF NOT EXISTS frames (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    date     TEXT,
+    date_obs TEXT,
+    time_obs TEXT,
+    imagetyp TEXT,
+    exptime  REAL,
+    filter   TEXT,
+    object   TEXT,
+    naxis1   INTEGER,
+    naxis2   INTEGER
+);
+CREATE INDEX IF NOT EXISTS index_selection
+    ON frames (imagetyp, filter, date, exptime);
+CREATE INDEX IF NOT EXISTS index_date ON frames (date);
+'''
+sql_insert = '''
+INSERT OR REPLACE INTO frames
+    (path, size, mtime_ns, date, date_obs, time_obs, imagetyp, exptime,
+     filter, object, naxis1, naxis2)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+#
+# function to make a row of the index from header values
+#
+def make_row (path, size, mtime_ns, dict_values):
+    # converting values into strings or numbers
+    row = [path, size, mtime_ns]
+    date_obs = dict_values['DATE-OBS']
+    row.append (None if date_obs is None else str (date_obs)[:10])
+    for key in list_keywords:
+        value = dict_values[key]
+        if ( (value is not None) \
+             and (dict_columns[key] in ('exptime', 'naxis1', 'naxis2')) ):
+            # non-numerical value for a numerical column is stored as NULL
+            if ( isinstance (value, bool) \
+                 or not isinstance (value, (int, float)) ):
+                value = None
+        elif (value is not None):
+            value = str (value)
+        row.append (value)
+    # returning row
+    return (tuple (row))
+
+# collecting FITS files
+# (directories are searched recursively)
+list_files = []
+for file_input in list_input:
+    # making a pathlib object
+    path_input = pathlib.Path (file_input)
+    # directory
+    if (path_input.is_dir ()):
+        list_files += sorted (path_input.rglob ('*.fits'))
+    # FITS file
+    elif ( (path_input.suffix == '.fits') and (path_input.exists ()) ):
+        list_files.append (path_input)
+
+# opening database
+conn = sqlite3.connect (file_db)
+conn.executescript (sql_create)
+
+# size and modification time of files in the index
+dict_indexed = {}
+for path, size, mtime_ns in conn.execute ('SELECT path, size, mtime_ns' \
+                                          + ' FROM frames'):
+    dict_indexed[path] = (size, mtime_ns)
+
+# finding new or modified files
+list_update = []
+for path_fits in list_files:
+    # absolute path
+    path = str (path_fits.resolve ())
+    # size and modification time
+    stat = os.stat (path)
+    # if size and modification time are unchanged, then skip
+    if (dict_indexed.get (path) == (stat.st_size, stat.st_mtime_ns)):
+        continue
+    # appending the file to the list
+    list_update.append ( (path, stat.st_size, stat.st_mtime_ns) )
+
+# reading headers of new or modified files concurrently
+with concurrent.futures.ThreadPoolExecutor (max_workers=nthreads) as executor:
+    list_records = list (executor.map (scan_header, \
+                                       [p[0] for p in list_update], \
+                                       [list_keywords] * len (list_update)))
+
+# updating the index
+with conn:
+    conn.executemany (sql_insert, \
+                      [make_row (path, size, mtime_ns, dict_values) \
+                       for (path, size, mtime_ns), dict_values \
+                       in zip (list_update, list_records)])
+
+# removing entries of files which no longer exist
+n_removed = 0
+if (prune):
+    list_removed = [(path,) for path in dict_indexed \
+                    if not os.path.exists (path)]
+    with conn:
+        conn.executemany ('DELETE FROM frames WHERE path = ?', list_removed)
+    n_removed = len (list_removed)
+
+# total number of files in the index
+(n_total,) = conn.execute ('SELECT COUNT(*) FROM frames').fetchone ()
+
+# closing database
+conn.close ()
+
+# printing summary
+print (f'# database "{file_db}":')
+print (f'#   number of files checked    = {len (list_files):8d}')
+print (f'#   number of files (re)read   = {len (list_update):8d}')
+print (f'#   number of entries removed  = {n_removed:8d}')
+print (f'#   number of files in index   = {n_total:8d}')
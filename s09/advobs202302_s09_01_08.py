@@ -0,0 +1,126 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 17:21:47 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing sqlite3 module
+import sqlite3
+
+# construction of parser object
+desc   = 'Searching data using an index of FITS headers (SQLite database)'
+parser = argparse.ArgumentParser (description=desc)
+
+# choices
+choices_datatype = ['LIGHT', 'FLAT', 'DARK', 'BIAS']
+
+# adding arguments
+parser.add_argument ('-i', '--database', default='obslog.db', \
+                     help='SQLite database file (default: obslog.db)')
+parser.add_argument ('-d', '--date', default='', \
+                     help='date in YYYY-MM-DD format (default: any)')
+parser.add_argument ('-t', '--datatype', choices=choices_datatype, \
+                     default=None, help='data type (default: any)')
+parser.add_argument ('-e', '--exptime', type=float, default=-1.0, \
+                     help='exposure time in sec (default: -1, any)')
+parser.add_argument ('-f', '--filtername', default='', \
+                     help='filter name (default: any)')
+parser.add_argument ('-o', '--object', default='', \
+                     help='object name (default: any)')
+parser.add_argument ('-w', '--where', default='', \
+                     help='additional SQL condition (e.g. "naxis1 > 1000")')
+parser.add_argument ('-l', '--list', action='store_true', default=False, \
+                     help='printing only paths of files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+file_db           = args.database
+search_date       = args.date
+search_datatype   = args.datatype
+search_exptime    = args.exptime
+search_filtername = args.filtername
+search_object     = args.object
+search_where      = args.where
+print_list        = args.list
+
+# checking database file
+if not (pathlib.Path (file_db).exists ()):
+    # printing message
+    print (f'ERROR: database file "{file_db}" does not exist!')
+    print (f'ERROR: make the database using advobs202302_s09_01_07.py first!')
+    # exit
+    sys.exit ()
+
+# constructing SQL query
+# (values are given as parameters, and only the optional condition given by
+#  "-w" option is inserted into the statement as it is)
+list_conditions = []
+list_parameters = []
+if (search_date != ''):
+    list_conditions.append ('date = ?')
+    list_parameters.append (search_date)
+if (search_datatype is not None):
+    list_conditions.append ('imagetyp = ?')
+    list_parameters.append (search_datatype)
+if (search_exptime >= 0.0):
+    list_conditions.append ('exptime = ?')
+    list_parameters.append (search_exptime)
+if (search_filtername != ''):
+    list_conditions.append ('filter = ?')
+    list_parameters.append (search_filtername)
+if (search_object != ''):
+    list_conditions.append ('object = ?')
+    list_parameters.append (search_object)
+if (search_where != ''):
+    list_conditions.append (f'({search_where})')
+query = 'SELECT path, date_obs, time_obs, imagetyp, exptime, filter' \
+    + ' FROM frames'
+if (len (list_conditions) > 0):
+    query += ' WHERE ' + ' AND '.join (list_conditions)
+query += ' ORDER BY date_obs, time_obs, path'
+
+# opening database and searching data
+conn = sqlite3.connect (file_db)
+try:
+    list_rows = conn.execute (query, list_parameters).fetchall ()
+except sqlite3.Error as error:
+    # printing message
+    print (f'ERROR: invalid query: {error}')
+    # exit
+    sys.exit ()
+finally:
+    # closing database
+    conn.close ()
+
+# printing only paths of files
+if (print_list):
+    for row in list_rows:
+        print (f'{row[0]}')
+    sys.exit ()
+
+# printing header
+print (f'# FILENAME,DATE-OBS,TIME-OBS,IMAGETYP,EXPTIME,FILTER')
+
+# printing information
+for row in list_rows:
+    # gathering information from the index
+    record = f'{pathlib.Path (row[0]).stem}  '
+    # processing for each keyword
+    for value in row[1:]:
+        if (value is None):
+            value = f'__NONE__'
+        # appending value to the end of "record"
+        record += f' {str (value):>10s}'
+    # printing information
+    print (f'{record}')
@@ -25,10 +25,21 @@ import astropy
 import astropy.io.fits
 import astropy.stats
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
 # construction pf parser object
 desc   = 'combining dark frames'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 choices_datatype  = ['BIAS', 'DARK', 'FLAT', 'LIGHT']
 choices_rejection = ['none', 'sigclip']
@@ -53,22 +64,39 @@ parser.add_argument ('-c', '--cenfunc', choices=choices_cenfunc, \
                      default='median', \
                      help='method to estimate centre value (default: median)')
 parser.add_argument ('-o', '--output', default='', help='output file name')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('files', nargs='+', help='FITS files')
 
 # command-line argument analysis
 args = parser.parse_args ()
 
 # input parameters
-date0       = args.date
-exptime0    = args.exptime
-filtername0 = args.filtername
-datatype0   = args.datatype
-rejection   = args.rejection
-threshold   = args.threshold
-maxiters    = args.maxiters
-cenfunc     = args.cenfunc
-file_output = args.output
-list_files  = args.files
+date0          = args.date
+exptime0       = args.exptime
+filtername0    = args.filtername
+datatype0      = args.datatype
+rejection      = args.rejection
+threshold      = args.threshold
+maxiters       = args.maxiters
+cenfunc        = args.cenfunc
+file_output    = args.output
+list_files     = args.files
+output_format  = args.output_format
+quantize_level = args.quantize_level
+precision      = args.precision
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # examination of output file
 path_output = pathlib.Path (file_output)
@@ -101,8 +129,8 @@ now = datetime.datetime.now ().isoformat ()
 def read_fits_header (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
@@ -110,11 +138,119 @@ def read_fits_header (file_fits):
 def read_fits_data (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
+        # data of HDU of image data
+        data = find_image_hdu (hdu_list).data
     # returning data
     return (data)
 
+#
+# function to calculate weighted average of a masked data cube along the
+# first axis
+#
+#   Frames are added one by one into 64-bit floating point accumulators, so
+#   that no temporary 64-bit copy of the whole data cube is made even for a
+#   32-bit data cube. Pixels rejected in all the frames are masked.
+#
+def average_cube (masked_cube, weights=None):
+    # data and mask of data cube
+    data = numpy.ma.getdata (masked_cube)
+    mask = numpy.ma.getmaskarray (masked_cube)
+    # accumulators of weights and weighted values
+    sum_w  = numpy.zeros (data.shape[1:], dtype=numpy.float64)
+    sum_wx = numpy.zeros (data.shape[1:], dtype=numpy.float64)
+    # adding frames one by one
+    for i in range (data.shape[0]):
+        # weight of the frame
+        if (weights is None):
+            w = 1.0
+        else:
+            w = weights[i]
+        # accepted pixels
+        # (values are converted into 64-bit floating point numbers frame by
+        #  frame before multiplication)
+        accepted = ~mask[i]
+        value    = numpy.where (accepted, data[i], 0.0).astype (numpy.float64)
+        sum_w  += w * accepted
+        sum_wx += w * value
+    # weighted average
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        average = sum_wx / sum_w
+    # returning weighted average as a masked array
+    return (numpy.ma.array (average, mask=(sum_w == 0.0) ) )
+
+#
+# function to carry out sigma clipping
+#
+#   Pixels outside of [centre - sigma * stddev, centre + sigma * stddev]
+#   are rejected iteratively until no more pixels are rejected or the
+#   number of iterations reaches "maxiters". Once rejected, a pixel stays
+#   rejected. Non-finite values are always rejected. The algorithm is the
+#   same as that of astropy.stats.sigma_clip with stdfunc='std'.
+#
+#   Only clipping using all the pixels is carried out here. The same
+#   function with clipping along an axis is in
+#   s06/advobs202302_s06_sigclip.py.
+#
+#   Parameters:
+#     data     : input numpy array
+#     sigma    : rejection threshold in sigma
+#     maxiters : maximum number of iterations
+#     cenfunc  : 'median' or 'mean'
+#     output   : 'mask' or 'stats'
+#
+#   Returned value:
+#     for output='mask', a boolean array of the same shape as "data"
+#       (True for rejected pixels)
+#     for output='stats', (mean, median, stddev) of accepted pixels
+#
+def sigma_clip (data, sigma=3.0, maxiters=5, cenfunc='median', \
+                output='mask'):
+    # pixel values
+    # (integers are converted into 64-bit floating point, while floating
+    #  point data are used as they are to avoid copying)
+    values = numpy.asarray (data)
+    if not (numpy.issubdtype (values.dtype, numpy.floating) ):
+        values = values.astype (numpy.float64)
+
+    # clipping using all the pixels
+    # (a 1-dim. array of accepted pixels is shrunk at each iteration)
+    # accepted pixels (non-finite values are rejected from the beginning)
+    accepted = values[numpy.isfinite (values)]
+    # lower and upper limits of accepted pixel values
+    low_max  = -numpy.inf
+    high_min = +numpy.inf
+    # iterations
+    for i in range (maxiters):
+        # leaving the loop, if no pixel is left
+        if (accepted.size == 0):
+            break
+        # centre value and standard deviation
+        if (cenfunc == 'median'):
+            centre = numpy.median (accepted)
+        elif (cenfunc == 'mean'):
+            centre = numpy.mean (accepted, dtype=numpy.float64)
+        stddev = numpy.std (accepted, dtype=numpy.float64)
+        # lower and upper limits
+        low  = centre - sigma * stddev
+        high = centre + sigma * stddev
+        # pixels within the limits
+        within = (accepted >= low) & (accepted <= high)
+        # leaving the loop, if no pixel is newly rejected
+        if (within.all ()):
+            break
+        # updating accepted pixels and limits
+        accepted = accepted[within]
+        low_max  = max (low_max, low)
+        high_min = min (high_min, high)
+    # returning results
+    if (output == 'mask'):
+        return ( ~(numpy.isfinite (values) & (values >= low_max) \
+                   & (values <= high_min) ) )
+    elif (output == 'stats'):
+        return (numpy.mean (accepted, dtype=numpy.float64), \
+                numpy.median (accepted), \
+                numpy.std (accepted, dtype=numpy.float64))
+
 # printing information
 print (f'# Data search condition:')
 print (f'#   data type = {datatype0}')
@@ -235,45 +371,33 @@ for file_fits in list_target_files:
         header = read_fits_header (file_fits)
     
     # reading data from FITS file
+    # (for float32, data are converted into 32-bit floating point numbers)
     data = read_fits_data (file_fits)
+    if (precision == 'float32'):
+        data = data.astype (numpy.float32)
     
-    # making a mask and masked array
-    mdata = numpy.ma.array (data, mask=False)
-
-    # for sigma clipping algorithm
+    # making a mask (True for rejected pixels)
     if (rejection == 'sigclip'):
-        # iterations
-        for j in range (maxiters):
-            # number of usable pixels of previous iterations
-            npix_prev = mdata.compressed ().size
-            # calculation of median
-            median = numpy.ma.median (mdata)
-            # calculation of standard deviation
-            stddev = numpy.ma.std (mdata)
-            # lower threshold
-            low  = median - threshold * stddev
-            # higher threshold
-            high = median + threshold * stddev
-            # making a mask
-            mask = (mdata < low) | (mdata > high)
-            # masked array
-            mdata = numpy.ma.array (data, mask=mask)
-            # number of rejected pixels
-            npix_now = mdata.compressed ().size
-            # leaving the loop, if number of usable pixels do not change
-            if (npix_now == npix_prev):
-                break
-        
+        # sigma clipping without using masked arrays
+        mask = sigma_clip (data, sigma=threshold, maxiters=maxiters, \
+                           cenfunc='median', output='mask')
+    else:
+        mask = numpy.zeros (data.shape, dtype=bool)
+
     # constructing a data cube and its mask
+    # (a data cube is allocated only once and filled in place)
     if (i == 0):
-        data_tmp = data
-        mask_tmp = mask
-    elif (i == 1):
-        cube      = numpy.concatenate ( ([data_tmp], [data]), axis=0 )
-        cube_mask = numpy.concatenate ( ([mask_tmp], [mask]), axis=0 )
-    else:
-        cube      = numpy.concatenate ( (cube, [data]), axis=0 )
-        cube_mask = numpy.concatenate ( (cube_mask, [mask]), axis=0 )
+        cube      = numpy.empty ( (len (list_target_files),) + data.shape, \
+                                  dtype=data.dtype )
+        cube_mask = numpy.empty ( (len (list_target_files),) + data.shape, \
+                                  dtype=bool )
+    # (if a frame has a wider data type than the cube, the cube is
+    #  converted, as numpy.concatenate would do)
+    elif (numpy.result_type (cube.dtype, data.dtype) \
+          != cube.dtype):
+        cube = cube.astype (numpy.result_type (cube.dtype, data.dtype))
+    cube[i]      = data
+    cube_mask[i] = mask
 
     # incrementing "i" for counting number of files
     i += 1
@@ -297,10 +421,10 @@ if (rejection == 'sigclip'):
                                   maxiters=maxiters, cenfunc=cenfunc, \
                                   axis=0, masked=True)
     # combining using average
-    combined = numpy.ma.average (clipped_masked_cube, axis=0)
+    combined = average_cube (clipped_masked_cube)
 elif (rejection == 'none'):
     # combining using simple average
-    combined = numpy.ma.average (masked_cube, axis=0)
+    combined = average_cube (masked_cube)
 
 # printing status
 print (f'#')
@@ -312,7 +436,7 @@ print (f'# Writing image into a new FITS file...')
 print (f'#   output file = {file_output}')
 
 # mean of combined image
-mean_combined = numpy.ma.mean (combined)
+mean_combined = numpy.ma.mean (combined, dtype=numpy.float64)
     
 # adding comments to the header
 header['history'] = f'FITS file created by the command "{command}"'
@@ -328,9 +452,10 @@ header['comment'] = f'  maxiters  = {maxiters}'
 header['comment'] = f'  cenfunc   = {cenfunc}'
 
 # writing a new FITS file
-astropy.io.fits.writeto (file_output, \
-                         numpy.ma.filled (combined, fill_value=mean_combined), \
-                         header=header)
+write_fits_image (file_output, \
+                  numpy.ma.filled (combined, fill_value=mean_combined) \
+                  .astype (dtype_pixel), header, output_format, \
+                  quantize_level)
 
 # printing status
 print (f'#')
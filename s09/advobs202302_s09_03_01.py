@@ -16,16 +16,37 @@ import sys
 # importing datetime module
 import datetime
 
+# importing time module
+import time
+
+# importing multiprocessing module
+import multiprocessing
+
 # importing numpy module
 import numpy
 
 # importing astropy module
 import astropy.io.fits
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
+# importing advobs202302_calcache module
+from advobs202302_calcache import make_calibration_cache, \
+    read_calibration_frame, model_dark_frame
+
 # construction of parser object
 desc   = 'carrying out dark subtraction for object and flatfield frames'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 default_filter_keyword   = 'FILTER'
 default_datatype_keyword = 'IMAGETYP'
@@ -36,6 +57,27 @@ parser.add_argument ('-d', '--datatype', default=default_datatype_keyword, \
                      help='FITS keyword for data type')
 parser.add_argument ('-e', '--exptime', default=default_exptime_keyword, \
                      help='FITS keyword for exposure time')
+parser.add_argument ('-m', '--max-cache', type=float, default=2048.0, \
+                     help='maximum size of calibration frame cache in MB' \
+                     + ' (default: 2048)')
+parser.add_argument ('-j', '--jobs', type=int, default=1, \
+                     help='number of worker processes (default: 1)')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-a', '--dark-rate', default='', \
+                     help='dark current rate map for dark model' \
+                     + ' (default: none)')
+parser.add_argument ('-b', '--dark-offset', default='', \
+                     help='offset map or master bias for dark model' \
+                     + ' (default: none)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('files', nargs='+', help='FITS files')
 
 # command-line argument analysis
@@ -45,7 +87,21 @@ args = parser.parse_args ()
 keyword_filter   = args.filter
 keyword_datatype = args.datatype
 keyword_exptime  = args.exptime
+cache_size_max   = args.max_cache
+njobs            = args.jobs
 list_files       = args.files
+output_format    = args.output_format
+quantize_level   = args.quantize_level
+precision        = args.precision
+file_dark_rate   = args.dark_rate
+file_dark_offset = args.dark_offset
+
+# dark frames are made from offset and dark current rate maps, if given
+dark_model = (file_dark_rate != '')
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # command name
 command = sys.argv[0]
@@ -53,6 +109,30 @@ command = sys.argv[0]
 # date/time
 now = datetime.datetime.now ().isoformat ()
 
+# checking number of worker processes
+if (njobs < 1):
+    # printing error message
+    print (f'ERROR: number of worker processes must be 1 or larger!')
+    # exit the script
+    sys.exit ()
+
+# checking files of dark model
+# (both dark current rate map and offset map are needed)
+if ( (file_dark_rate == '') != (file_dark_offset == '') ):
+    # printing error message
+    print (f'ERROR: both dark current rate map and offset map are needed!')
+    # exit the script
+    sys.exit ()
+for file_map in (file_dark_rate, file_dark_offset):
+    if ( (file_map != '') and not (pathlib.Path (file_map).exists ()) ):
+        # printing error message
+        print (f'ERROR: file "{file_map}" does not exist!')
+        # exit the script
+        sys.exit ()
+
+# using "fork" to start worker processes
+context = multiprocessing.get_context ('fork')
+
 # declaring an empty dictionary for storing FITS file information
 dict_target = {}
 
@@ -60,8 +140,8 @@ dict_target = {}
 def read_fits_header (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
@@ -69,11 +149,17 @@ def read_fits_header (file_fits):
 def read_fits_data (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
+        # data of HDU of image data
+        data = find_image_hdu (hdu_list).data
     # returning data
     return (data)
 
+# cache of master calibration frames
+# (for float32, frames are converted into 32-bit floating point numbers)
+cache_calibration = make_calibration_cache \
+    (cache_size_max, numpy.float32 if (precision == 'float32') else None)
+stats_cache       = cache_calibration['stats']
+
 # processing FITS files
 for file_fits in list_files:
     # making pathlib object
@@ -117,47 +203,43 @@ for file_fits in list_files:
     dict_target[file_fits]['exptime'] = exptime
 
 #
-# dark subtraction
+# checking master dark frames
+#
+#   All the master dark frames (or model dark frames) are read into the
+#   cache before processing object frames. Worker processes are started by
+#   "fork", so that they share the cached frames with the main process
+#   without pickling.
 #
-
-print (f'#')
-print (f'# {len (dict_target)} files are found for dark subtraction')
-print (f'#')
-print (f'# Processing each FITS file...')
-print (f'#')
 
 # processing each FITS file
 for file_raw in sorted (dict_target.keys () ):
-    # making pathlib object
-    path_raw = pathlib.Path (file_raw)
-    
-    # file name of dark subtracted FITS file
-    file_subtracted = path_raw.stem + '_d.fits'
-    
-    print (f'# subtracting dark from {file_raw}')
-    print (f'#   {file_raw} ==> {file_subtracted}')
-
-    # printing status
-    print (f'#     now, reading raw data from {file_raw}...')
-    
-    # reading FITS header
-    header = read_fits_header (file_raw)
-
-    # reading FITS data
-    data_raw = read_fits_data (file_raw)
+    # exposure time
+    exptime = dict_target[file_raw]['exptime']
 
-    # printing status
-    print (f'#     finished reading raw data from {file_raw}!')
-    
-    # finding EXPTIME keyword
-    if ('EXPTIME' in header):
-        exptime = header[keyword_exptime]
-    else:
+    # checking EXPTIME keyword
+    if (exptime == -999.99):
         # printing status
         print (f'### ERROR: EXPTIME keyword not found in {file_raw}!')
         # exit
         sys.exit ()
 
+    # making a model dark frame for the exposure time, if maps are given
+    if (dark_model):
+        # reading maps and making model dark frame into the cache
+        (header_dark, data_dark) \
+            = model_dark_frame (cache_calibration, exptime, file_dark_rate, \
+                                file_dark_offset)
+        # warning for extrapolation outside exposure times of darks
+        if not (header_dark['EXPMIN'] <= exptime <= header_dark['EXPMAX']):
+            print (f'### WARNING: exposure time {exptime} of {file_raw} is' \
+                   + f' outside the range of darks' \
+                   + f' ({header_dark["EXPMIN"]} - {header_dark["EXPMAX"]})!')
+        # description of model dark frame
+        dict_target[file_raw]['dark'] \
+            = f'({file_dark_offset} + {file_dark_rate} * {exptime})'
+        # skipping checks of master dark frame
+        continue
+
     # dark file name
     file_dark = f'dark_{int (exptime):04d}.fits'
 
@@ -173,11 +255,13 @@ for file_raw in sorted (dict_target.keys () ):
         # exit
         sys.exit ()
 
-    # reading FITS header (dark)
-    header_dark = read_fits_header (file_dark)
+    # reading FITS header and data (dark) from the cache
+    (header_dark, data_dark) \
+        = read_calibration_frame (cache_calibration, 'DARK', exptime, \
+                                  '__NONE__', file_dark)
 
     # checking EXPTIME keyword of dark frame
-    if ('EXPTIME' in header_dark):
+    if (keyword_exptime in header_dark):
         exptime_dark = header_dark [keyword_exptime]
     else:
         # printing message
@@ -193,32 +277,80 @@ for file_raw in sorted (dict_target.keys () ):
         print (f'### ERROR: Check the data!')
         # exit
         sys.exit ()
-        
-    # printing status
-    print (f'#     now, reading dark data from "{file_dark}"...')
 
-    # reading FITS data (dark)
-    data_dark = read_fits_data (file_dark)
+    # dark file name for the object frame
+    dict_target[file_raw]['dark'] = file_dark
+
+#
+# function to carry out dark subtraction for a FITS file
+#
+#   Messages are returned together with elapsed time, instead of being
+#   printed, so that messages from worker processes are not mixed.
+#
+def subtract_dark (file_raw):
+    # time at start
+    t0 = time.perf_counter ()
+
+    # statistics of the cache at start
+    # (a worker process updates its own copy of the statistics, and
+    #  increments are returned to the main process)
+    stats_start = dict (stats_cache)
+
+    # messages
+    list_messages = []
+
+    # making pathlib object
+    path_raw = pathlib.Path (file_raw)
     
-    # printing status
-    print (f'#     finished reading dark data from "{file_dark}"!')
+    # file name of dark subtracted FITS file
+    file_subtracted = path_raw.stem + '_d.fits'
 
-    # printing status
-    print (f'#     now, subtracting dark from "{file_raw}"...')
+    # dark file name and exposure time
+    file_dark = dict_target[file_raw]['dark']
+    exptime   = dict_target[file_raw]['exptime']
+    
+    list_messages.append (f'# subtracting dark from {file_raw}')
+    list_messages.append (f'#   {file_raw} ==> {file_subtracted}')
+
+    # reading FITS header and data
+    header   = read_fits_header (file_raw)
+    data_raw = read_fits_data (file_raw)
+
+    # reading FITS header and data (dark) from the cache
+    # (a model dark frame is made by "offset + rate * exptime", if maps
+    #  are given)
+    if (dark_model):
+        (header_dark, data_dark) \
+            = model_dark_frame (cache_calibration, exptime, file_dark_rate, \
+                                file_dark_offset)
+    else:
+        (header_dark, data_dark) \
+            = read_calibration_frame (cache_calibration, 'DARK', exptime, \
+                                      '__NONE__', file_dark)
 
     # dark subtraction
-    data_subtracted = data_raw - data_dark
+    # (for float32, raw data are converted into 32-bit floating point numbers
+    #  and dark is subtracted in place)
+    if (precision == 'float32'):
+        data_subtracted = data_raw.astype (numpy.float32)
+        numpy.subtract (data_subtracted, data_dark, \
+                        out=data_subtracted, casting='unsafe')
+    else:
+        data_subtracted = data_raw - data_dark
 
-    # printing status
-    print (f'#     finished subtracting dark from "{file_raw}"!')
+    # mean values
+    # (sums are accumulated in 64-bit floating point numbers)
+    mean_raw        = numpy.ma.mean (data_raw, dtype=numpy.float64)
+    mean_dark       = numpy.ma.mean (data_dark, dtype=numpy.float64)
+    mean_subtracted = numpy.ma.mean (data_subtracted, dtype=numpy.float64)
 
     # printing status
-    print (f'#     mean value of raw data             =', \
-           f'{numpy.ma.mean (data_raw):8.1f} ADU')
-    print (f'#     mean value of dark data            =', \
-           f'{numpy.ma.mean (data_dark):8.1f} ADU')
-    print (f'#     mean value of dark subtracted data =', \
-           f'{numpy.ma.mean (data_subtracted):8.1f} ADU')
+    list_messages.append (f'#     mean value of raw data             =' \
+                          + f' {mean_raw:8.1f} ADU')
+    list_messages.append (f'#     mean value of dark data            =' \
+                          + f' {mean_dark:8.1f} ADU')
+    list_messages.append (f'#     mean value of dark subtracted data =' \
+                          + f' {mean_subtracted:8.1f} ADU')
 
     # adding comments to new FITS file
     header['history'] = f'FITS file created by the command "{command}"'
@@ -228,11 +360,70 @@ for file_raw in sorted (dict_target.keys () ):
     header['comment'] = f'dark data: {file_dark}'
     header['comment'] = f'dark subtracted data: {file_subtracted}'
 
-    # printing status
-    print (f'#     now, writing new file "{file_subtracted}"...')
-
     # writing a new FITS file
-    astropy.io.fits.writeto (file_subtracted, data_subtracted, header=header)
+    write_fits_image (file_subtracted, data_subtracted, header, \
+                      output_format, quantize_level)
 
     # printing status
-    print (f'#     finished writing new file "{file_subtracted}" done!')
+    list_messages.append (f'#     finished writing new file "{file_subtracted}"!')
+
+    # time at end
+    t1 = time.perf_counter ()
+
+    # increments of statistics of the cache
+    stats_increment = {key: stats_cache[key] - stats_start[key] \
+                       for key in stats_cache}
+
+    # returning messages, elapsed time, and increments of statistics
+    return (list_messages, t1 - t0, stats_increment)
+
+#
+# dark subtraction
+#
+
+print (f'#')
+print (f'# {len (dict_target)} files are found for dark subtraction')
+print (f'#')
+print (f'# Processing each FITS file using {njobs} process(es)...')
+print (f'#')
+
+# list of FITS files to be processed
+list_raw = sorted (dict_target.keys () )
+
+# time at start
+time_start = time.perf_counter ()
+
+# processing FITS files using a process pool
+if (njobs > 1):
+    with context.Pool (njobs) as pool:
+        for list_messages, elapsed, stats_increment \
+                in pool.imap (subtract_dark, list_raw):
+            # adding statistics of the cache of worker process
+            for key in stats_increment:
+                stats_cache[key] += stats_increment[key]
+            # printing messages
+            for message in list_messages:
+                print (message)
+            print (f'#     elapsed time = {elapsed:8.3f} sec')
+# processing FITS files one by one
+else:
+    for file_raw in list_raw:
+        list_messages, elapsed, stats_increment = subtract_dark (file_raw)
+        # printing messages
+        for message in list_messages:
+            print (message)
+        print (f'#     elapsed time = {elapsed:8.3f} sec')
+
+# time at end
+time_end = time.perf_counter ()
+
+# printing total elapsed time
+print (f'#')
+print (f'# {len (list_raw)} files processed in', \
+       f'{time_end - time_start:8.3f} sec')
+
+# printing statistics of the cache
+print (f'#')
+print (f'# calibration frame cache: {stats_cache["read"]} frames read,', \
+       f'{stats_cache["model"]} model darks made,', \
+       f'{stats_cache["hit"]} times reused')
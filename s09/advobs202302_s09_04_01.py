@@ -24,10 +24,21 @@ import numpy.ma
 import astropy.io.fits
 import astropy.stats
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
 # construction of parser object
 desc   = 'combining flatfield frames'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 choices_datatype  = ['BIAS', 'DARK', 'FLAT', 'LIGHT']
 choices_rejection = ['none', 'sigclip']
@@ -52,22 +63,39 @@ parser.add_argument ('-c', '--cenfunc', choices=choices_cenfunc, \
                      default='median', \
                      help='method to estimate centre value (default: median)')
 parser.add_argument ('-o', '--output', default='', help='output file name')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('files', nargs='+', help='FITS files')
 
 # command-line argument analysis
 args = parser.parse_args ()
 
 # input parameters
-date0       = args.date
-exptime0    = args.exptime
-filtername0 = args.filtername
-datatype0   = args.datatype
-rejection   = args.rejection
-threshold   = args.threshold
-maxiters    = args.maxiters
-cenfunc     = args.cenfunc
-file_output = args.output
-list_files  = args.files
+date0          = args.date
+exptime0       = args.exptime
+filtername0    = args.filtername
+datatype0      = args.datatype
+rejection      = args.rejection
+threshold      = args.threshold
+maxiters       = args.maxiters
+cenfunc        = args.cenfunc
+file_output    = args.output
+list_files     = args.files
+output_format  = args.output_format
+quantize_level = args.quantize_level
+precision      = args.precision
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # making pathlib object
 path_output = pathlib.Path (file_output)
@@ -102,8 +130,8 @@ dict_target = {}
 def read_fits_header (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
@@ -111,11 +139,46 @@ def read_fits_header (file_fits):
 def read_fits_data (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
+        # data of HDU of image data
+        data = find_image_hdu (hdu_list).data
     # returning data
     return (data)
 
+#
+# function to calculate weighted average of a masked data cube along the
+# first axis
+#
+#   Frames are added one by one into 64-bit floating point accumulators, so
+#   that no temporary 64-bit copy of the whole data cube is made even for a
+#   32-bit data cube. Pixels rejected in all the frames are masked.
+#
+def average_cube (masked_cube, weights=None):
+    # data and mask of data cube
+    data = numpy.ma.getdata (masked_cube)
+    mask = numpy.ma.getmaskarray (masked_cube)
+    # accumulators of weights and weighted values
+    sum_w  = numpy.zeros (data.shape[1:], dtype=numpy.float64)
+    sum_wx = numpy.zeros (data.shape[1:], dtype=numpy.float64)
+    # adding frames one by one
+    for i in range (data.shape[0]):
+        # weight of the frame
+        if (weights is None):
+            w = 1.0
+        else:
+            w = weights[i]
+        # accepted pixels
+        # (values are converted into 64-bit floating point numbers frame by
+        #  frame before multiplication)
+        accepted = ~mask[i]
+        value    = numpy.where (accepted, data[i], 0.0).astype (numpy.float64)
+        sum_w  += w * accepted
+        sum_wx += w * value
+    # weighted average
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        average = sum_wx / sum_w
+    # returning weighted average as a masked array
+    return (numpy.ma.array (average, mask=(sum_w == 0.0) ) )
+
 # printing information
 print (f'# Data search condition:')
 print (f'#   data type = {datatype0}')
@@ -191,10 +254,11 @@ for file_fits in list_files:
 # printing status
 print (f'#')
 print (f'# Finished scanning files')
-print (f'#   {len (dict_target[filtername0])} files are found for combining')
+print (f'#   {len (dict_target.get (filtername0, {}))} files are found' \
+       + f' for combining')
 
 # checking number of target files
-if ( len (dict_target) < 2 ):
+if ( len (dict_target.get (filtername0, {})) < 2 ):
     # printing message
     print (f'number of target files must be greater than 1.')
     # exit
@@ -222,7 +286,10 @@ for file_fits in dict_target[filtername0]:
         header = read_fits_header (file_fits)
 
     # reading FITS data
+    # (for float32, data are converted into 32-bit floating point numbers)
     data = read_fits_data (file_fits)
+    if (precision == 'float32'):
+        data = data.astype (numpy.float32)
     
     # median pixel value of first image
     if (i == 0):
@@ -236,12 +303,16 @@ for file_fits in dict_target[filtername0]:
     data_scaled = data / median * median_ref
     
     # constructing a data cube
+    # (a data cube is allocated only once and filled in place)
     if (i == 0):
-        data_tmp = data_scaled
-    elif (i == 1):
-        cube = numpy.concatenate ( ([data_tmp], [data_scaled]), axis=0 )
-    else:
-        cube = numpy.concatenate ( (cube, [data_scaled]), axis=0 )
+        cube = numpy.empty ( (len (dict_target[filtername0]),) \
+                             + data_scaled.shape, dtype=data_scaled.dtype )
+    # (if a frame has a wider data type than the cube, the cube is
+    #  converted, as numpy.concatenate would do)
+    elif (numpy.result_type (cube.dtype, data_scaled.dtype) \
+          != cube.dtype):
+        cube = cube.astype (numpy.result_type (cube.dtype, data_scaled.dtype))
+    cube[i] = data_scaled
 
     # printing status
     print (f'#   {i+1:04d} : "{file_fits}" (median: {median:8.2f})')
@@ -265,10 +336,10 @@ if (rejection == 'sigclip'):
                                   maxiters=maxiters, cenfunc=cenfunc, \
                                   axis=0, masked=True)
     # combining using average
-    combined = numpy.ma.average (clipped_cube, weights=list_median, axis=0)
+    combined = average_cube (clipped_cube, weights=list_median)
 elif (rejection == 'NONE'):
     # combining using average
-    combined = numpy.ma.average (cube, weights=list_median, axis=0)
+    combined = average_cube (cube, weights=list_median)
 
 # printing status
 print (f'#')
@@ -280,7 +351,7 @@ print (f'# Writing image into a new FITS file...')
 print (f'#   output file = {file_output}')
 
 # mean of combined image
-mean_combined = numpy.ma.mean (combined)
+mean_combined = numpy.ma.mean (combined, dtype=numpy.float64)
     
 # adding comments to the header
 header['history'] = f'FITS file created by the command "{command}"'
@@ -296,9 +367,10 @@ header['comment'] = f'  maxiters  = {maxiters}'
 header['comment'] = f'  cenfunc   = {cenfunc}'
 
 # writing a new FITS file
-astropy.io.fits.writeto (file_output, \
-                         numpy.ma.filled (combined, fill_value=mean_combined), \
-                         header=header)
+write_fits_image (file_output, \
+                  numpy.ma.filled (combined, fill_value=mean_combined) \
+                  .astype (dtype_pixel), header, output_format, \
+                  quantize_level)
 
 # printing status
 print (f'#')
@@ -22,20 +22,48 @@ import numpy
 # importing astropy module
 import astropy.io.fits
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
 # construction of parser object
 desc   = 'normalising FITS file'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 parser.add_argument ('-o', '--output', default='', help='output file name')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('file_input', help='input FITS file')
 
 # command-line argument analysis
 args = parser.parse_args ()
 
 # input parameters
-file_output = args.output
-file_input  = args.file_input
+file_output    = args.output
+file_input     = args.file_input
+output_format  = args.output_format
+quantize_level = args.quantize_level
+precision      = args.precision
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # making pathlib objects
 path_input  = pathlib.Path (file_input)
@@ -80,8 +108,8 @@ now = datetime.datetime.now ().isoformat ()
 def read_fits_header (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
@@ -89,8 +117,8 @@ def read_fits_header (file_fits):
 def read_fits_data (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
+        # data of HDU of image data
+        data = find_image_hdu (hdu_list).data
     # returning data
     return (data)
 
@@ -109,7 +137,10 @@ print (f'# now, reading FITS file "{file_input}"...')
 header = read_fits_header (file_input)
 
 # reading FITS data
+# (for float32, data are converted into 32-bit floating point numbers)
 data = read_fits_data (file_input)
+if (precision == 'float32'):
+    data = data.astype (numpy.float32)
 
 # printing status
 print (f'# finished reading FITS file "{file_input}"!')
@@ -118,13 +149,14 @@ print (f'# finished reading FITS file "{file_input}"!')
 print (f'# now, normalising FITS file "{file_input}"...')
 
 # mean of pixel values
-mean = numpy.mean (data)
+# (sum is accumulated in 64-bit floating point numbers)
+mean = numpy.mean (data, dtype=numpy.float64)
 
 # printing status
 print (f'#   mean value of input file = {mean} ADU')
 
 # normalisation
-data_normalised = data / mean
+data_normalised = (data / mean).astype (dtype_pixel, copy=False)
 
 # printing status
 print (f'# finished normalising FITS file "{file_input}"!')
@@ -140,7 +172,8 @@ header['comment'] = f'Input file: {file_input}'
 header['comment'] = f'Mean of pixel values of input file = {mean}'
 
 # writing a new FITS file
-astropy.io.fits.writeto (file_output, data_normalised, header=header)
+write_fits_image (file_output, data_normalised, header, output_format, \
+                  quantize_level)
 
 # printing status
 print (f'# finished writing a new FITS file "{file_output}"!')
@@ -16,16 +16,37 @@ import sys
 # importing datetime module
 import datetime
 
+# importing time module
+import time
+
+# importing multiprocessing module
+import multiprocessing
+
 # importing numpy module
 import numpy
 
 # importing astropy module
 import astropy.io.fits
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
+# importing advobs202302_calcache module
+from advobs202302_calcache import make_calibration_cache, \
+    read_calibration_frame
+
 # construction of parser object
 desc   = 'carrying out flatfielding'
 parser = argparse.ArgumentParser (description=desc)
 
+# choices of precision
+choices_precision = ['float64', 'float32']
+
 # adding arguments
 default_filter_keyword   = 'FILTER'
 default_datatype_keyword = 'IMAGETYP'
@@ -42,6 +63,21 @@ parser.add_argument ('-t', '--timeobs', default=default_timeobs_keyword, \
                      help='FITS keyword for time-obs')
 parser.add_argument ('-y', '--dateobs', default=default_dateobs_keyword, \
                      help='FITS keyword for date-obs')
+parser.add_argument ('-m', '--max-cache', type=float, default=2048.0, \
+                     help='maximum size of calibration frame cache in MB' \
+                     + ' (default: 2048)')
+parser.add_argument ('-j', '--jobs', type=int, default=1, \
+                     help='number of worker processes (default: 1)')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
 parser.add_argument ('files', nargs='+', help='FITS files')
 
 # command-line argument analysis
@@ -53,7 +89,16 @@ keyword_datatype = args.datatype
 keyword_exptime  = args.exptime
 keyword_timeobs  = args.timeobs
 keyword_dateobs  = args.dateobs
+cache_size_max   = args.max_cache
+njobs            = args.jobs
 list_files       = args.files
+output_format    = args.output_format
+quantize_level   = args.quantize_level
+precision        = args.precision
+
+# data type of pixel data in memory
+# (precision policy: see s09/advobs202302_s09_05_04.py)
+dtype_pixel = numpy.dtype (precision)
 
 # command name
 command = sys.argv[0]
@@ -61,6 +106,16 @@ command = sys.argv[0]
 # date/time
 now = datetime.datetime.now ().isoformat ()
 
+# checking number of worker processes
+if (njobs < 1):
+    # printing error message
+    print (f'ERROR: number of worker processes must be 1 or larger!')
+    # exit the script
+    sys.exit ()
+
+# using "fork" to start worker processes
+context = multiprocessing.get_context ('fork')
+
 # declaring an empty dictionary for storing FITS file information
 dict_target = {}
 
@@ -68,8 +123,8 @@ dict_target = {}
 def read_fits_header (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
@@ -77,11 +132,17 @@ def read_fits_header (file_fits):
 def read_fits_data (file_fits):
     # opening FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
+        # data of HDU of image data
+        data = find_image_hdu (hdu_list).data
     # returning data
     return (data)
 
+# cache of master calibration frames
+# (for float32, frames are converted into 32-bit floating point numbers)
+cache_calibration = make_calibration_cache \
+    (cache_size_max, numpy.float32 if (precision == 'float32') else None)
+stats_cache       = cache_calibration['stats']
+
 # processing FITS files
 for file_darksub in list_files:
     # making pathlib object
@@ -136,20 +197,19 @@ for file_darksub in list_files:
     dict_target[file_darksub]['filter']  = filter_name
     dict_target[file_darksub]['exptime'] = exptime
 
-# dark subtraction
-
-print (f'#')
-print (f'# Processing each FITS file...')
-print (f'#')
+#
+# checking normalised flatfield frames
+#
+#   All the normalised flatfield frames are read into the cache before
+#   processing object frames. Worker processes are started by "fork", so
+#   that they share the cached frames with the main process without
+#   pickling.
+#
 
 # processing each FITS file
 for file_darksub in sorted (dict_target.keys () ):
-    # making pathlib object
-    path_darksub = pathlib.Path (file_darksub)
-    
-    # file names
-    file_flatfielded = path_darksub.stem + 'f.fits'
-    file_nflat       = 'nflat_' + dict_target[file_darksub]['filter'] + '.fits'
+    # file name of normalised flatfield
+    file_nflat = 'nflat_' + dict_target[file_darksub]['filter'] + '.fits'
 
     # if normalised flatfield does not exist, then stop the script
     path_nflat = pathlib.Path (file_nflat)
@@ -158,59 +218,148 @@ for file_darksub in sorted (dict_target.keys () ):
         print (f'Check the data!')
         sys.exit ()
 
-    # printing status
-    print (f'# dividing {file_darksub} by {file_nflat}...')
-    print (f'#   {file_darksub} ==> {file_flatfielded}')
+    # reading FITS data into the cache
+    read_calibration_frame (cache_calibration, 'FLAT', None, \
+                            dict_target[file_darksub]['filter'], file_nflat)
 
-    # printing status
-    print (f'#   now, reading data from "{file_darksub}"...')
-    
-    # reading FITS header and data
-    header_darksub = read_fits_header (file_darksub)
-    data_darksub   = read_fits_data (file_darksub)
+    # normalised flatfield file name for the object frame
+    dict_target[file_darksub]['nflat'] = file_nflat
 
-    # printing status
-    print (f'#   finished reading data from "{file_darksub}"!')
+#
+# function to carry out flatfielding for a FITS file
+#
+#   Messages are returned together with elapsed time, instead of being
+#   printed, so that messages from worker processes are not mixed.
+#
+def divide_flat (file_darksub):
+    # time at start
+    t0 = time.perf_counter ()
 
-    # printing status
-    print (f'#   now, reading data from "{file_nflat}"...')
+    # statistics of the cache at start
+    # (a worker process updates its own copy of the statistics, and
+    #  increments are returned to the main process)
+    stats_start = dict (stats_cache)
+
+    # messages
+    list_messages = []
+
+    # making pathlib object
+    path_darksub = pathlib.Path (file_darksub)
     
-    # reading FITS header and data
-    data_nflat = read_fits_data (file_nflat)
+    # file names
+    file_flatfielded = path_darksub.stem + 'f.fits'
+    file_nflat       = dict_target[file_darksub]['nflat']
 
     # printing status
-    print (f'#   finished reading data from "{file_nflat}"!')
+    list_messages.append (f'# dividing {file_darksub} by {file_nflat}...')
+    list_messages.append (f'#   {file_darksub} ==> {file_flatfielded}')
 
-    # printing status
-    print (f'#   now, dividing {file_darksub} by {file_nflat}...')
+    # reading FITS header and data
+    header_darksub = read_fits_header (file_darksub)
+    data_darksub   = read_fits_data (file_darksub)
+
+    # reading FITS data from the cache
+    (header_nflat, data_nflat) \
+        = read_calibration_frame (cache_calibration, 'FLAT', None, \
+                                  dict_target[file_darksub]['filter'], \
+                                  file_nflat)
 
     # flatfielding
-    data_flatfielded = data_darksub / data_nflat
+    # (for float32, dark-subtracted data are converted into 32-bit floating
+    #  point numbers and divided by flatfield in place)
+    if (precision == 'float32'):
+        data_flatfielded = data_darksub.astype (numpy.float32)
+        numpy.divide (data_flatfielded, data_nflat, \
+                      out=data_flatfielded, casting='unsafe')
+    else:
+        data_flatfielded = data_darksub / data_nflat
+
+    # mean values
+    # (sums are accumulated in 64-bit floating point numbers)
+    mean_nflat       = numpy.mean (data_nflat, dtype=numpy.float64)
+    mean_darksub     = numpy.mean (data_darksub, dtype=numpy.float64)
+    mean_flatfielded = numpy.mean (data_flatfielded, dtype=numpy.float64)
 
-    # printing status
-    print (f'#   finished dividing {file_darksub} by {file_nflat}!')
-    
     # printing information
-    print (f'#     {file_nflat:28s} :', \
-           f'mean value = {numpy.mean (data_nflat):8.2f} ADU')
-    print (f'#     {file_darksub:28s} :', \
-           f'mean value = {numpy.mean (data_darksub):8.2f} ADU')
-    print (f'#     {file_flatfielded:28s} :', \
-           f'mean value = {numpy.mean (data_flatfielded):8.2f} ADU')
+    list_messages.append (f'#     {file_nflat:28s} :' \
+                          + f' mean value = {mean_nflat:8.2f} ADU')
+    list_messages.append (f'#     {file_darksub:28s} :' \
+                          + f' mean value = {mean_darksub:8.2f}' \
+                          + f' ADU')
+    list_messages.append (f'#     {file_flatfielded:28s} :' \
+                          + f' mean value =' \
+                          + f' {mean_flatfielded:8.2f} ADU')
 
     # adding comments to new FITS file
-    header['history'] = f'FITS file created by the command "{command}"'
-    header['history'] = f'Updated on {now}'
-    header['comment'] = f'flatfielding was carried out'
-    header['comment'] = f'dark-subtracted data: {file_darksub}'
-    header['comment'] = f'normalised flatfield data: {file_nflat}'
-    header['comment'] = f'flatfielded data: {file_flatfielded}'
-
-    # printing status
-    print (f'#   now, writing new file "{file_flatfielded}"...')
+    header_darksub['history'] \
+        = f'FITS file created by the command "{command}"'
+    header_darksub['history'] = f'Updated on {now}'
+    header_darksub['comment'] = f'flatfielding was carried out'
+    header_darksub['comment'] = f'dark-subtracted data: {file_darksub}'
+    header_darksub['comment'] = f'normalised flatfield data: {file_nflat}'
+    header_darksub['comment'] = f'flatfielded data: {file_flatfielded}'
 
     # writing a new FITS file
-    astropy.io.fits.writeto (file_flatfielded, data_flatfielded, header=header)
+    write_fits_image (file_flatfielded, data_flatfielded, header_darksub, \
+                      output_format, quantize_level)
 
     # printing status
-    print (f'#   finished writing new file "{file_flatfielded}"!')
+    list_messages.append (f'#   finished writing new file "{file_flatfielded}"!')
+
+    # time at end
+    t1 = time.perf_counter ()
+
+    # increments of statistics of the cache
+    stats_increment = {key: stats_cache[key] - stats_start[key] \
+                       for key in stats_cache}
+
+    # returning messages, elapsed time, and increments of statistics
+    return (list_messages, t1 - t0, stats_increment)
+
+#
+# flatfielding
+#
+
+print (f'#')
+print (f'# Processing each FITS file using {njobs} process(es)...')
+print (f'#')
+
+# list of FITS files to be processed
+list_darksub = sorted (dict_target.keys () )
+
+# time at start
+time_start = time.perf_counter ()
+
+# processing FITS files using a process pool
+if (njobs > 1):
+    with context.Pool (njobs) as pool:
+        for list_messages, elapsed, stats_increment \
+                in pool.imap (divide_flat, list_darksub):
+            # adding statistics of the cache of worker process
+            for key in stats_increment:
+                stats_cache[key] += stats_increment[key]
+            # printing messages
+            for message in list_messages:
+                print (message)
+            print (f'#     elapsed time = {elapsed:8.3f} sec')
+# processing FITS files one by one
+else:
+    for file_darksub in list_darksub:
+        list_messages, elapsed, stats_increment = divide_flat (file_darksub)
+        # printing messages
+        for message in list_messages:
+            print (message)
+        print (f'#     elapsed time = {elapsed:8.3f} sec')
+
+# time at end
+time_end = time.perf_counter ()
+
+# printing total elapsed time
+print (f'#')
+print (f'# {len (list_darksub)} files processed in', \
+       f'{time_end - time_start:8.3f} sec')
+
+# printing statistics of the cache
+print (f'#')
+print (f'# calibration frame cache: {stats_cache["read"]} frames read,', \
+       f'{stats_cache["hit"]} times reused')
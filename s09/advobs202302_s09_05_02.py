@@ -0,0 +1,394 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 18:02:36 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing pathlib module
+import pathlib
+
+# importing sys module
+import sys
+
+# importing datetime module
+import datetime
+
+# importing time module
+import time
+
+# importing multiprocessing module
+import multiprocessing
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
+# importing advobs202302_calcache module
+from advobs202302_calcache import make_calibration_cache, \
+    read_calibration_frame
+
+# construction of parser object
+desc   = 'carrying out dark subtraction and flatfielding in a single pass'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+default_filter_keyword   = 'FILTER'
+default_datatype_keyword = 'IMAGETYP'
+default_exptime_keyword  = 'EXPTIME'
+parser.add_argument ('-f', '--filter', default=default_filter_keyword, \
+                     help='FITS keyword for filter name')
+parser.add_argument ('-d', '--datatype', default=default_datatype_keyword, \
+                     help='FITS keyword for data type')
+parser.add_argument ('-e', '--exptime', default=default_exptime_keyword, \
+                     help='FITS keyword for exposure time')
+parser.add_argument ('-m', '--max-cache', type=float, default=2048.0, \
+                     help='maximum size of calibration frame cache in MB' \
+                     + ' (default: 2048)')
+parser.add_argument ('-j', '--jobs', type=int, default=1, \
+                     help='number of worker processes (default: 1)')
+parser.add_argument ('-k', '--keep', action='store_true', default=False, \
+                     help='writing intermediate dark subtracted frames' \
+                     + ' (*_d.fits) as well')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
+parser.add_argument ('files', nargs='+', help='raw FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+keyword_filter   = args.filter
+keyword_datatype = args.datatype
+keyword_exptime  = args.exptime
+cache_size_max   = args.max_cache
+njobs            = args.jobs
+keep             = args.keep
+list_files       = args.files
+output_format    = args.output_format
+quantize_level   = args.quantize_level
+
+# command name
+command = sys.argv[0]
+
+# date/time
+now = datetime.datetime.now ().isoformat ()
+
+# checking number of worker processes
+if (njobs < 1):
+    # printing error message
+    print (f'ERROR: number of worker processes must be 1 or larger!')
+    # exit the script
+    sys.exit ()
+
+# using "fork" to start worker processes
+context = multiprocessing.get_context ('fork')
+
+# declaring an empty dictionary for storing FITS file information
+dict_target = {}
+
+# function to read FITS header
+def read_fits_header (file_fits):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits) as hdu_list:
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
+    # returning header
+    return (header)
+
+# cache of master calibration frames
+cache_calibration = make_calibration_cache (cache_size_max)
+stats_cache       = cache_calibration['stats']
+
+# processing FITS files
+for file_fits in list_files:
+    # making pathlib object
+    path_fits = pathlib.Path (file_fits)
+
+    # if the extension of the file is not '.fits', the we skip
+    if not (path_fits.suffix == '.fits'):
+        # printing message
+        print (f'### file "{file_fits}" is not a FITS file! skipping...')
+        # skipping
+        continue
+
+    # reading FITS header
+    header = read_fits_header (file_fits)
+
+    # data type
+    if (keyword_datatype in header):
+        datatype = header[keyword_datatype]
+    else:
+        datatype = "__NONE__"
+
+    # exposure time
+    if (keyword_exptime in header):
+        exptime = header[keyword_exptime]
+    else:
+        exptime = -999.99
+
+    # filter name
+    if (keyword_filter in header):
+        filter_name = header[keyword_filter]
+    else:
+        filter_name = "__NONE__"
+
+    # if the data type is not "LIGHT", the we skip the file
+    if not (datatype == 'LIGHT'):
+        continue
+
+    # appending file name to the dictionary
+    dict_target[file_fits] = {}
+    dict_target[file_fits]['filter']  = filter_name
+    dict_target[file_fits]['exptime'] = exptime
+
+#
+# checking master dark and normalised flatfield frames
+#
+#   All the master frames are read into the cache before processing object
+#   frames. Worker processes are started by "fork", so that they share the
+#   cached frames with the main process without pickling.
+#
+
+# processing each FITS file
+for file_raw in sorted (dict_target.keys () ):
+    # exposure time and filter name
+    exptime     = dict_target[file_raw]['exptime']
+    filter_name = dict_target[file_raw]['filter']
+
+    # checking EXPTIME keyword
+    if (exptime == -999.99):
+        # printing status
+        print (f'### ERROR: EXPTIME keyword not found in {file_raw}!')
+        # exit
+        sys.exit ()
+
+    # dark and normalised flatfield file names
+    file_dark  = f'dark_{int (exptime):04d}.fits'
+    file_nflat = f'nflat_{filter_name}.fits'
+
+    # checking whether dark file exists
+    # if dark file does not exist, then stop the script
+    if not (pathlib.Path (file_dark).exists () ):
+        # printing message
+        print (f'### ERROR: The dark file "{file_dark}" is NOT found.')
+        print (f'### ERROR: Check the data!')
+        # exit
+        sys.exit ()
+
+    # if normalised flatfield does not exist, then stop the script
+    if not (pathlib.Path (file_nflat).exists () ):
+        # printing message
+        print (f'### ERROR: The flatfield file "{file_nflat}" is NOT found.')
+        print (f'### ERROR: Check the data!')
+        # exit
+        sys.exit ()
+
+    # reading FITS header and data (dark) from the cache
+    (header_dark, data_dark) \
+        = read_calibration_frame (cache_calibration, 'DARK', exptime, \
+                                  '__NONE__', file_dark)
+
+    # checking EXPTIME keyword of dark frame
+    if (keyword_exptime in header_dark):
+        exptime_dark = header_dark [keyword_exptime]
+    else:
+        # printing message
+        print (f'### ERROR: EXPTIME keyword not found in "{file_dark}"!')
+        print (f'### ERROR: Check the data!')
+        # exit
+        sys.exit ()
+
+    # if exptime_dark is not the same as exptime, then stop the script
+    if not (exptime == exptime_dark):
+        # printing message
+        print (f'### ERROR: Exposure times of raw and dark frames are NOT same.')
+        print (f'### ERROR: Check the data!')
+        # exit
+        sys.exit ()
+
+    # reading FITS data (normalised flatfield) into the cache
+    read_calibration_frame (cache_calibration, 'FLAT', None, filter_name, \
+                            file_nflat)
+
+    # master frames for the object frame
+    dict_target[file_raw]['dark']  = file_dark
+    dict_target[file_raw]['nflat'] = file_nflat
+
+#
+# function to carry out dark subtraction and flatfielding for a FITS file
+#
+#   Raw data are converted into 32-bit floating point numbers once, and
+#   dark subtraction and flatfielding are carried out in-place on the same
+#   array. Only the final product is written, unless intermediate files
+#   are requested. Mean value of the final product is accumulated in
+#   64-bit floating point numbers.
+#
+#   Messages are returned together with elapsed time, instead of being
+#   printed, so that messages from worker processes are not mixed.
+#
+def reduce_frame (file_raw):
+    # time at start
+    t0 = time.perf_counter ()
+
+    # statistics of the cache at start
+    # (a worker process updates its own copy of the statistics, and
+    #  increments are returned to the main process)
+    stats_start = dict (stats_cache)
+
+    # messages
+    list_messages = []
+
+    # making pathlib object
+    path_raw = pathlib.Path (file_raw)
+
+    # file names
+    file_subtracted  = path_raw.stem + '_d.fits'
+    file_flatfielded = path_raw.stem + '_df.fits'
+    file_dark        = dict_target[file_raw]['dark']
+    file_nflat       = dict_target[file_raw]['nflat']
+
+    list_messages.append (f'# reducing {file_raw}')
+    list_messages.append (f'#   ({file_raw} - {file_dark}) / {file_nflat}')
+    list_messages.append (f'#     ==> {file_flatfielded}')
+
+    # reading FITS header and data
+    with astropy.io.fits.open (file_raw) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # header of HDU of image data
+        header = hdu.header
+        # data of HDU of image data converted into 32-bit floating point
+        data = hdu.data.astype (numpy.float32)
+
+    # reading master frames from the cache
+    (header_dark, data_dark) \
+        = read_calibration_frame (cache_calibration, 'DARK', \
+                                  dict_target[file_raw]['exptime'], \
+                                  '__NONE__', file_dark)
+    (header_nflat, data_nflat) \
+        = read_calibration_frame (cache_calibration, 'FLAT', None, \
+                                  dict_target[file_raw]['filter'], file_nflat)
+
+    # dark subtraction (in-place)
+    numpy.subtract (data, data_dark, out=data, casting='unsafe')
+
+    # writing intermediate dark subtracted file
+    if (keep):
+        # header of dark subtracted file
+        header_subtracted = header.copy ()
+        header_subtracted['history'] \
+            = f'FITS file created by the command "{command}"'
+        header_subtracted['history'] = f'Updated on {now}'
+        header_subtracted['comment'] = f'dark subtraction was carried out'
+        header_subtracted['comment'] = f'raw data: {file_raw}'
+        header_subtracted['comment'] = f'dark data: {file_dark}'
+        header_subtracted['comment'] \
+            = f'dark subtracted data: {file_subtracted}'
+        # writing a new FITS file
+        write_fits_image (file_subtracted, data, header_subtracted, \
+                          output_format, quantize_level)
+        # printing status
+        list_messages.append (f'#     finished writing intermediate file' \
+                              + f' "{file_subtracted}"!')
+
+    # flatfielding (in-place)
+    numpy.divide (data, data_nflat, out=data, casting='unsafe')
+
+    # printing information
+    list_messages.append (f'#     mean value of reduced data =' \
+                          + f' {numpy.mean (data, dtype=numpy.float64):8.2f}' \
+                          + f' ADU')
+
+    # adding comments to new FITS file
+    header['history'] = f'FITS file created by the command "{command}"'
+    header['history'] = f'Updated on {now}'
+    header['comment'] = f'dark subtraction and flatfielding were carried out'
+    header['comment'] = f'raw data: {file_raw}'
+    header['comment'] = f'dark data: {file_dark}'
+    header['comment'] = f'normalised flatfield data: {file_nflat}'
+    header['comment'] = f'flatfielded data: {file_flatfielded}'
+
+    # writing a new FITS file
+    write_fits_image (file_flatfielded, data, header, output_format, \
+                      quantize_level)
+
+    # printing status
+    list_messages.append (f'#     finished writing new file' \
+                          + f' "{file_flatfielded}"!')
+
+    # time at end
+    t1 = time.perf_counter ()
+
+    # increments of statistics of the cache
+    stats_increment = {key: stats_cache[key] - stats_start[key] \
+                       for key in stats_cache}
+
+    # returning messages, elapsed time, and increments of statistics
+    return (list_messages, t1 - t0, stats_increment)
+
+#
+# dark subtraction and flatfielding
+#
+
+print (f'#')
+print (f'# {len (dict_target)} files are found for reduction')
+print (f'#')
+print (f'# Processing each FITS file using {njobs} process(es)...')
+print (f'#')
+
+# list of FITS files to be processed
+list_raw = sorted (dict_target.keys () )
+
+# time at start
+time_start = time.perf_counter ()
+
+# processing FITS files using a process pool
+if (njobs > 1):
+    with context.Pool (njobs) as pool:
+        for list_messages, elapsed, stats_increment \
+                in pool.imap (reduce_frame, list_raw):
+            # adding statistics of the cache of worker process
+            for key in stats_increment:
+                stats_cache[key] += stats_increment[key]
+            # printing messages
+            for message in list_messages:
+                print (message)
+            print (f'#     elapsed time = {elapsed:8.3f} sec')
+# processing FITS files one by one
+else:
+    for file_raw in list_raw:
+        list_messages, elapsed, stats_increment = reduce_frame (file_raw)
+        # printing messages
+        for message in list_messages:
+            print (message)
+        print (f'#     elapsed time = {elapsed:8.3f} sec')
+
+# time at end
+time_end = time.perf_counter ()
+
+# printing total elapsed time
+print (f'#')
+print (f'# {len (list_raw)} files processed in', \
+       f'{time_end - time_start:8.3f} sec')
+
+# printing statistics of the cache
+print (f'#')
+print (f'# calibration frame cache: {stats_cache["read"]} frames read,', \
+       f'{stats_cache["hit"]} times reused')
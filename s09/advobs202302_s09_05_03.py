@@ -0,0 +1,154 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 21:52:06 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing tempfile module
+import tempfile
+
+# importing time module
+import time
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
+# construction of parser object
+desc   = 'Benchmark of output formats of FITS files for reduction products'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-s', '--size', type=int, default=4096, \
+                     help='image size in pixel (default: 4096)')
+parser.add_argument ('-n', '--nstars', type=int, default=2000, \
+                     help='number of stars on the image (default: 2000)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
+parser.add_argument ('-r', '--repeat', type=int, default=3, \
+                     help='number of repetitions, best is taken (default: 3)')
+parser.add_argument ('-d', '--directory', default='', \
+                     help='directory for test files (default: temporary)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+image_size     = args.size
+nstars         = args.nstars
+quantize_level = args.quantize_level
+nrepeat        = args.repeat
+dir_work       = args.directory
+
+#
+# function to read whole image of a FITS file
+#
+def read_fits_image (file_fits):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits) as hdu_list:
+        # reading data of HDU of image data
+        data = numpy.array (find_image_hdu (hdu_list).data)
+    # returning data
+    return (data)
+
+# random number generator
+rng = numpy.random.default_rng (0)
+
+# synthetic reduced frame
+# (sky background of 1000 ADU with Poisson-like noise and Gaussian stars)
+sky   = 1000.0
+noise = numpy.sqrt (sky)
+data  = rng.normal (sky, noise, (image_size, image_size) )
+for i in range (nstars):
+    x0   = rng.uniform (10.0, image_size - 10.0)
+    y0   = rng.uniform (10.0, image_size - 10.0)
+    peak = 10.0**rng.uniform (1.5, 4.5)
+    ix   = int (x0)
+    iy   = int (y0)
+    (y, x) = numpy.mgrid[iy - 8:iy + 9, ix - 8:ix + 9]
+    data[iy - 8:iy + 9, ix - 8:ix + 9] \
+        += peak * numpy.exp (-( (x - x0)**2 + (y - y0)**2) / (2.0 * 1.5**2) )
+
+# header
+header = astropy.io.fits.PrimaryHDU (data=data).header
+header['IMAGETYP'] = 'LIGHT'
+header['EXPTIME']  = 30.0
+
+# size of image in MB as 64-bit floating point numbers
+size_mb = data.size * 8 / 1024**2
+
+# directory for test files
+if (dir_work == ''):
+    tmpdir   = tempfile.TemporaryDirectory ()
+    dir_work = tmpdir.name
+
+# printing header
+print (f'#')
+print (f'# image size = {image_size} x {image_size} pixels', \
+       f'({size_mb:.1f} MB as float64), sky noise = {noise:.1f} ADU')
+print (f'# quantize level for rice and hcompress = {quantize_level}')
+print (f'# throughput is relative to the size as float64 (best of', \
+       f'{nrepeat} runs)')
+print (f'#')
+print (f'# {"format":>10s} {"disk [MB]":>10s} {"ratio":>6s}', \
+       f'{"write [MB/s]":>13s} {"read [MB/s]":>12s}', \
+       f'{"max|err|":>9s} {"rms err/noise":>14s}')
+
+# measurements
+for output_format in choices_format:
+    # file name
+    path_fits = pathlib.Path (dir_work) / f'benchmark_{output_format}.fits'
+
+    # writing FITS file
+    list_time = []
+    for i in range (nrepeat):
+        path_fits.unlink (missing_ok=True)
+        t0 = time.perf_counter ()
+        write_fits_image (path_fits, data, header, output_format, \
+                          quantize_level)
+        t1 = time.perf_counter ()
+        list_time.append (t1 - t0)
+    time_write = min (list_time)
+
+    # reading FITS file
+    list_time = []
+    for i in range (nrepeat):
+        t0 = time.perf_counter ()
+        data_read = read_fits_image (path_fits)
+        t1 = time.perf_counter ()
+        list_time.append (t1 - t0)
+    time_read = min (list_time)
+
+    # disk footprint and errors
+    disk_mb  = path_fits.stat ().st_size / 1024**2
+    diff     = data_read - data
+    err_max  = numpy.max (numpy.abs (diff) )
+    err_rms  = numpy.sqrt (numpy.mean (diff**2) )
+
+    # printing results
+    print (f'  {output_format:>10s} {disk_mb:10.2f} {size_mb / disk_mb:6.2f}', \
+           f'{size_mb / time_write:13.1f} {size_mb / time_read:12.1f}', \
+           f'{err_max:9.3f} {err_rms / noise:14.5f}')
+
+    # removing file
+    path_fits.unlink ()
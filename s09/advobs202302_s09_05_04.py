@@ -0,0 +1,242 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 16:10:37 (CST) daisuke>
+#
+
+#
+# precision policy of data reduction scripts
+#
+#   Scripts having the option "-p" (float64 or float32) keep pixel data
+#   in memory in the given data type. For float32, frames and data cubes
+#   are kept in 32-bit floating point numbers, which represent 16-bit
+#   integers exactly, and sums for mean and variance are accumulated in
+#   64-bit floating point numbers. Results agree with those of float64
+#   within a relative error of 1e-6, which is checked by this script.
+#
+
+# importing argparse module
+import argparse
+
+# importing time module
+import time
+
+# importing tracemalloc module
+import tracemalloc
+
+# importing numpy module
+import numpy
+import numpy.ma
+
+# importing astropy module
+import astropy.stats
+
+# construction of parser object
+desc   = 'Benchmark of float64 and float32 precision for data reduction'
+parser = argparse.ArgumentParser (description=desc)
+
+# choices of precision
+choices_precision = ['float64', 'float32']
+
+# adding arguments
+parser.add_argument ('-s', '--size', type=int, default=2048, \
+                     help='image size in pixel (default: 2048)')
+parser.add_argument ('-n', '--nframes', type=int, default=10, \
+                     help='number of frames to be combined (default: 10)')
+parser.add_argument ('-t', '--threshold', type=float, default=4.0, \
+                     help='threshold of sigma-clipping (default: 4.0)')
+parser.add_argument ('-r', '--repeat', type=int, default=3, \
+                     help='number of repetitions, best is taken (default: 3)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+image_size = args.size
+nframes    = args.nframes
+threshold  = args.threshold
+nrepeat    = args.repeat
+
+# documented tolerance of per-pixel relative error of float32 results
+# to float64 results (see the definition printed in the header)
+tolerance = 1.0e-6
+
+#
+# function to calculate weighted average of a masked data cube along the
+# first axis
+#
+#   This is the same as the function in advobs202302_s09_02_01.py.
+#
+def average_cube (masked_cube, weights=None):
+    # data and mask of data cube
+    data = numpy.ma.getdata (masked_cube)
+    mask = numpy.ma.getmaskarray (masked_cube)
+    # accumulators of weights and weighted values
+    sum_w  = numpy.zeros (data.shape[1:], dtype=numpy.float64)
+    sum_wx = numpy.zeros (data.shape[1:], dtype=numpy.float64)
+    # adding frames one by one
+    for i in range (data.shape[0]):
+        # weight of the frame
+        if (weights is None):
+            w = 1.0
+        else:
+            w = weights[i]
+        # accepted pixels
+        accepted = ~mask[i]
+        value    = numpy.where (accepted, data[i], 0.0).astype (numpy.float64)
+        sum_w  += w * accepted
+        sum_wx += w * value
+    # weighted average
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        average = sum_wx / sum_w
+    # returning weighted average as a masked array
+    return (numpy.ma.array (average, mask=(sum_w == 0.0) ) )
+
+#
+# function to combine raw frames
+#
+#   Frames are stacked into a data cube, sigma-clipped along the first axis,
+#   and averaged.
+#
+def combine (list_raw, dtype_pixel):
+    # constructing a data cube
+    cube = numpy.empty ( (len (list_raw),) + list_raw[0].shape, \
+                         dtype=dtype_pixel )
+    for i in range (len (list_raw)):
+        cube[i] = list_raw[i]
+    # sigma clipping
+    clipped_cube = astropy.stats.sigma_clip (cube, sigma=threshold, \
+                                             maxiters=5, cenfunc='median', \
+                                             axis=0, masked=True)
+    # combining using average
+    combined = average_cube (clipped_cube)
+    # returning combined image
+    return (numpy.ma.filled (combined, fill_value=0.0).astype (dtype_pixel))
+
+#
+# function to carry out dark subtraction
+#
+def subtract_dark (raw, dark, dtype_pixel):
+    if (dtype_pixel == numpy.float32):
+        subtracted = raw.astype (numpy.float32)
+        numpy.subtract (subtracted, dark, out=subtracted, casting='unsafe')
+    else:
+        subtracted = raw - dark
+    # returning dark subtracted image
+    return (subtracted)
+
+#
+# function to carry out flatfielding
+#
+def divide_flat (darksub, nflat, dtype_pixel):
+    if (dtype_pixel == numpy.float32):
+        flatfielded = darksub.astype (numpy.float32)
+        numpy.divide (flatfielded, nflat, out=flatfielded, casting='unsafe')
+    else:
+        flatfielded = darksub / nflat
+    # returning flatfielded image
+    return (flatfielded)
+
+#
+# function to calculate sigma-clipped statistics
+#
+def calc_stats (data, dtype_pixel):
+    # sigma clipping
+    clipped = astropy.stats.sigma_clip (data.astype (dtype_pixel), \
+                                        sigma=threshold, maxiters=5, \
+                                        masked=False)
+    # mean and standard deviation
+    # (sums are accumulated in 64-bit floating point numbers)
+    mean   = numpy.mean (clipped, dtype=numpy.float64)
+    stddev = numpy.std (clipped, dtype=numpy.float64)
+    # returning results
+    return (numpy.array ([mean, stddev]))
+
+#
+# function to measure best time and peak memory of a function
+#
+def measure (func, *args):
+    # time
+    list_time = []
+    for i in range (nrepeat):
+        t0 = time.perf_counter ()
+        result = func (*args)
+        t1 = time.perf_counter ()
+        list_time.append (t1 - t0)
+    # peak memory allocated during the function call
+    tracemalloc.start ()
+    result = func (*args)
+    (current, peak) = tracemalloc.get_traced_memory ()
+    tracemalloc.stop ()
+    # returning best time, peak memory and result
+    return (min (list_time), peak, result)
+
+# random number generator
+rng = numpy.random.default_rng (0)
+
+# synthetic raw frames
+# (flatfield pattern, dark current and Poisson-like noise, stored as uint16)
+(y, x) = numpy.mgrid[0:image_size, 0:image_size] / image_size
+pattern = 1.0 - 0.2 * ( (x - 0.5)**2 + (y - 0.5)**2)
+dark    = 1000.0 + rng.normal (0.0, 5.0, (image_size, image_size) )
+list_raw = []
+for i in range (nframes):
+    signal = 20000.0 * pattern
+    frame  = dark + rng.normal (signal, numpy.sqrt (signal) )
+    # a few cosmic rays
+    ix = rng.integers (0, image_size, 100)
+    iy = rng.integers (0, image_size, 100)
+    frame[iy, ix] = 60000.0
+    list_raw.append (numpy.clip (frame, 0, 65535).astype (numpy.uint16) )
+nflat = pattern / numpy.mean (pattern)
+
+# size of a frame in MB as 64-bit floating point numbers
+size_mb = image_size**2 * 8 / 1024**2
+
+# printing header
+print (f'#')
+print (f'# image size = {image_size} x {image_size} pixels', \
+       f'({size_mb:.1f} MB as float64), number of frames = {nframes}')
+print (f'# best of {nrepeat} runs, peak memory is measured by tracemalloc')
+print (f'# relative error of float32 = max (|x32 - x64| / max (|x64|, 1))' \
+       f' over pixels, tolerance = {tolerance:g}')
+print (f'#')
+print (f'# {"step":>10s} {"precision":>9s} {"time [s]":>9s}', \
+       f'{"speed-up":>8s} {"peak [MB]":>10s} {"saving":>7s}', \
+       f'{"rel. err":>9s} {"ok":>5s}')
+
+# steps of data reduction
+list_steps = [
+    ('combine',  combine,       lambda p: (list_raw, p) ),
+    ('darksub',  subtract_dark, lambda p: (list_raw[0], \
+                                           dark.astype (p), p) ),
+    ('flatfield', divide_flat,  lambda p: ( (list_raw[0] - dark).astype (p), \
+                                            nflat.astype (p), p) ),
+    ('stats',    calc_stats,    lambda p: (list_raw[0], p) ),
+]
+
+# measurements
+for (step, func, make_args) in list_steps:
+    dict_results = {}
+    for precision in choices_precision:
+        dtype_pixel = numpy.dtype (precision)
+        dict_results[precision] \
+            = measure (func, *make_args (dtype_pixel.type) )
+
+    # reference results of float64
+    (time64, peak64, result64) = dict_results['float64']
+
+    for precision in choices_precision:
+        (time_best, peak, result) = dict_results[precision]
+        # relative error to float64
+        # (relative error of each pixel is calculated, so that large errors
+        #  of faint pixels are not hidden by bright pixels. Values smaller
+        #  than 1 ADU are compared with 1 ADU to avoid division by zero.)
+        diff    = numpy.asarray (result, dtype=numpy.float64) - result64
+        rel_err = numpy.max (numpy.abs (diff) \
+                             / numpy.maximum (numpy.abs (result64), 1.0) )
+        ok      = rel_err <= tolerance
+        # printing results
+        print (f'  {step:>10s} {precision:>9s} {time_best:9.4f}', \
+               f'{time64 / time_best:8.2f} {peak / 1024**2:10.1f}', \
+               f'{peak64 / peak:7.2f} {rel_err:9.2e} {str (ok):>5s}')
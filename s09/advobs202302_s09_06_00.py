@@ -0,0 +1,467 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 10:12:37 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing datetime module
+import datetime
+
+# importing multiprocessing module
+import multiprocessing
+import multiprocessing.shared_memory
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.stats
+
+# construction of parser object
+desc   = 'Combining images using a preallocated data cube'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+choices_rejection = ['none', 'sigclip']
+choices_cenfunc   = ['mean', 'median']
+choices_combine   = ['mean', 'median']
+parser.add_argument ('-r', '--rejection', choices=choices_rejection, \
+                     default='none', \
+                     help='outlier rejection algorithm (default: none)')
+parser.add_argument ('-t', '--threshold', type=float, default=4.0, \
+                     help='rejection threshold in sigma (default: 4.0)')
+parser.add_argument ('-n', '--maxiters', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-c', '--cenfunc', choices=choices_cenfunc, \
+                     default='median', \
+                     help='method to estimate centre value (default: median)')
+parser.add_argument ('-m', '--combine', choices=choices_combine, \
+                     default='mean', \
+                     help='method to combine images (default: mean)')
+parser.add_argument ('-k', '--chunk', type=int, default=256, \
+                     help='number of rows combined at once (default: 256)')
+parser.add_argument ('-M', '--max-memory', type=float, default=0.0, \
+                     help='memory budget in MB for strip-by-strip combining' \
+                     + ' of memory-mapped files (default: 0 = not used)')
+parser.add_argument ('-j', '--jobs', type=int, default=1, \
+                     help='number of worker processes (default: 1)')
+parser.add_argument ('-o', '--output', default='combined.fits', \
+                     help='output FITS file')
+parser.add_argument ('files', nargs='+', help='input FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters given by command-line arguments
+list_input  = args.files
+file_output = args.output
+rejection   = args.rejection
+threshold   = args.threshold
+maxiters    = args.maxiters
+cenfunc     = args.cenfunc
+combine     = args.combine
+nrows_chunk = args.chunk
+max_memory  = args.max_memory
+njobs       = args.jobs
+
+# command name
+command = sys.argv[0]
+
+# checking number of input FITS files
+if ( len (list_input) < 2 ):
+    # if the number of input files is less than 2, then stop the script
+    print (f'ERROR: Number of input files must be 2 or more!')
+    # exit the script
+    sys.exit ()
+
+# checking input files
+for file_fits in list_input:
+    # making pathlib object
+    path_fits = pathlib.Path (file_fits)
+    # if the file is not a FITS file, then stop the script
+    if not (path_fits.suffix == '.fits'):
+        # printing error message
+        print (f'ERROR: Input files must be FITS files!')
+        print (f'ERROR: The file "{file_fits}" is not a FITS file!')
+        # exit the script
+        sys.exit ()
+    # existence check
+    if not (path_fits.exists ()):
+        print (f'ERROR: file "{file_fits}" does not exist!')
+        # exit the script
+        sys.exit ()
+
+# checking number of rows combined at once
+if (nrows_chunk < 1):
+    # printing error message
+    print (f'ERROR: number of rows combined at once must be 1 or larger!')
+    # exit the script
+    sys.exit ()
+
+# checking number of worker processes
+if (njobs < 1):
+    # printing error message
+    print (f'ERROR: number of worker processes must be 1 or larger!')
+    # exit the script
+    sys.exit ()
+
+# making pathlib object
+path_output = pathlib.Path (file_output)
+
+# checking output file
+# if the file is not a FITS file, then stop the script
+if not (path_output.suffix == '.fits'):
+    # printing error message
+    print (f'ERROR: Output file must be FITS files!')
+    # exit the script
+    sys.exit ()
+# existence check of output file
+if (path_output.exists ()):
+    # printing error message
+    print (f'ERROR: output file "{file_output}" exists!')
+    # exit the script
+    sys.exit ()
+
+# date/time
+now = datetime.datetime.now ().isoformat ()
+
+# using "fork" to start worker processes
+# (worker processes inherit parameters and functions of this script)
+context = multiprocessing.get_context ('fork')
+
+#
+# function to read header of primary HDU
+#
+def read_fits_header (file_fits):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits) as hdu_list:
+        # header of primary HDU
+        header = hdu_list[0].header
+    # returning header
+    return (header)
+
+#
+# function to determine data type of image from FITS header
+#
+#   The data type is the one astropy.io.fits uses when it returns "data"
+#   of a HDU. This allows us to allocate a data cube before reading data.
+#
+def find_dtype (header):
+    # data type for each BITPIX
+    dict_bitpix = {
+        8:   numpy.uint8,
+        16:  numpy.int16,
+        32:  numpy.int32,
+        64:  numpy.int64,
+        -32: numpy.float32,
+        -64: numpy.float64,
+    }
+    # BITPIX, BSCALE, and BZERO
+    bitpix = header['BITPIX']
+    bscale = header.get ('BSCALE', 1.0)
+    bzero  = header.get ('BZERO', 0.0)
+    # no scaling
+    if ( (bscale == 1.0) and (bzero == 0.0) ):
+        dtype = dict_bitpix[bitpix]
+    # signed byte
+    elif ( (bitpix == 8) and (bscale == 1.0) and (bzero == -128) ):
+        dtype = numpy.int8
+    # unsigned integer
+    elif ( (bitpix > 8) and (bscale == 1.0) and (bzero == 2**(bitpix - 1)) ):
+        dtype = numpy.dtype (f'uint{bitpix}')
+    # scaled integer
+    elif (bitpix in (8, 16) ):
+        dtype = numpy.float32
+    else:
+        dtype = numpy.float64
+    # returning data type
+    return (numpy.dtype (dtype))
+
+#
+# function to combine a part of data cube
+#
+def combine_cube (cube):
+    # rejection of outliers
+    if (rejection == 'sigclip'):
+        # sigma clipping using Astropy (rejected pixels are set to NaN)
+        data = astropy.stats.sigma_clip (cube, sigma=threshold, \
+                                         maxiters=maxiters, \
+                                         cenfunc=cenfunc, stdfunc='std', \
+                                         axis=0, masked=False)
+    elif (rejection == 'none'):
+        data = cube
+    # combining
+    if (combine == 'mean'):
+        combined = numpy.nanmean (data, axis=0)
+    elif (combine == 'median'):
+        combined = numpy.nanmedian (data, axis=0)
+    # returning combined image
+    return (combined)
+
+#
+# function to open all the input files
+#
+#   Files are memory-mapped by default, and "section" reads only required
+#   rows. memmap=True is not given explicitly, because recent Astropy
+#   refuses to scale memory-mapped data with BZERO/BSCALE.
+#
+def open_input_files ():
+    # list of HDU lists
+    global list_hdu_list
+    list_hdu_list = []
+    # opening FITS files
+    for file_fits in list_input:
+        list_hdu_list.append (astropy.io.fits.open (file_fits))
+
+#
+# function to attach the data cube in a shared memory block
+#
+def attach_shared_cube (name_shm, shape_cube, dtype_cube):
+    # data cube
+    global shm, cube
+    # attaching shared memory block
+    shm  = multiprocessing.shared_memory.SharedMemory (name=name_shm)
+    # data cube using shared memory block as its buffer
+    cube = numpy.ndarray (shape_cube, dtype=dtype_cube, buffer=shm.buf)
+
+#
+# function to combine a strip starting at row y0
+#
+def combine_strip (y0):
+    # last row of the strip
+    y1 = min (y0 + nrows_strip, ny)
+    # reading rows from y0 to y1 of all the input files
+    if (max_memory > 0.0):
+        strip = numpy.empty ( (len (list_hdu_list), y1 - y0, nx), \
+                              dtype=dtype_cube )
+        for i in range (len (list_hdu_list)):
+            strip[i] = list_hdu_list[i][0].section[y0:y1, :]
+    # using rows from y0 to y1 of the data cube
+    else:
+        strip = cube[:, y0:y1]
+    # combining the strip
+    return (combine_cube (strip))
+
+# printing input parameters
+print (f'#')
+print (f'# Input parameters:')
+print (f'#   input FITS files:')
+for file_fits in list_input:
+    print (f'#     {file_fits}')
+print (f'#   output FITS file = {file_output}')
+print (f'#   rejection method = {rejection}')
+print (f'#   threshold        = {threshold} sigma')
+print (f'#   cenfunc          = {cenfunc}')
+print (f'#   maxiters         = {maxiters}')
+print (f'#   combine          = {combine}')
+print (f'#   rows per chunk   = {nrows_chunk}')
+print (f'#   memory budget    = {max_memory} MB')
+print (f'#   worker processes = {njobs}')
+print (f'#')
+
+#
+# reading headers first to find size and data type of the data cube
+#
+
+# printing status
+print (f'# now, reading FITS headers...')
+
+# list of data types
+list_dtype = []
+
+# reading headers
+for i in range (len (list_input)):
+    # file name
+    file_fits = list_input[i]
+
+    # reading header
+    header = read_fits_header (file_fits)
+
+    # keeping header of the first FITS file
+    if (i == 0):
+        header0 = header
+        nx      = header['NAXIS1']
+        ny      = header['NAXIS2']
+
+    # checking dimension of the image
+    if not ( (header['NAXIS'] == 2) and (header['NAXIS1'] == nx) \
+             and (header['NAXIS2'] == ny) ):
+        # printing error message
+        print (f'ERROR: size of image "{file_fits}" is not {nx} x {ny}!')
+        # exit the script
+        sys.exit ()
+
+    # data type of the image
+    list_dtype.append (find_dtype (header))
+
+# data type of the data cube
+dtype_cube = numpy.result_type (*list_dtype)
+
+# printing status
+print (f'# finished reading FITS headers!')
+print (f'#   size of data cube      = {len (list_input)} x {ny} x {nx}')
+print (f'#   data type of data cube = {dtype_cube}')
+
+# adding comments to the header
+header0['history'] = f'FITS file created by the command "{command}"'
+header0['history'] = f'Updated on {now}'
+header0['comment'] = f'List of combined files:'
+for file_fits in list_input:
+    header0['comment'] = f'  {file_fits}'
+header0['comment'] = f'Options given:'
+header0['comment'] = f'  rejection = {rejection}'
+header0['comment'] = f'  threshold = {threshold} sigma'
+header0['comment'] = f'  maxiters  = {maxiters}'
+header0['comment'] = f'  cenfunc   = {cenfunc}'
+header0['comment'] = f'  combine   = {combine}'
+
+# removing scaling keywords of input data
+for key in ('BSCALE', 'BZERO'):
+    if (key in header0):
+        del header0[key]
+
+#
+# combining images
+#
+
+# number of rows processed at once
+if (max_memory > 0.0):
+    # rough estimate of memory needed for a pixel of the data cube
+    # (data cube itself plus temporary arrays made by sigma clipping)
+    if (rejection == 'sigclip'):
+        nbytes_pixel = dtype_cube.itemsize + 40
+    else:
+        nbytes_pixel = dtype_cube.itemsize + 8
+    # number of rows of a strip fitting in given memory budget
+    # (memory budget is shared by all the worker processes)
+    nrows_strip = int (max_memory * 1024**2 / njobs \
+                       / (len (list_input) * nx * nbytes_pixel) )
+    nrows_strip = max (1, min (nrows_strip, ny))
+else:
+    nrows_strip = nrows_chunk
+
+# list of first rows of strips
+list_y0 = list (range (0, ny, nrows_strip))
+
+# printing status
+print (f'# now, combining FITS files...')
+print (f'#   rows per strip = {nrows_strip}')
+print (f'#   strips         = {len (list_y0)}')
+print (f'#   processes      = {njobs}')
+
+# combining images strip by strip without reading all the data into memory
+if (max_memory > 0.0):
+    # making a header of output FITS file
+    hdu_output = astropy.io.fits.PrimaryHDU (data=numpy.zeros ( (1, 1) ), \
+                                             header=header0)
+    header_output = hdu_output.header
+    header_output['NAXIS1'] = nx
+    header_output['NAXIS2'] = ny
+
+    # writing header and allocating space for data on disk
+    # (size of data part must be a multiple of 2880 bytes)
+    header_output.tofile (file_output)
+    nbytes_data = ( (nx * ny * 8 + 2879) // 2880) * 2880
+    with open (file_output, 'rb+') as fh:
+        fh.seek (len (header_output.tostring ()) + nbytes_data - 1)
+        fh.write (b'\0')
+
+    # opening output FITS file in update mode
+    with astropy.io.fits.open (file_output, mode='update', \
+                               memmap=True) as hdu_list_output:
+        # data of output FITS file
+        combined = hdu_list_output[0].data
+
+        # combining strips using a process pool
+        if (njobs > 1):
+            # each worker process opens all the input files by itself
+            with context.Pool (njobs, initializer=open_input_files) as pool:
+                for y0, data in zip (list_y0, \
+                                     pool.imap (combine_strip, list_y0)):
+                    combined[y0:y0+data.shape[0]] = data
+        # combining strips one by one
+        else:
+            # opening all the input files
+            open_input_files ()
+            # processing strip by strip
+            for y0 in list_y0:
+                data = combine_strip (y0)
+                combined[y0:y0+data.shape[0]] = data
+            # closing input files
+            for hdu_list in list_hdu_list:
+                hdu_list.close ()
+
+    # printing status
+    print (f'# finished writing FITS file "{file_output}"!')
+
+# combining images after reading all the data into a data cube
+else:
+    # allocating a data cube
+    # (for parallel processing, the data cube is placed in a shared memory
+    #  block, so that worker processes access it without copying)
+    shape_cube = (len (list_input), ny, nx)
+    if (njobs > 1):
+        shm  = multiprocessing.shared_memory.SharedMemory (create=True, \
+                   size=int (numpy.prod (shape_cube)) * dtype_cube.itemsize)
+        cube = numpy.ndarray (shape_cube, dtype=dtype_cube, buffer=shm.buf)
+    else:
+        cube = numpy.empty (shape_cube, dtype=dtype_cube)
+
+    # reading FITS files
+    for i in range (len (list_input)):
+        # file name
+        file_fits = list_input[i]
+
+        # printing status
+        print (f'# now, reading FITS file "{file_fits}"...')
+
+        # opening FITS file and copying data into the data cube
+        with astropy.io.fits.open (file_fits) as hdu_list:
+            cube[i] = hdu_list[0].data
+
+        # printing status
+        print (f'# finished reading FITS file "{file_fits}"!')
+
+    # allocating an array for combined image
+    combined = numpy.empty ( (ny, nx), dtype=numpy.float64 )
+
+    # combining strips using a process pool
+    # (only the name of shared memory block is passed to worker processes,
+    #  and only combined strips are sent back)
+    if (njobs > 1):
+        with context.Pool (njobs, initializer=attach_shared_cube, \
+                           initargs=(shm.name, shape_cube, dtype_cube)) \
+                           as pool:
+            for y0, data in zip (list_y0, pool.imap (combine_strip, list_y0)):
+                combined[y0:y0+data.shape[0]] = data
+        # releasing shared memory block
+        del cube
+        shm.close ()
+        shm.unlink ()
+    # combining images chunk by chunk to limit the size of temporary arrays
+    else:
+        for y0 in list_y0:
+            data = combine_strip (y0)
+            combined[y0:y0+data.shape[0]] = data
+
+    # printing status
+    print (f'# finished combining FITS files!')
+
+    # printing status
+    print (f'# now, writing FITS file "{file_output}"...')
+
+    # writing a new FITS file
+    astropy.io.fits.writeto (file_output, combined, header=header0)
+
+    # printing status
+    print (f'# finished writing FITS file "{file_output}"!')
@@ -0,0 +1,167 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 10:48:05 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing tempfile module
+import tempfile
+
+# importing time module
+import time
+
+# importing resource module
+import resource
+
+# importing multiprocessing module
+import multiprocessing
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# construction of parser object
+desc   = 'Benchmark of constructing a data cube: concatenation vs preallocation'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-x', '--nx', type=int, default=1024, \
+                     help='image size in X-axis (default: 1024)')
+parser.add_argument ('-y', '--ny', type=int, default=1024, \
+                     help='image size in Y-axis (default: 1024)')
+parser.add_argument ('-n', '--nframes', default='4,8,16,32,64', \
+                     help='list of number of frames (default: 4,8,16,32,64)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters given by command-line arguments
+nx           = args.nx
+ny           = args.ny
+list_nframes = [int (n) for n in args.nframes.split (',')]
+
+# checking image size
+if ( (nx < 1) or (ny < 1) ):
+    # printing error message
+    print (f'ERROR: image size must be positive!')
+    # exit the script
+    sys.exit ()
+
+#
+# function to construct a data cube by repeated concatenation
+#
+def stack_concatenate (list_files):
+    # reading FITS files
+    for i in range (len (list_files)):
+        # reading data
+        with astropy.io.fits.open (list_files[i]) as hdu_list:
+            data0 = hdu_list[0].data
+        # constructing a data cube
+        if (i == 0):
+            tmp0 = data0
+        elif (i == 1):
+            cube = numpy.concatenate ( ([tmp0], [data0]), axis=0 )
+        else:
+            cube = numpy.concatenate ( (cube, [data0]), axis=0 )
+    # returning data cube
+    return (cube)
+
+#
+# function to construct a data cube by filling a preallocated array
+#
+def stack_preallocate (list_files):
+    # reading header of the first file
+    header = astropy.io.fits.getheader (list_files[0])
+    # allocating a data cube
+    cube = numpy.empty ( (len (list_files), header['NAXIS2'], \
+                          header['NAXIS1']), dtype=numpy.float32 )
+    # reading FITS files
+    for i in range (len (list_files)):
+        with astropy.io.fits.open (list_files[i]) as hdu_list:
+            cube[i] = hdu_list[0].data
+    # returning data cube
+    return (cube)
+
+#
+# function executed in a child process
+#
+#   Running each measurement in a fresh process makes peak RSS of each
+#   measurement independent of the others.
+#
+def measure (func, list_files, conn):
+    # peak RSS before the measurement
+    rss0 = resource.getrusage (resource.RUSAGE_SELF).ru_maxrss
+    # time at start
+    t0 = time.perf_counter ()
+    # constructing a data cube and combining
+    cube     = func (list_files)
+    combined = numpy.mean (cube, axis=0)
+    # time at end
+    t1 = time.perf_counter ()
+    # peak RSS after the measurement
+    rss1 = resource.getrusage (resource.RUSAGE_SELF).ru_maxrss
+    # sending results to parent process
+    conn.send ( (t1 - t0, rss0, rss1) )
+    conn.close ()
+
+# printing information
+print (f'#')
+print (f'# image size = {nx} x {ny} (float32)')
+print (f'# peak RSS is given in MB')
+print (f'#')
+print (f'# {"N":>4s} {"concat [s]":>11s} {"prealloc [s]":>12s}', \
+       f'{"concat RSS":>11s} {"prealloc RSS":>12s} {"cube size":>10s}')
+
+# random number generator
+rng = numpy.random.default_rng ()
+
+# using "fork" to start child processes
+context = multiprocessing.get_context ('fork')
+
+# making a temporary directory
+with tempfile.TemporaryDirectory () as dir_tmp:
+    # list of FITS files
+    list_files = []
+
+    # measurements
+    for nframes in list_nframes:
+        # generating synthetic FITS files
+        for i in range (len (list_files), nframes):
+            file_fits = f'{dir_tmp}/frame_{i:04d}.fits'
+            data = rng.normal (1000.0, 10.0, size=(ny, nx)).astype (numpy.float32)
+            astropy.io.fits.writeto (file_fits, data)
+            list_files.append (file_fits)
+
+        # results
+        results = {}
+
+        # carrying out measurements in child processes
+        for name, func in (('concat', stack_concatenate), \
+                           ('prealloc', stack_preallocate)):
+            conn_parent, conn_child = context.Pipe ()
+            proc = context.Process (target=measure, \
+                                    args=(func, list_files[:nframes], \
+                                          conn_child))
+            proc.start ()
+            results[name] = conn_parent.recv ()
+            proc.join ()
+
+        # size of data cube in MB
+        size_cube = nframes * nx * ny * 4 / 1024**2
+
+        # peak RSS in MB (ru_maxrss is in kB on Linux and BSD)
+        rss_concat   = results['concat'][2] / 1024
+        rss_prealloc = results['prealloc'][2] / 1024
+
+        # printing results
+        print (f'  {nframes:4d} {results["concat"][0]:11.3f}', \
+               f'{results["prealloc"][0]:12.3f}', \
+               f'{rss_concat:11.1f} {rss_prealloc:12.1f} {size_cube:10.1f}')
@@ -0,0 +1,619 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 16:38:20 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing json module
+import json
+
+# importing hashlib module
+import hashlib
+
+# importing sqlite3 module
+import sqlite3
+
+# importing subprocess module
+import subprocess
+
+# importing time module
+import time
+
+# importing concurrent.futures module
+import concurrent.futures
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header
+
+# construction of parser object
+desc   = 'Running data reduction pipeline, rebuilding only outdated products'
+parser = argparse.ArgumentParser (description=desc)
+
+# methods to detect changes of files
+choices_check = ['hash', 'mtime']
+
+# choices of precision
+choices_precision = ['float64', 'float32']
+
+# output formats of FITS file
+choices_format = ['native', 'float32', 'int16', 'rice', 'hcompress']
+
+# adding arguments
+parser.add_argument ('-j', '--jobs', type=int, default=1, \
+                     help='number of commands run in parallel (default: 1)')
+parser.add_argument ('-c', '--check', choices=choices_check, default='hash', \
+                     help='method to detect changes of files (default: hash)')
+parser.add_argument ('-s', '--state', default='pipeline.db', \
+                     help='state database file (default: pipeline.db)')
+parser.add_argument ('-l', '--log', default='pipeline.log', \
+                     help='log file of commands (default: pipeline.log)')
+parser.add_argument ('-n', '--dry-run', action='store_true', default=False, \
+                     help='printing commands without running them')
+parser.add_argument ('-t', '--target', default='', \
+                     help='name of target object for photometry' \
+                     + ' (default: no photometry)')
+parser.add_argument ('-r', '--ra', type=float, default=-999.999, \
+                     help='RA of target object in degree')
+parser.add_argument ('-d', '--dec', type=float, default=-999.999, \
+                     help='Dec of target object in degree')
+parser.add_argument ('-e1', '--exptime-min', type=float, default=5.0, \
+                     help='minimum exposure time for photometry (default: 5)')
+parser.add_argument ('-e2', '--exptime-max', type=float, default=90.0, \
+                     help='maximum exposure time for photometry (default: 90)')
+parser.add_argument ('-p', '--precision', choices=choices_precision, \
+                     default='float64', \
+                     help='precision of pixel data in memory' \
+                     + ' (default: float64)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of output FITS file (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
+parser.add_argument ('files', nargs='+', help='raw FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+njobs          = args.jobs
+check          = args.check
+file_db        = args.state
+file_log       = args.log
+dry_run        = args.dry_run
+target_name    = args.target
+target_ra_deg  = args.ra
+target_dec_deg = args.dec
+exptime_min    = args.exptime_min
+exptime_max    = args.exptime_max
+precision      = args.precision
+output_format  = args.output_format
+quantize_level = args.quantize_level
+list_input     = args.files
+
+# checking number of jobs
+if (njobs < 1):
+    # printing message
+    print (f'ERROR: number of jobs must be 1 or larger!')
+    # exit
+    sys.exit ()
+
+# checking database file
+if not (file_db[-3:] == '.db'):
+    # printing message
+    print (f'ERROR: state database file must be a .db file!')
+    # exit
+    sys.exit ()
+
+# checking target position for photometry
+if ( (target_name != '') \
+     and ( (target_ra_deg < 0.0) or (target_dec_deg < -90.0) ) ):
+    # printing message
+    print (f'ERROR: RA and Dec of target object must be given by -r and -d!')
+    # exit
+    sys.exit ()
+
+# scripts of pipeline stages
+dir_scripts      = pathlib.Path (__file__).resolve ().parent.parent
+script_obslog    = dir_scripts / 's09' / 'advobs202302_s09_01_00.py'
+script_dark      = dir_scripts / 's09' / 'advobs202302_s09_02_01.py'
+script_darksub   = dir_scripts / 's09' / 'advobs202302_s09_03_01.py'
+script_flat      = dir_scripts / 's09' / 'advobs202302_s09_04_01.py'
+script_normalise = dir_scripts / 's09' / 'advobs202302_s09_04_02.py'
+script_flatfield = dir_scripts / 's09' / 'advobs202302_s09_05_01.py'
+script_phot      = dir_scripts / 's15' / 'advobs202302_s15_03_03.py'
+
+# options given to the scripts writing FITS files
+list_options_fits = ['-p', precision, '-z', output_format, \
+                     '-q', f'{quantize_level}']
+
+# file name of observing log
+file_obslog = 'obslog.txt'
+
+# SQL statements for the state database
+#
+#   "files" keeps size, modification time, content hash and header keywords
+#   of files, so that a file is hashed and its header is read again only
+#   when its size or modification time changes. "products" keeps, for each
+#   product, the rule (command without input files) and the signatures of
+#   input files and of the product itself at the time it was made.
+#
+sql_create = '''
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash     TEXT,
+    imagetyp TEXT,
+    exptime  REAL,
+    filter   TEXT
+);
+CREATE TABLE IF NOT EXISTS products (
+    product   TEXT PRIMARY KEY,
+    rule      TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    inputs    TEXT NOT NULL
+);
+'''
+sql_insert_file = '''
+INSERT OR REPLACE INTO files
+    (path, size, mtime_ns, hash, imagetyp, exptime, filter)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+sql_insert_product = '''
+INSERT OR REPLACE INTO products (product, rule, signature, inputs)
+    VALUES (?, ?, ?, ?)
+'''
+
+# opening state database
+conn = sqlite3.connect (file_db)
+conn.executescript (sql_create)
+
+# reading state database
+dict_files = {}
+for row in conn.execute ('SELECT path, size, mtime_ns, hash, imagetyp,' \
+                         + ' exptime, filter FROM files'):
+    dict_files[row[0]] = {'size': row[1], 'mtime_ns': row[2], \
+                          'hash': row[3], 'imagetyp': row[4], \
+                          'exptime': row[5], 'filter': row[6]}
+dict_products = {}
+for row in conn.execute ('SELECT product, rule, signature, inputs' \
+                         + ' FROM products'):
+    dict_products[row[0]] = {'rule': row[1], 'signature': row[2], \
+                             'inputs': json.loads (row[3])}
+
+#
+# function to get information of a file
+#
+#   Cached information is discarded when size or modification time of the
+#   file has changed.
+#
+def get_file_info (file_name):
+    # size and modification time
+    stat = os.stat (file_name)
+    # cached information
+    info = dict_files.get (file_name)
+    if ( (info is None) or (info['size'] != stat.st_size) \
+         or (info['mtime_ns'] != stat.st_mtime_ns) ):
+        info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, \
+                'hash': None, 'imagetyp': None, 'exptime': None, \
+                'filter': None}
+        dict_files[file_name] = info
+    # returning information
+    return (info)
+
+#
+# function to calculate content hash of a file
+#
+def calc_hash (file_name):
+    # BLAKE2b hash
+    h = hashlib.blake2b ()
+    # reading file in chunks of 1 MB
+    with open (file_name, 'rb') as fh:
+        for chunk in iter (lambda: fh.read (1024**2), b''):
+            h.update (chunk)
+    # returning hash
+    return (h.hexdigest ())
+
+#
+# function to get signature of a file
+#
+#   hash  : content hash, calculated only for new or modified files
+#   mtime : size and modification time
+#
+#   Changing the method makes all the products outdated.
+#
+def get_signature (file_name):
+    # information of file
+    info = get_file_info (file_name)
+    # size and modification time
+    if (check == 'mtime'):
+        return (f'{info["size"]}:{info["mtime_ns"]}')
+    # content hash
+    if (info['hash'] is None):
+        info['hash'] = calc_hash (file_name)
+    # returning signature
+    return (info['hash'])
+
+#
+# function to get IMAGETYP, EXPTIME, and FILTER of a FITS file
+#
+def get_keywords (file_fits):
+    # information of file
+    info = get_file_info (file_fits)
+    # reading header, if needed
+    if (info['imagetyp'] is None):
+        dict_values = scan_header (file_fits, \
+                                   ['IMAGETYP', 'EXPTIME', 'FILTER'])
+        info['imagetyp'] = str (dict_values['IMAGETYP'])
+        if isinstance (dict_values['EXPTIME'], (int, float)):
+            info['exptime'] = float (dict_values['EXPTIME'])
+        else:
+            info['exptime'] = -999.99
+        info['filter'] = str (dict_values['FILTER'])
+    # returning keywords
+    return (info['imagetyp'], info['exptime'], info['filter'])
+
+#
+# function to write state of files and products into the database
+#
+def save_state ():
+    with conn:
+        conn.executemany (sql_insert_file, \
+                          [(path, info['size'], info['mtime_ns'], \
+                            info['hash'], info['imagetyp'], \
+                            info['exptime'], info['filter']) \
+                           for path, info in dict_files.items ()])
+        conn.executemany (sql_insert_product, \
+                          [(product, record['rule'], record['signature'], \
+                            json.dumps (record['inputs'])) \
+                           for product, record in dict_products.items ()])
+
+#
+# making a graph of products
+#
+#   Each node is a product made by a rule (a command) from input files.
+#   For a "batch" rule, products of the same rule are made by a single
+#   command with their first input files appended, so that many frames
+#   are processed by one process. Products made by the pipeline itself are
+#   recognised by their file names, and are not treated as raw frames.
+#
+
+# nodes of the graph
+dict_nodes = {}
+
+#
+# function to add a node to the graph
+#
+def add_node (product, stage, command, inputs, batch=False, stdout=False, \
+              extra=[]):
+    dict_nodes[product] = {'stage': stage, 'command': command, \
+                           'inputs': inputs, 'batch': batch, \
+                           'stdout': stdout, 'extra': extra}
+
+# collecting raw frames
+list_raw = []
+for file_input in list_input:
+    # making a pathlib object
+    path_input = pathlib.Path (file_input)
+    # if the file is not a FITS file, then skip
+    if not ( (path_input.suffix == '.fits') and (path_input.exists ()) ):
+        continue
+    # if the file is a product of the pipeline, then skip
+    if ( (path_input.stem[-2:] == '_d') or (path_input.stem[-3:] == '_df') \
+         or path_input.name.startswith ( ('dark_', 'flat_', 'nflat_') ) ):
+        continue
+    # appending the file to the list
+    list_raw.append (file_input)
+list_raw = sorted (list_raw)
+
+# classifying raw frames
+dict_dark   = {}
+dict_flat   = {}
+list_object = []
+for file_raw in list_raw:
+    # keywords
+    (datatype, exptime, filter_name) = get_keywords (file_raw)
+    # dark frames for each exposure time
+    if (datatype == 'DARK'):
+        dict_dark.setdefault (exptime, []).append (file_raw)
+    # dark subtraction for object and flatfield frames
+    elif ( (datatype == 'LIGHT') or (datatype == 'FLAT') ):
+        file_darksub = pathlib.Path (file_raw).stem + '_d.fits'
+        file_dark    = f'dark_{int (exptime):04d}.fits'
+        add_node (file_darksub, 'darksub', \
+                  [sys.executable, str (script_darksub), '-j', '1'] \
+                  + list_options_fits, [file_raw, file_dark], batch=True)
+        # flatfield frames for each filter
+        if (datatype == 'FLAT'):
+            dict_flat.setdefault (filter_name, []).append (file_darksub)
+        # object frames
+        else:
+            list_object.append ( (file_raw, file_darksub, exptime, \
+                                  filter_name) )
+
+# observing log
+add_node (file_obslog, 'obslog', \
+          [sys.executable, str (script_obslog)] + list_raw, list_raw, \
+          stdout=True)
+
+# combined dark frames
+for exptime in sorted (dict_dark.keys ()):
+    file_dark = f'dark_{int (exptime):04d}.fits'
+    add_node (file_dark, 'dark', \
+              [sys.executable, str (script_dark), '-t', 'DARK', \
+               '-e', f'{exptime}', '-o', file_dark] + list_options_fits \
+              + dict_dark[exptime], dict_dark[exptime])
+
+# combined and normalised flatfield frames
+for filter_name in sorted (dict_flat.keys ()):
+    file_flat  = f'flat_{filter_name}.fits'
+    file_nflat = f'nflat_{filter_name}.fits'
+    add_node (file_flat, 'flat', \
+              [sys.executable, str (script_flat), '-t', 'FLAT', \
+               '-f', filter_name, '-o', file_flat] + list_options_fits \
+              + dict_flat[filter_name], dict_flat[filter_name])
+    add_node (file_nflat, 'normalise', \
+              [sys.executable, str (script_normalise), '-o', file_nflat] \
+              + list_options_fits + [file_flat], [file_flat])
+
+# flatfielding and photometry for object frames
+for (file_raw, file_darksub, exptime, filter_name) in list_object:
+    # flatfielding
+    file_flatfielded = pathlib.Path (file_darksub).stem + 'f.fits'
+    file_nflat       = f'nflat_{filter_name}.fits'
+    add_node (file_flatfielded, 'flatfield', \
+              [sys.executable, str (script_flatfield), '-j', '1'] \
+              + list_options_fits, [file_darksub, file_nflat], batch=True)
+
+    # photometry, only for frames selected by the photometry script
+    # (frames are measured in a single process by the batch photometry
+    #  script, which writes a result file and a plot for each frame)
+    if (target_name == ''):
+        continue
+    if not ( (exptime > exptime_min) and (exptime < exptime_max) ):
+        continue
+    # frame ID taken from file name (e.g. "lot_20230101_0012_df.fits")
+    try:
+        frame_id = int (file_flatfielded.split ('_')[-2])
+    except ValueError:
+        print (f'# WARNING: no frame ID in "{file_flatfielded}",' \
+               + f' skipping photometry...')
+        continue
+    file_phot    = f'phot_{target_name}_{filter_name}_{frame_id:04d}.phot'
+    file_graphic = f'phot_{target_name}_{filter_name}_{frame_id:04d}.pdf'
+    add_node (file_phot, 'photometry', \
+              [sys.executable, str (script_phot), '-s', '-g', '-j', '1', \
+               '-n', target_name, '-f', filter_name, \
+               '-r', f'{target_ra_deg}', '-d', f'{target_dec_deg}', \
+               '-e1', f'{exptime_min}', '-e2', f'{exptime_max}'], \
+              [file_flatfielded], \
+              batch=True, extra=[file_graphic])
+
+#
+# function to make a text of rule of a node
+#
+#   Paths of scripts are replaced by their names, and input files are
+#   removed, so that moving the scripts or adding frames does not change
+#   the rule.
+#
+def make_rule (node):
+    # command
+    list_words = [pathlib.Path (node['command'][1]).name]
+    for word in node['command'][2:]:
+        if not (word in node['inputs']):
+            list_words.append (word)
+    # returning rule
+    return (' '.join (list_words))
+
+#
+# function to calculate level of a node
+#
+#   Level of a node is larger than those of the nodes making its inputs.
+#   Nodes of the same level are independent of each other.
+#
+dict_level = {}
+def get_level (product):
+    if not (product in dict_level):
+        level = 0
+        for file_input in dict_nodes[product]['inputs']:
+            if (file_input in dict_nodes):
+                level = max (level, get_level (file_input) + 1)
+        dict_level[product] = level
+    return (dict_level[product])
+
+#
+# function to check a node
+#
+#   failed  : an input was not made
+#   missing : an input does not exist and there is no rule to make it
+#   outdated: the product needs to be (re)made
+#   done    : the product is up to date
+#
+def check_node (product):
+    # node
+    node = dict_nodes[product]
+    # inputs which could not be made
+    for file_input in node['inputs']:
+        if (file_input in set_failed):
+            return ('failed', file_input)
+    # inputs which are (re)made
+    for file_input in node['inputs']:
+        if (file_input in set_made):
+            return ('outdated', file_input)
+    # inputs which do not exist
+    for file_input in node['inputs']:
+        if not (os.path.exists (file_input)):
+            return ('missing', file_input)
+    # product which does not exist
+    if not (os.path.exists (product)):
+        return ('outdated', product)
+    # record of the product
+    record = dict_products.get (product)
+    if ( (record is None) or (record['rule'] != make_rule (node)) \
+         or (record['signature'] != get_signature (product)) ):
+        return ('outdated', product)
+    # inputs which have been changed
+    for file_input in node['inputs']:
+        if (record['inputs'].get (file_input) != get_signature (file_input)):
+            return ('outdated', file_input)
+    # the product is up to date
+    return ('done', None)
+
+#
+# function to run a command
+#
+#   Standard output and standard error are returned together with elapsed
+#   time. For a node whose product is standard output, it is written into
+#   the product file.
+#
+def run_task (task):
+    # time at start
+    t0 = time.perf_counter ()
+    # running command
+    result = subprocess.run (task['command'], stdout=subprocess.PIPE, \
+                             stderr=subprocess.STDOUT, text=True)
+    # writing standard output into the product file
+    if (task['stdout']):
+        with open (task['products'][0], 'w') as fh:
+            fh.write (result.stdout)
+    # time at end
+    t1 = time.perf_counter ()
+    # returning output and elapsed time
+    return (task, result.returncode, result.stdout, t1 - t0)
+
+# products which are (re)made, which could not be made, and up to date
+set_made   = set ()
+set_failed = set ()
+set_done   = set ()
+
+# opening log file
+if not (dry_run):
+    fh_log = open (file_log, 'a')
+
+# printing status
+print (f'# {len (list_raw)} raw frames, {len (dict_nodes)} products,' \
+       + f' check = {check}, jobs = {njobs}')
+
+# time at start
+t_start = time.perf_counter ()
+
+# processing nodes level by level
+for level in range (max ([get_level (p) for p in dict_nodes]) + 1):
+    # nodes of this level
+    list_products = sorted ([p for p in dict_nodes if get_level (p) == level])
+
+    # checking nodes
+    list_outdated = []
+    for product in list_products:
+        (status, reason) = check_node (product)
+        if (status == 'done'):
+            set_done.add (product)
+        elif (status == 'outdated'):
+            list_outdated.append (product)
+        else:
+            set_failed.add (product)
+            print (f'# {product}: skipped ({status} input "{reason}")')
+
+    # making tasks
+    # (products of a batch rule are split into "njobs" commands)
+    list_tasks = []
+    dict_batch = {}
+    for product in list_outdated:
+        node = dict_nodes[product]
+        if (node['batch']):
+            dict_batch.setdefault (tuple (node['command']), []) \
+                .append (product)
+        else:
+            list_tasks.append ({'command': node['command'], \
+                                'products': [product], \
+                                'stdout': node['stdout']})
+    for command, list_batch in dict_batch.items ():
+        nchunks = min (njobs, len (list_batch))
+        for i in range (nchunks):
+            list_chunk = list_batch[i::nchunks]
+            list_tasks.append ({'command': list (command) \
+                                + [dict_nodes[p]['inputs'][0] \
+                                   for p in list_chunk], \
+                                'products': list_chunk, 'stdout': False})
+
+    # printing status
+    print (f'# level {level}: {len (list_outdated)} to be made,' \
+           + f' {len (list_products) - len (list_outdated)} up to date' \
+           + f' or skipped, {len (list_tasks)} commands')
+
+    # dry run
+    if (dry_run):
+        for task in list_tasks:
+            rule = make_rule ({'command': task['command'], 'inputs': []})
+            print (f'#   {rule}')
+        set_made.update (list_outdated)
+        continue
+
+    # removing old products, since the scripts do not overwrite files
+    for product in list_outdated:
+        for file_old in [product] + dict_nodes[product]['extra']:
+            if (os.path.exists (file_old)):
+                os.remove (file_old)
+
+    # running commands in parallel
+    with concurrent.futures.ThreadPoolExecutor (max_workers=njobs) \
+         as executor:
+        for (task, returncode, output, elapsed) \
+            in executor.map (run_task, list_tasks):
+            # writing output into log file
+            fh_log.write (f'$ {" ".join (task["command"])}\n{output}\n')
+            # checking products
+            for product in task['products']:
+                node = dict_nodes[product]
+                if (os.path.exists (product)):
+                    set_made.add (product)
+                    dict_products[product] \
+                        = {'rule': make_rule (node), \
+                           'signature': get_signature (product), \
+                           'inputs': {f: get_signature (f) \
+                                      for f in node['inputs']}}
+                else:
+                    set_failed.add (product)
+                    print (f'# {product}: FAILED (see "{file_log}")')
+            # printing status
+            stage = dict_nodes[task['products'][0]]['stage']
+            print (f'#   {stage:10s} {len (task["products"]):5d}' \
+                   + f' products in {elapsed:8.2f} sec')
+
+    # writing state into database
+    save_state ()
+
+# time at end
+t_end = time.perf_counter ()
+
+# closing log file and database
+if not (dry_run):
+    fh_log.close ()
+conn.close ()
+
+# printing summary
+print (f'# summary:')
+if (dry_run):
+    print (f'#   products to be (re)made = {len (set_made):8d}')
+else:
+    print (f'#   products (re)made       = {len (set_made):8d}')
+print (f'#   products up to date     = {len (set_done):8d}')
+print (f'#   products failed         = {len (set_failed):8d}')
+print (f'#   elapsed time            = {t_end - t_start:8.2f} sec')
@@ -22,6 +22,13 @@ import astropy.io.fits
 # importing photutils module
 import photutils.centroids
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
 # constructing parser object
 desc   = 'centroid measurement using 2-dim. Gaussian'
 parser = argparse.ArgumentParser (description=desc)
@@ -44,6 +51,24 @@ x_init     = args.xinit
 y_init     = args.yinit
 file_fits  = args.file
 
+#
+# function to read a sub-frame of FITS image
+#
+#   The file is memory-mapped and only the region [y_min:y_max, x_min:x_max]
+#   is read by "section" of HDU, instead of the whole image. Only the rows
+#   of the sub-frame are read from the disk, and only the tiles overlapping
+#   with the sub-frame are decompressed for a tile-compressed image.
+#
+def read_subframe (file_fits, x_min, x_max, y_min, y_max):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only the sub-frame
+        subframe = hdu.section[y_min:y_max, x_min:x_max]
+    # returning sub-frame
+    return (subframe)
+
 # making pathlib object
 path_fits = pathlib.Path (file_fits)
 
@@ -80,9 +105,9 @@ print (f'#')
 print (f'# now, reading FITS file...')
 
 # opening FITS file
-with astropy.io.fits.open (file_fits) as hdu_list:
+with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
     # reading FITS header
-    header = hdu_list[0].header
+    header = find_image_hdu (hdu_list).header
 
     # image size
     image_size_x = header['NAXIS1']
@@ -95,9 +120,6 @@ with astropy.io.fits.open (file_fits) as hdu_list:
     if not ( (y_init > 0) and (y_init < image_size_y) ):
         print (f'Input y_init value exceed image size.')
         sys.exit ()
-    
-    # reading FITS image data
-    data = hdu_list[0].data
 
 # printing status
 print (f'# finished reading FITS file!')
@@ -112,7 +134,8 @@ y_min = y_init - half_width
 y_max = y_init + half_width + 1
 
 # extraction of subframe for calculation
-subframe = data[y_min:y_max, x_min:x_max]
+# (only the rows of the subframe are read from the disk)
+subframe = read_subframe (file_fits, x_min, x_max, y_min, y_max)
 
 # printing status
 print (f'# finished extracting image around the target object!')
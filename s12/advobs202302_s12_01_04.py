@@ -0,0 +1,296 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 20:31:05 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing time module
+import time
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# importing advobs202302_batchfit module
+from advobs202302_batchfit import extract_cutouts, centroid_com_batch, \
+    centroid_1dg_batch, centroid_2dg_batch
+
+# constructing parser object
+desc   = 'detecting sources in a whole frame and measuring their centroids'
+parser = argparse.ArgumentParser (description=desc)
+
+# centroid measurement technique
+choices_centroid = ['com', '1dg', '2dg', 'none']
+
+# adding command-line arguments
+parser.add_argument ('-c', '--centroid', choices=choices_centroid, \
+                     default='com', \
+                     help='centroid measurement algorithm (default: com)')
+parser.add_argument ('-w', '--width', type=int, default=5, \
+                     help='half-width of centroid calculation box (default: 5)')
+parser.add_argument ('-t', '--threshold', type=float, default=5.0, \
+                     help='detection threshold in sigma (default: 5.0)')
+parser.add_argument ('-s', '--sigma', type=float, default=3.0, \
+                     help='sigma for clipping of background (default: 3.0)')
+parser.add_argument ('-n', '--maxiters', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-k', '--step', type=int, default=4, \
+                     help='sampling step of pixels for background estimate' \
+                     + ' (default: 4)')
+parser.add_argument ('-o', '--output', default='', \
+                     help='output file name (default: standard output)')
+parser.add_argument ('file', default='', help='input file name')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+centroid    = args.centroid
+half_width  = args.width
+threshold   = args.threshold
+nsigma      = args.sigma
+maxiters    = args.maxiters
+step        = args.step
+file_output = args.output
+file_fits   = args.file
+
+# making pathlib object
+path_fits = pathlib.Path (file_fits)
+
+# checking input FITS file name
+if (file_fits == ''):
+    # printing message
+    print (f'You need to specify input file name.')
+    # exit
+    sys.exit ()
+# if input file is not a FITS file, then stop the script
+if not (path_fits.suffix == '.fits'):
+    # printing message
+    print (f'Input file must be a FITS file.')
+    # exit
+    sys.exit ()
+# if input file does not exist, then stop the script
+if not (path_fits.exists ()):
+    # printing message
+    print (f'Input file does not exist.')
+    # exit
+    sys.exit ()
+# checking sampling step
+if (step < 1):
+    # printing message
+    print (f'Sampling step must be 1 or larger.')
+    # exit
+    sys.exit ()
+# checking half-width of the box
+# (the box is also used to exclude pixels near the edge of the image)
+if (half_width < 1):
+    # printing message
+    print (f'Half-width of the box must be 1 or larger.')
+    # exit
+    sys.exit ()
+
+#
+# function to carry out sigma clipping
+#
+#   Pixels outside of [centre - sigma * stddev, centre + sigma * stddev]
+#   are rejected iteratively until no more pixels are rejected or the
+#   number of iterations reaches "maxiters". Once rejected, a pixel stays
+#   rejected. Non-finite values are always rejected. The algorithm is the
+#   same as that of astropy.stats.sigma_clip with stdfunc='std'.
+#
+#   Only clipping using all the pixels is carried out here. The same
+#   function with clipping along an axis is in
+#   s06/advobs202302_s06_sigclip.py.
+#
+#   Parameters:
+#     data     : input numpy array
+#     sigma    : rejection threshold in sigma
+#     maxiters : maximum number of iterations
+#     cenfunc  : 'median' or 'mean'
+#     output   : 'mask' or 'stats'
+#
+#   Returned value:
+#     for output='mask', a boolean array of the same shape as "data"
+#       (True for rejected pixels)
+#     for output='stats', (mean, median, stddev) of accepted pixels
+#
+def sigma_clip (data, sigma=3.0, maxiters=5, cenfunc='median', \
+                output='mask'):
+    # pixel values
+    # (integers are converted into 64-bit floating point, while floating
+    #  point data are used as they are to avoid copying)
+    values = numpy.asarray (data)
+    if not (numpy.issubdtype (values.dtype, numpy.floating) ):
+        values = values.astype (numpy.float64)
+
+    # clipping using all the pixels
+    # (a 1-dim. array of accepted pixels is shrunk at each iteration)
+    # accepted pixels (non-finite values are rejected from the beginning)
+    accepted = values[numpy.isfinite (values)]
+    # lower and upper limits of accepted pixel values
+    low_max  = -numpy.inf
+    high_min = +numpy.inf
+    # iterations
+    for i in range (maxiters):
+        # leaving the loop, if no pixel is left
+        if (accepted.size == 0):
+            break
+        # centre value and standard deviation
+        if (cenfunc == 'median'):
+            centre = numpy.median (accepted)
+        elif (cenfunc == 'mean'):
+            centre = numpy.mean (accepted, dtype=numpy.float64)
+        stddev = numpy.std (accepted, dtype=numpy.float64)
+        # lower and upper limits
+        low  = centre - sigma * stddev
+        high = centre + sigma * stddev
+        # pixels within the limits
+        within = (accepted >= low) & (accepted <= high)
+        # leaving the loop, if no pixel is newly rejected
+        if (within.all ()):
+            break
+        # updating accepted pixels and limits
+        accepted = accepted[within]
+        low_max  = max (low_max, low)
+        high_min = min (high_min, high)
+    # returning results
+    if (output == 'mask'):
+        return ( ~(numpy.isfinite (values) & (values >= low_max) \
+                   & (values <= high_min) ) )
+    elif (output == 'stats'):
+        return (numpy.mean (accepted, dtype=numpy.float64), \
+                numpy.median (accepted), \
+                numpy.std (accepted, dtype=numpy.float64))
+
+# time at start
+t0 = time.perf_counter ()
+
+# opening FITS file
+with astropy.io.fits.open (file_fits) as hdu_list:
+    # reading FITS image data
+    data = find_image_hdu (hdu_list).data.astype (numpy.float64)
+
+# time after reading
+t1 = time.perf_counter ()
+
+# background level and noise estimated by sigma clipping
+# (every "step"-th pixel in both directions is used to save time)
+(bg_mean, bg_median, bg_stddev) \
+    = sigma_clip (data[::step, ::step], sigma=nsigma, maxiters=maxiters, \
+                  output='stats')
+
+# time after background estimate
+t2 = time.perf_counter ()
+
+# pixels above the threshold
+# (pixels near the edge of the image are excluded)
+above = (data > bg_median + threshold * bg_stddev)
+above[:half_width, :]  = False
+above[-half_width:, :] = False
+above[:, :half_width]  = False
+above[:, -half_width:] = False
+(y_cand, x_cand) = numpy.nonzero (above)
+
+# offsets of pixels in the box around a pixel
+(dy, dx) = numpy.mgrid[-half_width:half_width+1, -half_width:half_width+1]
+dy       = dy.ravel ()
+dx       = dx.ravel ()
+# pixels before the centre pixel in the raster order
+before   = numpy.arange (dy.size) < dy.size // 2
+
+# local maxima above the threshold
+# (a pixel is a local maximum, if it is the largest in the box of the same
+#  size as the box for centroid calculation. The test is same as comparison
+#  with scipy.ndimage.maximum_filter, but it is carried out only for pixels
+#  above the threshold, which is much faster for a large image. A peak of
+#  several pixels of the same value, e.g. a saturated star, is counted only
+#  once by requiring the pixel to be larger than the pixels before it.)
+is_peak = numpy.zeros (x_cand.size, dtype=bool)
+for i0 in range (0, x_cand.size, 10000):
+    # pixel values of the boxes around candidates
+    y_c = y_cand[i0:i0+10000]
+    x_c = x_cand[i0:i0+10000]
+    box = data[y_c[:, numpy.newaxis] + dy, x_c[:, numpy.newaxis] + dx]
+    # values of candidates
+    v_c = data[y_c, x_c]
+    # checking local maxima
+    is_peak[i0:i0+10000] \
+        = (v_c > numpy.amax (box[:, before], axis=1) ) \
+        & (v_c >= numpy.amax (box[:, ~before], axis=1) )
+x_peak = x_cand[is_peak]
+y_peak = y_cand[is_peak]
+v_peak = data[y_peak, x_peak]
+
+# time after detection
+t3 = time.perf_counter ()
+
+# centroid measurement for all the detected sources
+if (centroid == 'none'):
+    x_centre = x_peak.astype (numpy.float64)
+    y_centre = y_peak.astype (numpy.float64)
+else:
+    # extracting cutouts of background subtracted image
+    (cutouts, x_min, y_min) = extract_cutouts (data, x_peak, y_peak, \
+                                               half_width)
+    cutouts = cutouts - bg_median
+    # centroid measurement for all the sources at once
+    if (centroid == 'com'):
+        (x_centre, y_centre) = centroid_com_batch (cutouts)
+    elif (centroid == '1dg'):
+        (x_centre, y_centre) = centroid_1dg_batch (cutouts)
+    elif (centroid == '2dg'):
+        (x_centre, y_centre) = centroid_2dg_batch (cutouts)
+    x_centre += x_min
+    y_centre += y_min
+
+# time after centroid measurement
+t4 = time.perf_counter ()
+
+# opening output file
+if (file_output == ''):
+    fh_out = sys.stdout
+else:
+    fh_out = open (file_output, 'w')
+
+# writing results
+fh_out.write (f'#\n')
+fh_out.write (f'# result of source detection\n')
+fh_out.write (f'#\n')
+fh_out.write (f'#  input file name         = {file_fits}\n')
+fh_out.write (f'#  background level        = {bg_median:.3f} ADU\n')
+fh_out.write (f'#  background noise        = {bg_stddev:.3f} ADU\n')
+fh_out.write (f'#  detection threshold     = {threshold} sigma\n')
+fh_out.write (f'#  number of sources       = {x_peak.size}\n')
+fh_out.write (f'#  centroid technique      = {centroid}\n')
+fh_out.write (f'#  time for reading        = {t1 - t0:.3f} sec\n')
+fh_out.write (f'#  time for background     = {t2 - t1:.3f} sec\n')
+fh_out.write (f'#  time for detection      = {t3 - t2:.3f} sec\n')
+fh_out.write (f'#  time for centroid       = {t4 - t3:.3f} sec\n')
+fh_out.write (f'#\n')
+fh_out.write (f'# NAME, X_CENTRE, Y_CENTRE, X_PEAK, Y_PEAK, PEAK\n')
+fh_out.write (f'#\n')
+for i in range (x_peak.size):
+    fh_out.write (f'src{i:06d} {x_centre[i]:.3f} {y_centre[i]:.3f}' \
+                  + f' {x_peak[i]} {y_peak[i]} {v_peak[i]:.3f}\n')
+
+# closing output file
+if not (file_output == ''):
+    fh_out.close ()
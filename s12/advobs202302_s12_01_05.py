@@ -0,0 +1,168 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 21:02:47 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# importing advobs202302_batchfit module
+from advobs202302_batchfit import extract_cutouts, centroid_com_batch, \
+    centroid_1dg_batch, centroid_2dg_batch
+
+# constructing parser object
+desc   = 'centroid measurement of many stars at once'
+parser = argparse.ArgumentParser (description=desc)
+
+# centroid measurement technique
+choices_centroid = ['com', '1dg', '2dg']
+
+# adding command-line arguments
+parser.add_argument ('-c', '--centroid', choices=choices_centroid, \
+                     default='com', \
+                     help='centroid measurement algorithm (default: com)')
+parser.add_argument ('-w', '--width', type=int, default=5, \
+                     help='half-width of centroid calculation box (default: 5)')
+parser.add_argument ('-l', '--list', default='', \
+                     help='star list file (name, x_init, y_init)')
+parser.add_argument ('-o', '--output', default='', \
+                     help='output file name (default: standard output)')
+parser.add_argument ('file', default='', help='input file name')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+centroid    = args.centroid
+half_width  = args.width
+file_list   = args.list
+file_output = args.output
+file_fits   = args.file
+
+# making pathlib object
+path_fits = pathlib.Path (file_fits)
+
+# if input file is not a FITS file, then stop the script
+if not (path_fits.suffix == '.fits'):
+    # printing message
+    print (f'Input file must be a FITS file.')
+    # exit
+    sys.exit ()
+# if input file does not exist, then stop the script
+if not (path_fits.exists ()):
+    # printing message
+    print (f'Input file does not exist.')
+    # exit
+    sys.exit ()
+# checking star list file
+if (file_list == ''):
+    # printing message
+    print (f'You need to specify star list file by using -l option.')
+    # exit
+    sys.exit ()
+if not (pathlib.Path (file_list).exists ()):
+    # printing message
+    print (f'Star list file "{file_list}" does not exist.')
+    # exit
+    sys.exit ()
+# checking half-width of the box
+if (half_width < 1):
+    # printing message
+    print (f'Half-width of the box must be 1 or larger.')
+    # exit
+    sys.exit ()
+
+# reading star list
+list_names = []
+list_x     = []
+list_y     = []
+with open (file_list, 'r') as fh:
+    # reading file line-by-line
+    for line in fh:
+        # if the line starts with '#', then skip
+        if (line[0] == '#'):
+            continue
+        # splitting line
+        data = line.split ()
+        # skipping empty line
+        if (len (data) < 3):
+            continue
+        # name and coordinates
+        list_names.append (data[0])
+        list_x.append (float (data[1]) )
+        list_y.append (float (data[2]) )
+x_init = numpy.array (list_x)
+y_init = numpy.array (list_y)
+
+# opening FITS file
+with astropy.io.fits.open (file_fits) as hdu_list:
+    # reading FITS image data
+    data = find_image_hdu (hdu_list).data.astype (numpy.float64)
+
+# stars whose boxes are within the image
+inside = (numpy.rint (x_init) - half_width >= 0) \
+    & (numpy.rint (x_init) + half_width < data.shape[1]) \
+    & (numpy.rint (y_init) - half_width >= 0) \
+    & (numpy.rint (y_init) + half_width < data.shape[0])
+for i in numpy.nonzero (~inside)[0]:
+    print (f'### star "{list_names[i]}" is too close to the edge, skipping...', \
+           file=sys.stderr)
+index_inside = numpy.nonzero (inside)[0]
+
+# extracting cutouts
+(cutouts, x_min, y_min) = extract_cutouts (data, x_init[index_inside], \
+                                           y_init[index_inside], half_width)
+
+# rough background subtraction
+cutouts = cutouts - numpy.median (cutouts, axis=(1, 2))[:, numpy.newaxis, \
+                                                        numpy.newaxis]
+
+# centroid calculation
+if (centroid == 'com'):
+    (x_centre, y_centre) = centroid_com_batch (cutouts)
+elif (centroid == '1dg'):
+    (x_centre, y_centre) = centroid_1dg_batch (cutouts)
+elif (centroid == '2dg'):
+    (x_centre, y_centre) = centroid_2dg_batch (cutouts)
+x_centre += x_min
+y_centre += y_min
+
+# opening output file
+if (file_output == ''):
+    fh_out = sys.stdout
+else:
+    fh_out = open (file_output, 'w')
+
+# writing results
+fh_out.write (f'#\n')
+fh_out.write (f'# result of centroid measurement ({centroid})\n')
+fh_out.write (f'#\n')
+fh_out.write (f'# NAME, X_CENTRE, Y_CENTRE\n')
+fh_out.write (f'#\n')
+for j in range (index_inside.size):
+    fh_out.write (f'{list_names[index_inside[j]]}' \
+                  + f' {x_centre[j]:.3f} {y_centre[j]:.3f}\n')
+
+# closing output file
+if not (file_output == ''):
+    fh_out.close ()
@@ -0,0 +1,233 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 21:14:37 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing mmap module
+import mmap
+
+# importing pathlib module
+import pathlib
+
+# importing tempfile module
+import tempfile
+
+# importing time module
+import time
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# constructing parser object
+desc   = 'Benchmark of reading sub-frames: whole image vs memory-mapped section'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding command-line arguments
+parser.add_argument ('-s', '--size', type=int, default=10000, \
+                     help='image size in pixel (default: 10000)')
+parser.add_argument ('-n', '--nstars', default='1,10,100', \
+                     help='list of numbers of stars (default: 1,10,100)')
+parser.add_argument ('-w', '--width', type=int, default=10, \
+                     help='half-width of sub-frame (default: 10)')
+parser.add_argument ('-t', '--tile', type=int, default=0, \
+                     help='tile size for compressed image' \
+                     + ' (default: 0 = row by row)')
+parser.add_argument ('-r', '--repeat', type=int, default=3, \
+                     help='number of repetitions, best is taken (default: 3)')
+parser.add_argument ('-d', '--directory', default='', \
+                     help='directory for test files (default: temporary)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+image_size  = args.size
+list_nstars = [int (n) for n in args.nstars.split (',')]
+half_width  = args.width
+tile_size   = args.tile
+nrepeat     = args.repeat
+dir_work    = args.directory
+
+#
+# function to read sub-frames after reading whole image
+#
+#   This is what the scripts of s12 to s15 used to do.
+#
+def read_whole (file_fits, x, y):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=False) as hdu_list:
+        # reading whole image
+        data = find_image_hdu (hdu_list).data
+        # extracting sub-frames
+        list_subframes = [data[j - half_width:j + half_width + 1, \
+                               i - half_width:i + half_width + 1] \
+                          for (i, j) in zip (x, y)]
+    # returning sub-frames
+    return (list_subframes)
+
+#
+# function to read only sub-frames from memory-mapped file
+#
+def read_section (file_fits, x, y):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only sub-frames
+        list_subframes = [hdu.section[j - half_width:j + half_width + 1, \
+                                      i - half_width:i + half_width + 1] \
+                          for (i, j) in zip (x, y)]
+    # returning sub-frames
+    return (list_subframes)
+
+#
+# function to estimate amount of data read from a file
+#
+#   The whole image is read by read_whole (). For read_section (), pixels
+#   of an uncompressed file are read through memory mapping page by page,
+#   and distinct pages covering rows of all the sub-frames are counted.
+#   For a tile-compressed file, whole tiles overlapping sub-frames are read
+#   and decompressed, and the number of distinct tiles is multiplied by the
+#   mean size of a compressed tile. Returned values are the numbers of
+#   bytes for read_whole () and read_section ().
+#
+def estimate_bytes_read (file_fits, x, y):
+    # location and size of data part of the file
+    with astropy.io.fits.open (file_fits) as hdu_list:
+        hdu        = find_image_hdu (hdu_list)
+        compressed = isinstance (hdu, astropy.io.fits.CompImageHDU)
+        fileinfo   = hdu.fileinfo ()
+        (ny, nx)   = hdu.shape
+        # (bytes per pixel are taken from BITPIX, since hdu.data would
+        #  read, or decompress, the whole image)
+        itemsize   = abs (hdu.header['BITPIX']) // 8
+    data_loc  = fileinfo['datLoc']
+    data_span = fileinfo['datSpan']
+    # tile-compressed file
+    if (compressed):
+        # distinct tiles overlapping sub-frames
+        set_tiles = set ()
+        for (i, j) in zip (x, y):
+            for ty in range ( (j - half_width) // tile_shape[0], \
+                              (j + half_width) // tile_shape[0] + 1):
+                for tx in range ( (i - half_width) // tile_shape[1], \
+                                  (i + half_width) // tile_shape[1] + 1):
+                    set_tiles.add ( (ty, tx) )
+        # number of tiles in the image
+        ntiles = (-(-ny // tile_shape[0])) * (-(-nx // tile_shape[1]))
+        # bytes read
+        nbytes_section = len (set_tiles) * data_span / ntiles
+    # uncompressed file
+    else:
+        # distinct pages covering rows of sub-frames
+        set_pages = set ()
+        for (i, j) in zip (x, y):
+            for row in range (j - half_width, j + half_width + 1):
+                start = data_loc + (row * nx + i - half_width) * itemsize
+                end   = start + (2 * half_width + 1) * itemsize - 1
+                set_pages.update (range (start // mmap.PAGESIZE, \
+                                         end // mmap.PAGESIZE + 1) )
+        # bytes read
+        nbytes_section = len (set_pages) * mmap.PAGESIZE
+    # returning bytes read
+    return (data_span, nbytes_section)
+
+#
+# function to measure the best time of a function
+#
+def measure_time (func, file_fits, x, y):
+    list_time = []
+    for i in range (nrepeat):
+        t0 = time.perf_counter ()
+        list_subframes = func (file_fits, x, y)
+        t1 = time.perf_counter ()
+        list_time.append (t1 - t0)
+    # returning best time and sub-frames
+    return (min (list_time), list_subframes)
+
+# random number generator
+rng = numpy.random.default_rng (0)
+
+# synthetic image (sky background and noise)
+data = rng.normal (1000.0, 10.0, (image_size, image_size) ).astype (numpy.float32)
+
+# tile shape for compressed image
+if (tile_size > 0):
+    tile_shape = (tile_size, tile_size)
+else:
+    tile_shape = (1, image_size)
+
+# directory for test files
+if (dir_work == ''):
+    tmpdir   = tempfile.TemporaryDirectory ()
+    dir_work = tmpdir.name
+path_raw = pathlib.Path (dir_work) / 'benchmark_raw.fits'
+path_cmp = pathlib.Path (dir_work) / 'benchmark_rice.fits'
+
+# writing uncompressed and tile-compressed FITS files
+astropy.io.fits.PrimaryHDU (data=data).writeto (path_raw, overwrite=True)
+hdu_cmp = astropy.io.fits.CompImageHDU (data=data, \
+                                        compression_type='RICE_1', \
+                                        tile_shape=tile_shape)
+astropy.io.fits.HDUList ([astropy.io.fits.PrimaryHDU (), hdu_cmp]).writeto \
+    (path_cmp, overwrite=True)
+
+# printing header
+print (f'#')
+print (f'# image size   = {image_size} x {image_size} pixels (float32)')
+print (f'# sub-frame    = {2 * half_width + 1} x {2 * half_width + 1} pixels')
+print (f'# uncompressed = {path_raw.stat ().st_size / 1024**2:8.1f} MB')
+print (f'# compressed   = {path_cmp.stat ().st_size / 1024**2:8.1f} MB', \
+       f'(RICE_1, tile = {tile_shape[0]} x {tile_shape[1]})')
+print (f'# best of {nrepeat} runs, files are in the page cache')
+print (f'# data read from the file are estimated from pages or tiles')
+print (f'#')
+print (f'# {"file":>12s} {"N":>6s} {"whole [s]":>10s} {"section [s]":>11s}', \
+       f'{"speed-up":>9s} {"whole [kB]":>11s} {"section [kB]":>12s}', \
+       f'{"identical":>9s}')
+
+# measurements
+for nstars in list_nstars:
+    # positions of stars
+    x = rng.integers (half_width, image_size - half_width, nstars)
+    y = rng.integers (half_width, image_size - half_width, nstars)
+
+    for (label, path_fits) in ( ('uncompressed', path_raw), \
+                                ('compressed', path_cmp) ):
+        # reading whole image
+        (time_whole, list_whole) = measure_time (read_whole, path_fits, x, y)
+
+        # reading only sub-frames
+        (time_section, list_section) \
+            = measure_time (read_section, path_fits, x, y)
+
+        # checking sub-frames
+        identical = all ( [numpy.array_equal (a, b) for (a, b) \
+                           in zip (list_whole, list_section)] )
+
+        # amount of data read from the file
+        (nbytes_whole, nbytes_section) \
+            = estimate_bytes_read (path_fits, x, y)
+
+        # printing results
+        print (f'  {label:>12s} {nstars:6d} {time_whole:10.4f}', \
+               f'{time_section:11.4f} {time_whole / time_section:9.1f}', \
+               f'{nbytes_whole / 1024:11.1f} {nbytes_section / 1024:12.1f}', \
+               f'{str (identical):>9s}')
@@ -28,6 +28,13 @@ import matplotlib.figure
 import matplotlib.backends.backend_agg
 import matplotlib.patches
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
 # constructing parser object
 desc   = 'PSF fitting for a point-source object using Gaussian or Moffat'
 parser = argparse.ArgumentParser (description=desc)
@@ -79,24 +86,29 @@ cmap        = args.cmap
 file_fits   = args.file
 file_output = args.output
 
+# function to read a sub-frame of FITS image
+# (only the rows of the sub-frame are read from the memory-mapped file by
+#  "section" of HDU, and only the tiles overlapping with the sub-frame are
+#  decompressed for a tile-compressed image)
+def read_subframe (file_fits, x_min, x_max, y_min, y_max):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only the sub-frame
+        subframe = hdu.section[y_min:y_max, x_min:x_max]
+    # returning sub-frame
+    return (subframe)
+
 # function to read FITS header
 def read_fits_header (file_fits):
     # opening FITS file
-    with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
-# function to read FITS pixel data
-def read_fits_data (file_fits):
-    # opening FITS file
-    with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
-    # returning pixel data
-    return (data)
-
 # making pathlib objects
 path_fits   = pathlib.Path (file_fits)
 path_output = pathlib.Path (file_output)
@@ -163,8 +175,6 @@ if not ( (y_init > 0) and (y_init < image_size_y) ):
     print (f'Input y_init value exceed image size.')
     sys.exit ()
     
-# reading FITS image data
-data = read_fits_data (file_fits)
 
 # printing status
 print (f'# finished reading FITS file!')
@@ -179,7 +189,8 @@ y_min = y_init - half_width
 y_max = y_init + half_width + 1
 
 # extraction of subframe for calculation
-subframe = data[y_min:y_max, x_min:x_max]
+# (only the rows of the subframe are read from the disk)
+subframe = read_subframe (file_fits, x_min, x_max, y_min, y_max)
 
 # printing status
 print (f'# finished extracting image around the target object!')
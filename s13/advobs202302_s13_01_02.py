@@ -0,0 +1,204 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 19:48:20 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# importing advobs202302_batchfit module
+from advobs202302_batchfit import fit_psf_batch, psf_results
+
+# constructing parser object
+desc   = 'PSF fitting for many point-source objects at once'
+parser = argparse.ArgumentParser (description=desc)
+
+# PSF models (Gaussian and Moffat)
+choices_psf = ['2dg', '2dm']
+
+# adding command-line arguments
+parser.add_argument ('-p', '--psf', choices=choices_psf, default='2dg', \
+                     help='PSF model [2dg=Gaussian, 2dm=Moffat] (default: 2dg)')
+parser.add_argument ('-w', '--width', type=int, default=10, \
+                     help='half-width of fitting box (default: 10)')
+parser.add_argument ('-n', '--maxiters', type=int, default=100, \
+                     help='maximum number of iterations (default: 100)')
+parser.add_argument ('-k', '--chunk', type=int, default=1000, \
+                     help='number of stars fitted at once (default: 1000)')
+parser.add_argument ('-l', '--list', default='', \
+                     help='star list file (name, x, y)')
+parser.add_argument ('-o', '--output', default='', \
+                     help='output file name (default: standard output)')
+parser.add_argument ('file', default='', help='input file name')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+psf_model   = args.psf
+half_width  = args.width
+maxiters    = args.maxiters
+nstar_chunk = args.chunk
+file_list   = args.list
+file_output = args.output
+file_fits   = args.file
+
+# making pathlib objects
+path_fits = pathlib.Path (file_fits)
+
+# checking input FITS file name
+if not (path_fits.suffix == '.fits'):
+    # printing message
+    print (f'Input file must be a FITS file.')
+    # exit
+    sys.exit ()
+# if input file does not exist, then stop the script
+if not (path_fits.exists ()):
+    # printing message
+    print (f'Input file does not exist.')
+    # exit
+    sys.exit ()
+# checking star list file
+if (file_list == ''):
+    # printing message
+    print (f'You need to specify star list file by using -l option.')
+    # exit
+    sys.exit ()
+if not (pathlib.Path (file_list).exists ()):
+    # printing message
+    print (f'Star list file "{file_list}" does not exist.')
+    # exit
+    sys.exit ()
+# checking half-width of fitting box
+if (half_width < 1):
+    # printing message
+    print (f'Half-width of the box must be 1 or larger.')
+    # exit
+    sys.exit ()
+# checking number of stars fitted at once
+if (nstar_chunk < 1):
+    # printing message
+    print (f'Number of stars fitted at once must be 1 or larger.')
+    # exit
+    sys.exit ()
+
+# reading star list
+list_names = []
+list_x     = []
+list_y     = []
+with open (file_list, 'r') as fh:
+    # reading file line-by-line
+    for line in fh:
+        # if the line starts with '#', then skip
+        if (line[0] == '#'):
+            continue
+        # splitting line
+        data = line.split ()
+        # skipping empty line
+        if (len (data) < 3):
+            continue
+        # name and coordinates
+        list_names.append (data[0])
+        list_x.append (float (data[1]) )
+        list_y.append (float (data[2]) )
+
+# opening FITS file
+with astropy.io.fits.open (file_fits) as hdu_list:
+    # reading FITS image data
+    data = find_image_hdu (hdu_list).data.astype (numpy.float64)
+
+# integer pixel coordinates of centres of fitting boxes
+x_init = numpy.rint (numpy.array (list_x) ).astype (numpy.int64)
+y_init = numpy.rint (numpy.array (list_y) ).astype (numpy.int64)
+
+# stars whose fitting boxes are within the image
+inside = (x_init - half_width >= 0) \
+    & (x_init + half_width < data.shape[1]) \
+    & (y_init - half_width >= 0) \
+    & (y_init + half_width < data.shape[0])
+for i in numpy.nonzero (~inside)[0]:
+    print (f'### star "{list_names[i]}" is too close to the edge, skipping...', \
+           file=sys.stderr)
+index_inside = numpy.nonzero (inside)[0]
+
+# offsets of pixels in a fitting box
+offset = numpy.arange (-half_width, half_width + 1)
+
+# fitted parameters
+list_p = []
+
+# fitting stars chunk by chunk to limit the size of temporary arrays
+for i0 in range (0, index_inside.size, nstar_chunk):
+    # indices of stars
+    index = index_inside[i0:i0+nstar_chunk]
+    # extracting cutouts using fancy indexing
+    iy = y_init[index, numpy.newaxis, numpy.newaxis] \
+        + offset[numpy.newaxis, :, numpy.newaxis]
+    ix = x_init[index, numpy.newaxis, numpy.newaxis] \
+        + offset[numpy.newaxis, numpy.newaxis, :]
+    cutouts = data[iy, ix]
+    # background subtraction
+    # (background is the median of pixels on the border of each cutout,
+    #  since the median of the whole cutout is raised by the star itself,
+    #  which makes fitted FWHM small)
+    border = numpy.concatenate ( (cutouts[:, 0, :], cutouts[:, -1, :], \
+                                  cutouts[:, 1:-1, 0], cutouts[:, 1:-1, -1]), \
+                                 axis=1)
+    cutouts -= numpy.median (border, axis=1)[:, numpy.newaxis, numpy.newaxis]
+    # PSF fitting
+    list_p.append (fit_psf_batch (cutouts, psf_model=psf_model, \
+                                  maxiter=maxiters) )
+
+# results of fitting
+if (len (list_p) > 0):
+    p = numpy.concatenate (list_p)
+else:
+    p = numpy.empty ( (0, 6 if psf_model == '2dg' else 5) )
+results = psf_results (p, psf_model)
+
+# opening output file
+if (file_output == ''):
+    fh_out = sys.stdout
+else:
+    fh_out = open (file_output, 'w')
+
+# writing results
+fh_out.write (f'#\n')
+fh_out.write (f'# result of PSF fitting ({psf_model})\n')
+fh_out.write (f'#\n')
+fh_out.write (f'# NAME, X_0, Y_0, FWHM, THETA, AMPLITUDE\n')
+fh_out.write (f'#\n')
+for j in range (index_inside.size):
+    # index of star
+    i = index_inside[j]
+    # centre of star in the image
+    x_0 = results['x_0'][j] + x_init[i] - half_width
+    y_0 = results['y_0'][j] + y_init[i] - half_width
+    # writing a line
+    fh_out.write (f'{list_names[i]} {x_0:.4f} {y_0:.4f}' \
+                  + f' {results["fwhm"][j]:.4f} {results["theta"][j]:.4f}' \
+                  + f' {results["amplitude"][j]:.3f}\n')
+
+# closing output file
+if not (file_output == ''):
+    fh_out.close ()
@@ -0,0 +1,173 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 20:03:11 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing pathlib module
+import pathlib
+
+# importing sys module
+import sys
+
+# importing time module
+import time
+
+# importing warnings module
+import warnings
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.modeling
+import astropy.utils.exceptions
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_batchfit module
+from advobs202302_batchfit import calc_psf, guess_psf, fit_psf_batch, \
+    psf_results
+
+# constructing parser object
+desc   = 'Benchmark of PSF fitting: per-star LevMarLSQFitter vs batched fitter'
+parser = argparse.ArgumentParser (description=desc)
+
+# PSF models (Gaussian and Moffat)
+choices_psf = ['2dg', '2dm']
+
+# adding command-line arguments
+parser.add_argument ('-p', '--psf', choices=choices_psf, default='2dg', \
+                     help='PSF model [2dg=Gaussian, 2dm=Moffat] (default: 2dg)')
+parser.add_argument ('-w', '--width', type=int, default=5, \
+                     help='half-width of fitting box (default: 5)')
+parser.add_argument ('-n', '--nstars', default='10,1000,10000', \
+                     help='list of numbers of stars (default: 10,1000,10000)')
+parser.add_argument ('-k', '--chunk', type=int, default=1000, \
+                     help='number of stars fitted at once (default: 1000)')
+parser.add_argument ('-m', '--max-levmar', type=int, default=10000, \
+                     help='maximum number of stars for LevMarLSQFitter;' \
+                     + ' time is extrapolated beyond it (default: 10000)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+psf_model    = args.psf
+half_width   = args.width
+list_nstars  = [int (n) for n in args.nstars.split (',')]
+nstar_chunk  = args.chunk
+nstar_levmar = args.max_levmar
+
+#
+# function to make synthetic cutouts of stars
+#
+def make_cutouts (nstars, rng):
+    # pixel coordinates
+    size   = 2 * half_width + 1
+    (y, x) = numpy.indices ( (size, size) )
+    # true parameters
+    amp = rng.uniform (200.0, 5000.0, nstars)
+    x_0 = half_width + rng.uniform (-1.0, 1.0, nstars)
+    y_0 = half_width + rng.uniform (-1.0, 1.0, nstars)
+    if (psf_model == '2dg'):
+        p_true = numpy.stack ( (amp, x_0, y_0, \
+                                rng.uniform (1.0, 2.0, nstars), \
+                                rng.uniform (1.0, 2.0, nstars), \
+                                rng.uniform (0.0, numpy.pi, nstars) ), axis=1)
+    elif (psf_model == '2dm'):
+        p_true = numpy.stack ( (amp, x_0, y_0, \
+                                rng.uniform (2.0, 3.0, nstars), \
+                                rng.uniform (2.0, 4.0, nstars) ), axis=1)
+    # model images with noise
+    (f, jac) = calc_psf (p_true, x.ravel ().astype (numpy.float64), \
+                         y.ravel ().astype (numpy.float64), psf_model)
+    cutouts  = f.reshape (nstars, size, size) \
+        + rng.normal (0.0, 5.0, (nstars, size, size) )
+    # returning cutouts
+    return (cutouts)
+
+#
+# function to fit stars one by one using LevMarLSQFitter
+#
+def fit_levmar (cutouts, p_init):
+    # pixel coordinates
+    (y, x) = numpy.indices (cutouts.shape[1:])
+    # fitter
+    fit = astropy.modeling.fitting.LevMarLSQFitter ()
+    # fitted parameters
+    p = numpy.empty_like (p_init)
+    # fitting stars one by one
+    for i in range (cutouts.shape[0]):
+        if (psf_model == '2dg'):
+            psf_init = astropy.modeling.models.Gaussian2D (*p_init[i])
+        elif (psf_model == '2dm'):
+            psf_init = astropy.modeling.models.Moffat2D (*p_init[i])
+        psf_fitted = fit (psf_init, x, y, cutouts[i], maxiter=100)
+        p[i] = psf_fitted.parameters
+    # returning fitted parameters
+    return (p)
+
+# ignoring warnings from LevMarLSQFitter for poorly converged fits
+warnings.simplefilter ('ignore', \
+                       category=astropy.utils.exceptions.AstropyUserWarning)
+
+# random number generator
+rng = numpy.random.default_rng (0)
+
+# printing header
+print (f'#')
+print (f'# PSF model = {psf_model}, fitting box = {2 * half_width + 1} x', \
+       f'{2 * half_width + 1} pixels')
+print (f'# both fitters start from the same initial guess')
+print (f'# time of LevMarLSQFitter marked with "*" is extrapolated')
+print (f'#')
+print (f'# {"N":>6s} {"LevMar [s]":>11s} {"batched [s]":>11s}', \
+       f'{"speed-up":>9s} {"max|dx_0|":>10s} {"max|dfwhm|":>10s}')
+
+# measurements
+for nstars in list_nstars:
+    # synthetic cutouts
+    cutouts = make_cutouts (nstars, rng)
+
+    # initial guess
+    (y, x) = numpy.indices (cutouts.shape[1:])
+    p_init = guess_psf (cutouts.reshape (nstars, -1), \
+                        x.ravel ().astype (numpy.float64), \
+                        y.ravel ().astype (numpy.float64), psf_model)
+
+    # batched fitter
+    t0 = time.perf_counter ()
+    list_p = []
+    for i0 in range (0, nstars, nstar_chunk):
+        list_p.append (fit_psf_batch (cutouts[i0:i0+nstar_chunk], \
+                                      psf_model=psf_model, \
+                                      p_init=p_init[i0:i0+nstar_chunk]) )
+    p_batch = numpy.concatenate (list_p)
+    t1 = time.perf_counter ()
+    time_batch = t1 - t0
+
+    # LevMarLSQFitter
+    n_levmar = min (nstars, nstar_levmar)
+    t0 = time.perf_counter ()
+    p_levmar = fit_levmar (cutouts[:n_levmar], p_init[:n_levmar])
+    t1 = time.perf_counter ()
+    time_levmar = (t1 - t0) * nstars / n_levmar
+    mark        = '*' if (n_levmar < nstars) else ' '
+
+    # differences of results
+    results_batch  = psf_results (p_batch[:n_levmar], psf_model)
+    results_levmar = psf_results (p_levmar, psf_model)
+    diff_x    = numpy.nanmax (numpy.abs (results_batch['x_0'] \
+                                         - results_levmar['x_0']) )
+    diff_fwhm = numpy.nanmax (numpy.abs (results_batch['fwhm'] \
+                                         - results_levmar['fwhm']) )
+
+    # printing results
+    print (f'  {nstars:6d} {time_levmar:10.3f}{mark} {time_batch:11.3f}', \
+           f'{time_levmar / time_batch:9.1f} {diff_x:10.2e} {diff_fwhm:10.2e}')
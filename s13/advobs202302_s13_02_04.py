@@ -24,6 +24,13 @@ import astropy.modeling
 import photutils.centroids
 import photutils.aperture
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
 # constructing parser object
 desc   = 'calculating net flux of star'
 parser = argparse.ArgumentParser (description=desc)
@@ -63,24 +70,29 @@ aperture_radius_pixel  = aperture_radius_fwhm * fwhm_pixel
 skyannulus_inner_pixel = skyannulus_inner_fwhm * fwhm_pixel
 skyannulus_outer_pixel = skyannulus_outer_fwhm * fwhm_pixel
 
+# function to read a sub-frame of FITS image
+# (only the rows of the sub-frame are read from the memory-mapped file by
+#  "section" of HDU, and only the tiles overlapping with the sub-frame are
+#  decompressed for a tile-compressed image)
+def read_subframe (file_fits, x_min, x_max, y_min, y_max):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only the sub-frame
+        subframe = hdu.section[y_min:y_max, x_min:x_max]
+    # returning sub-frame
+    return (subframe)
+
 # function to read FITS header
 def read_fits_header (file_fits):
     # opening FITS file
-    with astropy.io.fits.open (file_fits) as hdu_list:
-        # header of primary HDU
-        header = hdu_list[0].header
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # header of HDU of image data
+        header = find_image_hdu (hdu_list).header
     # returning header
     return (header)
 
-# function to read FITS pixel data
-def read_fits_data (file_fits):
-    # opening FITS file
-    with astropy.io.fits.open (file_fits) as hdu_list:
-        # data of primary HDU
-        data = hdu_list[0].data
-    # returning pixel data
-    return (data)
-
 # making pathlib objects
 path_fits   = pathlib.Path (file_fits)
 
@@ -121,9 +133,6 @@ if not ( (y_centre > 0) and (y_centre < image_size_y) ):
     print (f'Input y_centre value exceed image size.')
     sys.exit ()
 
-# reading FITS image data
-data = read_fits_data (file_fits)
-
 # printing status
 print (f'# finished reading FITS file "{file_fits}"!')
 
@@ -135,7 +144,7 @@ x_min = int (x_centre) - half_width
 x_max = int (x_centre) + half_width + 1
 y_min = int (y_centre) - half_width
 y_max = int (y_centre) + half_width + 1
-subframe = data[y_min:y_max, x_min:x_max]
+subframe = read_subframe (file_fits, x_min, x_max, y_min, y_max)
 
 # calculating statistical values
 subframe_median = numpy.median (subframe)
@@ -28,6 +28,13 @@ import matplotlib.figure
 import matplotlib.backends.backend_agg
 import matplotlib.patches
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
 # constructing parser object
 desc   = 'Centroid measurement and PSF fitting for a point-source object'
 parser = argparse.ArgumentParser (description=desc)
@@ -130,24 +137,35 @@ print (f'#')
 # printing status
 print (f'# now, reading FITS file...')
 
+# function to read a sub-frame of FITS image
+# (only the rows of the sub-frame are read from the memory-mapped file by
+#  "section" of HDU, and only the tiles overlapping with the sub-frame are
+#  decompressed for a tile-compressed image)
+def read_subframe (file_fits, x_min, x_max, y_min, y_max):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only the sub-frame
+        subframe = hdu.section[y_min:y_max, x_min:x_max]
+    # returning sub-frame
+    return (subframe)
+
 # a function to open a FITS file
 def open_fits_file (file_fits):
     # opening FITS file
-    with astropy.io.fits.open (file_fits) as hdu_list:
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
         # reading FITS header
-        header = hdu_list[0].header
+        header = find_image_hdu (hdu_list).header
 
         # reading WCS information from header
         wcs = astropy.wcs.WCS (header)
 
-        # reading FITS image data
-        data = hdu_list[0].data
-
-    # returning header, wcs, and image data
-    return (header, wcs, data)
+    # returning header and wcs
+    return (header, wcs)
 
 # opening FITS file
-header, wcs, data = open_fits_file (file_fits)
+header, wcs = open_fits_file (file_fits)
  
 # image size
 image_size_x = header['NAXIS1']
@@ -174,7 +192,8 @@ y_min = y_init - half_width
 y_max = y_init + half_width + 1
 
 # extraction of subframe for calculation
-subframe = data[y_min:y_max, x_min:x_max]
+# (only the rows of the subframe are read from the disk)
+subframe = read_subframe (file_fits, x_min, x_max, y_min, y_max)
 
 # printing status
 print (f'# finished extracting image around the target object!')
@@ -0,0 +1,257 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 19:05:48 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.wcs
+import astropy.coordinates
+import astropy.stats
+
+# importing photutils module
+import photutils.aperture
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# constructing parser object
+desc   = 'calculating net fluxes of many stars in FITS files at once'
+parser = argparse.ArgumentParser (description=desc)
+
+# types of coordinates in star list
+choices_coord = ['pixel', 'radec']
+
+# adding command-line arguments
+parser.add_argument ('-f', '--fwhm', type=float, default=4.0, \
+                     help='FWHM of stellar PSF in pixel (default: 4.0)')
+parser.add_argument ('-a', '--aperture', type=float, default=1.5, \
+                     help='aperture radius in FWHM (default: 1.5)')
+parser.add_argument ('-s1', '--skyannulus1', type=float, default=3.0, \
+                     help='inner sky annulus radius in FWHM (default: 3.0)')
+parser.add_argument ('-s2', '--skyannulus2', type=float, default=5.0, \
+                     help='outer sky annulus radius in FWHM (default: 5.0)')
+parser.add_argument ('-t', '--threshold', type=float, default=4.0, \
+                     help='threshold for sigma-clipping in sigma (default: 4)')
+parser.add_argument ('-n', '--maxiters', type=int, default=10, \
+                     help='maximum number of iterations (default: 10)')
+parser.add_argument ('-c', '--coord', choices=choices_coord, \
+                     default='pixel', \
+                     help='type of coordinates in star list (default: pixel)')
+parser.add_argument ('-l', '--list', default='', \
+                     help='star list file (name, x, y) or (name, RA, Dec)' \
+                     + ' where RA and Dec are in degree')
+parser.add_argument ('-e', '--keyword-exptime', default='EXPTIME', \
+                     help='FITS keyword for exposure time (default: EXPTIME)')
+parser.add_argument ('-o', '--output', default='', \
+                     help='output file name (default: standard output)')
+parser.add_argument ('files', nargs='+', help='input FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+fwhm_pixel            = args.fwhm
+aperture_radius_fwhm  = args.aperture
+skyannulus_inner_fwhm = args.skyannulus1
+skyannulus_outer_fwhm = args.skyannulus2
+threshold             = args.threshold
+maxiters              = args.maxiters
+coord_type            = args.coord
+file_list             = args.list
+keyword_exptime       = args.keyword_exptime
+file_output           = args.output
+list_fits             = args.files
+
+# aperture radius and sky annulus in pixel
+aperture_radius_pixel  = aperture_radius_fwhm * fwhm_pixel
+skyannulus_inner_pixel = skyannulus_inner_fwhm * fwhm_pixel
+skyannulus_outer_pixel = skyannulus_outer_fwhm * fwhm_pixel
+
+# checking star list file
+if (file_list == ''):
+    # printing message
+    print (f'You need to specify star list file by using -l option.')
+    # exit
+    sys.exit ()
+if not (pathlib.Path (file_list).exists ()):
+    # printing message
+    print (f'Star list file "{file_list}" does not exist.')
+    # exit
+    sys.exit ()
+
+# reading star list
+list_names = []
+list_coord = []
+with open (file_list, 'r') as fh:
+    # reading file line-by-line
+    for line in fh:
+        # if the line starts with '#', then skip
+        if (line[0] == '#'):
+            continue
+        # splitting line
+        data = line.split ()
+        # skipping empty line
+        if (len (data) < 3):
+            continue
+        # name and coordinates
+        list_names.append (data[0])
+        list_coord.append ( (float (data[1]), float (data[2])) )
+array_coord = numpy.array (list_coord)
+
+# checking number of stars
+if (len (list_names) == 0):
+    # printing message
+    print (f'No star is found in star list file "{file_list}".')
+    # exit
+    sys.exit ()
+
+# sky coordinates of all the stars
+if (coord_type == 'radec'):
+    coord_sky = astropy.coordinates.SkyCoord (array_coord[:, 0], \
+                                              array_coord[:, 1], unit='deg')
+
+# sigma clipping for sky background estimate
+sigma_clip = astropy.stats.SigmaClip (sigma=threshold, maxiters=maxiters)
+
+#
+# function to carry out aperture photometry of all the stars on a frame
+#
+#   All the stars are measured by a single multi-position aperture and a
+#   single multi-position annulus, so that computing time grows linearly
+#   with the number of stars without Python loops. For RA and Dec, all the
+#   coordinates are converted into pixel coordinates by one call of
+#   world_to_pixel.
+#
+def measure_stars (header, data):
+    # pixel coordinates of stars
+    if (coord_type == 'radec'):
+        wcs        = astropy.wcs.WCS (header)
+        (x, y)     = wcs.world_to_pixel (coord_sky)
+        positions  = numpy.transpose ( (x, y) )
+    else:
+        positions  = array_coord
+
+    # making apertures and sky annuli for all the stars
+    apphot_aperture \
+        = photutils.aperture.CircularAperture (positions, \
+                                               r=aperture_radius_pixel)
+    apphot_annulus \
+        = photutils.aperture.CircularAnnulus (positions, \
+                                              r_in=skyannulus_inner_pixel, \
+                                              r_out=skyannulus_outer_pixel)
+
+    # adding all the signal values within apertures
+    apphot_star = photutils.aperture.aperture_photometry (data, \
+                                                          apphot_aperture)
+    raw_flux    = numpy.array (apphot_star['aperture_sum'])
+
+    # sky background estimate
+    apphot_sky_stats \
+        = photutils.aperture.ApertureStats (data, apphot_annulus, \
+                                            sigma_clip=sigma_clip)
+    skybg_per_pixel     = numpy.array (apphot_sky_stats.mean)
+    skybg_err_per_pixel = numpy.array (apphot_sky_stats.std)
+
+    # net flux = (total flux within aperture)
+    #             - (skybg per pixel) * (number of pixels in aperture)
+    npix         = apphot_aperture.area
+    net_flux     = raw_flux - skybg_per_pixel * npix
+    net_flux_err = numpy.sqrt (raw_flux + npix * skybg_err_per_pixel**2)
+
+    # returning results
+    return (positions, raw_flux, skybg_per_pixel, skybg_err_per_pixel, \
+            net_flux, net_flux_err)
+
+# opening output file
+if (file_output == ''):
+    fh_out = sys.stdout
+else:
+    fh_out = open (file_output, 'w')
+
+# writing header of output
+fh_out.write (f'#\n')
+fh_out.write (f'# result of aperture photometry\n')
+fh_out.write (f'#\n')
+fh_out.write (f'#   aperture radius   = {aperture_radius_pixel} pixel\n')
+fh_out.write (f'#   inner sky annulus = {skyannulus_inner_pixel} pixel\n')
+fh_out.write (f'#   outer sky annulus = {skyannulus_outer_pixel} pixel\n')
+fh_out.write (f'#\n')
+fh_out.write (f'# FILE, NAME, X, Y, FLUX, SKY_PER_PIX, SKY_ERR_PER_PIX,\n')
+fh_out.write (f'# NET_FLUX, NET_FLUX_ERR, INSTMAG, INSTMAG_ERR\n')
+fh_out.write (f'#\n')
+
+# processing FITS files
+for file_fits in list_fits:
+    # making pathlib objects
+    path_fits = pathlib.Path (file_fits)
+
+    # if input file is not a FITS file, then skip
+    if not (path_fits.suffix == '.fits'):
+        # printing message
+        print (f'### "{file_fits}" is not a FITS file, skipping...', \
+               file=sys.stderr)
+        # skip
+        continue
+    # if input file does not exist, then skip
+    if not (path_fits.exists ()):
+        # printing message
+        print (f'### "{file_fits}" does not exist, skipping...', \
+               file=sys.stderr)
+        # skip
+        continue
+
+    # opening FITS file
+    with astropy.io.fits.open (file_fits) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading FITS header
+        header = hdu.header
+        # reading FITS image data
+        data = hdu.data
+
+    # exposure time
+    if (keyword_exptime in header):
+        exptime = header[keyword_exptime]
+    else:
+        exptime = 1.0
+
+    # aperture photometry of all the stars
+    (positions, raw_flux, skybg_per_pixel, skybg_err_per_pixel, \
+     net_flux, net_flux_err) = measure_stars (header, data)
+
+    # instrumental magnitudes
+    # (NaN for stars of negative net flux)
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        instmag     = -2.5 * numpy.log10 (net_flux / exptime)
+        instmag_err = 2.5 / numpy.log (10) * net_flux_err / net_flux
+
+    # writing results
+    for i in range (len (list_names)):
+        fh_out.write (f'{file_fits} {list_names[i]}' \
+                      + f' {positions[i][0]:.3f} {positions[i][1]:.3f}' \
+                      + f' {raw_flux[i]:.3f} {skybg_per_pixel[i]:.3f}' \
+                      + f' {skybg_err_per_pixel[i]:.3f}' \
+                      + f' {net_flux[i]:.3f} {net_flux_err[i]:.3f}' \
+                      + f' {instmag[i]:.4f} {instmag_err[i]:.4f}\n')
+
+# closing output file
+if not (file_output == ''):
+    fh_out.close ()
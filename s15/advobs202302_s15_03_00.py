@@ -32,6 +32,13 @@ import matplotlib.figure
 import matplotlib.backends.backend_agg
 import matplotlib.patches
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
 # constructing parser object
 desc   = 'aperture photometry of a star at given RA and Dec'
 parser = argparse.ArgumentParser (description=desc)
@@ -171,14 +178,30 @@ if not ( (path_graphic.suffix == '.eps') or (path_graphic.suffix == '.pdf') \
 # date/time
 now = datetime.datetime.now ().isoformat ()
     
+# function to read a sub-frame of FITS image
+# (only the rows of the sub-frame are read from the memory-mapped file by
+#  "section" of HDU, and only the tiles overlapping with the sub-frame are
+#  decompressed for a tile-compressed image)
+def read_subframe (file_fits, x_min, x_max, y_min, y_max):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only the sub-frame
+        subframe = hdu.section[y_min:y_max, x_min:x_max]
+    # returning sub-frame
+    return (subframe)
+
 # opening FITS file
-with astropy.io.fits.open (file_fits) as hdu_list:
+with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
     # reading header information
-    header = hdu_list[0].header
+    header = find_image_hdu (hdu_list).header
     # WCS information
     wcs = astropy.wcs.WCS (header)
-    # reading image data
-    data   = hdu_list[0].data
+
+# image size
+image_size_x = header['NAXIS1']
+image_size_y = header['NAXIS2']
 
 # extraction of information from FITS header
 exptime      = header[keyword_exptime]
@@ -202,8 +225,10 @@ subframe_xmax = int (init_x + halfwidth + 1)
 subframe_ymin = int (init_y - halfwidth)
 subframe_ymax = int (init_y + halfwidth + 1)
 
-# extracting sub-frame for centroid measurement
-subframe = data[subframe_ymin:subframe_ymax, subframe_xmin:subframe_xmax]
+# reading sub-frame for centroid measurement
+# (whole image is not read from the disk)
+subframe = read_subframe (file_fits, subframe_xmin, subframe_xmax, \
+                          subframe_ymin, subframe_ymax)
 
 # sky subtraction
 subframe_skysub = subframe - numpy.median (subframe)
@@ -249,14 +274,28 @@ if (psf_model == '2dm'):
     gamma        = psf_fitted.gamma.value
     fwhm         = psf_fitted.fwhm
 
-# position of centre of star in pixel coordinate
-position_pix = (x_centre_psf, y_centre_psf)
-
 # aperture radius in pixel
 aperture_radius_pix  = fwhm * aperture_radius_fwhm
 skyannulus_inner_pix = fwhm * skyannulus_inner_fwhm
 skyannulus_outer_pix = fwhm * skyannulus_outer_fwhm
 
+# region of sub-frame for photometry
+# (covering sky annulus and the region of plot)
+size_phot = int (skyannulus_outer_pix * 1.2) + 2
+phot_xmin = max (int (x_centre_psf) - size_phot, 0)
+phot_xmax = min (int (x_centre_psf) + size_phot + 1, image_size_x)
+phot_ymin = max (int (y_centre_psf) - size_phot, 0)
+phot_ymax = min (int (y_centre_psf) + size_phot + 1, image_size_y)
+
+# reading sub-frame for photometry
+data = read_subframe (file_fits, phot_xmin, phot_xmax, phot_ymin, phot_ymax)
+
+# WCS of sub-frame for photometry
+wcs_phot = wcs[phot_ymin:phot_ymax, phot_xmin:phot_xmax]
+
+# position of centre of star in pixel coordinate of the sub-frame
+position_pix = (x_centre_psf - phot_xmin, y_centre_psf - phot_ymin)
+
 # making aperture
 apphot_aperture \
     = photutils.aperture.CircularAperture (position_pix, r=aperture_radius_pix)
@@ -340,15 +379,15 @@ with open (file_output, 'w') as fh:
 # making objects "fig" and "ax"
 fig    = matplotlib.figure.Figure ()
 canvas = matplotlib.backends.backend_agg.FigureCanvasAgg (fig)
-ax     = fig.add_subplot (111, projection=wcs)
+ax     = fig.add_subplot (111, projection=wcs_phot)
 
 # axes
 ax.set_xlabel ('RA')
 ax.set_ylabel ('Dec')
-ax.set_xlim (int (x_centre_psf - skyannulus_outer_pix * 1.2),
-             int (x_centre_psf + skyannulus_outer_pix * 1.2) )
-ax.set_ylim (int (y_centre_psf - skyannulus_outer_pix * 1.2),
-             int (y_centre_psf + skyannulus_outer_pix * 1.2) )
+ax.set_xlim (int (position_pix[0] - skyannulus_outer_pix * 1.2),
+             int (position_pix[0] + skyannulus_outer_pix * 1.2) )
+ax.set_ylim (int (position_pix[1] - skyannulus_outer_pix * 1.2),
+             int (position_pix[1] + skyannulus_outer_pix * 1.2) )
 
 # plotting image
 norm \
@@ -358,13 +397,13 @@ im = ax.imshow (data, origin='lower', cmap=cmap, norm=norm)
 fig.colorbar (im)
 
 # making a circle to indicate the location of standard star
-aperture = matplotlib.patches.Circle (xy=(x_centre_psf, y_centre_psf), \
+aperture = matplotlib.patches.Circle (xy=position_pix, \
                                       radius=aperture_radius_pix, \
                                       fill=False, color="red", linewidth=2)
-annulus1 = matplotlib.patches.Circle (xy=(x_centre_psf, y_centre_psf), \
+annulus1 = matplotlib.patches.Circle (xy=position_pix, \
                                       radius=skyannulus_inner_pix, \
                                       fill=False, color="cyan", linewidth=2)
-annulus2 = matplotlib.patches.Circle (xy=(x_centre_psf, y_centre_psf), \
+annulus2 = matplotlib.patches.Circle (xy=position_pix, \
                                       radius=skyannulus_outer_pix, \
                                       fill=False, color="cyan", linewidth=2)
 # plotting location of standard star
@@ -19,6 +19,13 @@ import subprocess
 # importing astropy module
 import astropy.io.fits
 
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
 # constructing parser object
 desc   = "carrying out aperture photometry for multiple FITS files"
 parser = argparse.ArgumentParser (description=desc)
@@ -58,7 +65,10 @@ target_dec_deg        = args.dec
 files_fits            = args.files
 
 # script file for aperture photmetry
-file_script = 'advobs202302_s15_03_00.py'
+# (the script in the same directory as this script is used, so that this
+#  script can be run in any data directory)
+file_script = pathlib.Path (__file__).resolve ().parent \
+    / 'advobs202302_s15_03_00.py'
 
 # checking "target_name", and "filter_name"
 if (target_name == ''):
@@ -98,7 +108,7 @@ for file_fits in files_fits:
     # opening a FITS file
     with astropy.io.fits.open (file_fits) as hdu_list:
         # reading header information
-        header = hdu_list[0].header
+        header = find_image_hdu (hdu_list).header
     # checking header information
     if not ( (header['IMAGETYP'] == 'LIGHT') \
              and (header['FILTER'] == filter_name) \
@@ -108,9 +118,9 @@ for file_fits in files_fits:
 
     # command to carry out photometry
     command_phot \
-        = ("./%s -i %s -r %f -d %f -a %f -s1 %f -s2 %f -o %s -g %s" \
-           % (file_script, file_fits, target_ra_deg, target_dec_deg, \
-              aperture_radius_fwhm, skyannulus_inner_fwhm, \
+        = ("%s %s -i %s -r %f -d %f -a %f -s1 %f -s2 %f -o %s -g %s" \
+           % (sys.executable, file_script, file_fits, target_ra_deg, \
+              target_dec_deg, aperture_radius_fwhm, skyannulus_inner_fwhm, \
               skyannulus_outer_fwhm, file_output, file_graphic) )
 
     # execute the command
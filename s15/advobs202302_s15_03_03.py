@@ -0,0 +1,530 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 16:31:05 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing pathlib module
+import pathlib
+
+# importing datetime module
+import datetime
+
+# importing time module
+import time
+
+# importing multiprocessing module
+import multiprocessing
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.wcs
+import astropy.coordinates
+import astropy.stats
+import astropy.modeling
+import astropy.visualization
+
+# importing photutils module
+import photutils.centroids
+import photutils.aperture
+
+# importing matplotlib module
+import matplotlib.figure
+import matplotlib.backends.backend_agg
+import matplotlib.patches
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import find_image_hdu
+
+# constructing parser object
+desc   = "carrying out aperture photometry for multiple FITS files in a batch"
+parser = argparse.ArgumentParser (description=desc)
+
+# centroid measurement technique
+choices_centroid = ['com', '1dg', '2dg']
+
+# PSF models (Gaussian and Moffat)
+choices_psf = ['2dg', '2dm']
+
+# adding argument
+parser.add_argument ('-f', '--filter', default='', help='filter name')
+parser.add_argument ('-n', '--name', default='', help='name of target object')
+parser.add_argument ('-e1', '--exptime-min', type=float, default=5.0, \
+                     help='minimum exposure time for use')
+parser.add_argument ('-e2', '--exptime-max', type=float, default=90.0, \
+                     help='maximum exposure time for use')
+parser.add_argument ('-c', '--centroid', choices=choices_centroid, \
+                     default='2dg', \
+                     help='centroid measurement algorithm (default: 2dg)')
+parser.add_argument ('-p', '--psf', choices=choices_psf, default='2dg', \
+                     help='PSF model [2dg=Gaussian, 2dm=Moffat] (default: 2dg)')
+parser.add_argument ('-a', '--aperture', type=float, default=2.0, \
+                     help='aperture radius in FWHM (default: 2.0)')
+parser.add_argument ('-w', '--halfwidth', type=int, default=20, \
+                     help='half-width for centroid measurement (default: 20)')
+parser.add_argument ('-s1', '--skyannulus1', type=float, default=4.0, \
+                     help='inner sky annulus radius in FWHM (default: 4)')
+parser.add_argument ('-s2', '--skyannulus2', type=float, default=7.0, \
+                     help='outer sky annulus radius in FWHM (default: 7)')
+parser.add_argument ('-t', '--threshold', type=float, default=4.0, \
+                     help='threshold for sigma-clipping in sigma (default: 4)')
+parser.add_argument ('-m', '--maxiters', type=int, default=100, \
+                     help='maximum number of iterations (default: 100)')
+parser.add_argument ('-r', '--ra', type=float, default=-999.999, \
+                     help='RA in degree')
+parser.add_argument ('-d', '--dec', type=float, default=-999.999, \
+                     help='Dec in degree')
+parser.add_argument ('-o', '--output', default='', \
+                     help='output data file name for all the frames')
+parser.add_argument ('-s', '--separate', action='store_true', default=False, \
+                     help='writing results into a file for each frame' \
+                     + ' (phot_*_NNNN.phot) instead of a file for all')
+parser.add_argument ('-g', '--graphic', action='store_true', default=False, \
+                     help='making diagnostic plots (phot_*.pdf) as well')
+parser.add_argument ('-l', '--resolution', type=int, default=450, \
+                     help='resolution of plots in DPI (default: 450)')
+parser.add_argument ('-j', '--jobs', type=int, default=1, \
+                     help='number of worker processes (default: 1)')
+parser.add_argument ('files', nargs='+', help='FITS files')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+target_name           = args.name
+filter_name           = args.filter
+exptime_min           = args.exptime_min
+exptime_max           = args.exptime_max
+centroid              = args.centroid
+psf_model             = args.psf
+aperture_radius_fwhm  = args.aperture
+halfwidth             = args.halfwidth
+skyannulus_inner_fwhm = args.skyannulus1
+skyannulus_outer_fwhm = args.skyannulus2
+threshold             = args.threshold
+maxiters              = args.maxiters
+target_ra_deg         = args.ra
+target_dec_deg        = args.dec
+file_output           = args.output
+separate              = args.separate
+make_graphic          = args.graphic
+resolution            = args.resolution
+njobs                 = args.jobs
+files_fits            = args.files
+
+# FITS keywords
+keyword_exptime = 'EXPTIME'
+keyword_filter  = 'FILTER'
+keyword_airmass = 'AIRMASS'
+
+# checking "target_name", and "filter_name"
+if (target_name == ''):
+    # printing message
+    print (f'You have to specify target object name by using -n option!')
+    # exit
+    sys.exit ()
+if (filter_name == ''):
+    # printing message
+    print (f'You have to specify filter name by using -f option!')
+    # exit
+    sys.exit ()
+
+# check of RA and Dec
+if ( (target_ra_deg < 0.0) or (target_ra_deg > 360.0) \
+     or (target_dec_deg < -90.0) or (target_dec_deg > 90.0) ):
+    # printing message
+    print (f'Something is wrong with RA or Dec!')
+    print (f'Check RA and Dec you specify.')
+    print (f'RA  = {target_ra_deg} deg')
+    print (f'Dec = {target_dec_deg} deg')
+    # exit
+    sys.exit ()
+
+# check of output file
+if (file_output == ''):
+    file_output = f'phot_{target_name}_{filter_name}.phot'
+if ( (not separate) and (pathlib.Path (file_output).exists ()) ):
+    # printing message
+    print (f'The file "{file_output}" exists!')
+    # exit
+    sys.exit ()
+
+# checking number of worker processes
+if (njobs < 1):
+    # printing message
+    print (f'ERROR: number of worker processes must be 1 or larger!')
+    # exit
+    sys.exit ()
+
+# using "fork" to start worker processes
+context = multiprocessing.get_context ('fork')
+
+# date/time
+now = datetime.datetime.now ().isoformat ()
+
+# sky coordinate of target object
+coord_sky = astropy.coordinates.SkyCoord (target_ra_deg, target_dec_deg, \
+                                          unit='deg')
+
+#
+# function to make a name of output file for a frame
+#
+#   Frame ID is taken from the file name (e.g. "lot_20230101_0012_df.fits"),
+#   and the file name is the same as that of advobs202302_s15_03_01.py.
+#
+def make_file_frame (file_fits, suffix):
+    # frame ID
+    frame_id = int (file_fits.split ('_')[-2])
+    # returning file name
+    return (f'phot_{target_name}_{filter_name}_{frame_id:04d}{suffix}')
+
+#
+# function to read a sub-frame of FITS image
+#
+#   The file is memory-mapped and only the region [y_min:y_max, x_min:x_max]
+#   is read by "section" of HDU, instead of the whole image. Only the rows
+#   of the sub-frame are read from the disk, and only the tiles overlapping
+#   with the sub-frame are decompressed for a tile-compressed image.
+#
+def read_subframe (file_fits, x_min, x_max, y_min, y_max):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # HDU of image data
+        hdu = find_image_hdu (hdu_list)
+        # reading only the sub-frame
+        subframe = hdu.section[y_min:y_max, x_min:x_max]
+    # returning sub-frame
+    return (subframe)
+
+#
+# function to carry out aperture photometry of target object on a FITS file
+#
+#   The algorithm is the same as that of advobs202302_s15_03_00.py, but
+#   the function is called in the same Python process for all the frames,
+#   so that modules are imported only once. Whole image is not read, and
+#   only a sub-frame for centroid measurement and a sub-frame covering sky
+#   annulus are read from the disk. A dictionary of results is returned.
+#
+def measure_frame (file_fits):
+    # opening FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # reading header information
+        header = find_image_hdu (hdu_list).header
+        # WCS information
+        wcs = astropy.wcs.WCS (header)
+
+    # image size
+    image_size_x = header['NAXIS1']
+    image_size_y = header['NAXIS2']
+
+    # extraction of information from FITS header
+    exptime = header[keyword_exptime]
+    airmass = header[keyword_airmass]
+
+    # conversion from sky coordinate into pixel coordinate
+    (init_x, init_y) = wcs.world_to_pixel (coord_sky)
+
+    # region of sub-frame for centroid measurement
+    subframe_xmin = int (init_x - halfwidth)
+    subframe_xmax = int (init_x + halfwidth + 1)
+    subframe_ymin = int (init_y - halfwidth)
+    subframe_ymax = int (init_y + halfwidth + 1)
+
+    # reading sub-frame for centroid measurement
+    subframe = read_subframe (file_fits, subframe_xmin, subframe_xmax, \
+                              subframe_ymin, subframe_ymax)
+
+    # sky subtraction
+    subframe_skysub = subframe - numpy.median (subframe)
+
+    # centroid measurement
+    if (centroid == 'com'):
+        (x_centre, y_centre) = photutils.centroids.centroid_com (subframe)
+    elif (centroid == '1dg'):
+        (x_centre, y_centre) = photutils.centroids.centroid_1dg (subframe)
+    elif (centroid == '2dg'):
+        (x_centre, y_centre) = photutils.centroids.centroid_2dg (subframe)
+
+    # PSF fitting
+    subframe_y, subframe_x = numpy.indices (subframe_skysub.shape)
+    if (psf_model == '2dg'):
+        psf_init = astropy.modeling.models.Gaussian2D (x_mean=x_centre, \
+                                                       y_mean=y_centre)
+    elif (psf_model == '2dm'):
+        psf_init = astropy.modeling.models.Moffat2D (x_0=x_centre, \
+                                                     y_0=y_centre, \
+                                                     amplitude=1.0, \
+                                                     alpha=1.0, gamma=1.0)
+    fit = astropy.modeling.fitting.LevMarLSQFitter ()
+    psf_fitted = fit (psf_init, subframe_x, subframe_y, subframe_skysub, \
+                      maxiter=maxiters)
+
+    # fitted PSF parameters
+    if (psf_model == '2dg'):
+        x_centre_psf = psf_fitted.x_mean.value + subframe_xmin
+        y_centre_psf = psf_fitted.y_mean.value + subframe_ymin
+        fwhm         = (psf_fitted.x_fwhm + psf_fitted.y_fwhm) / 2.0
+    elif (psf_model == '2dm'):
+        x_centre_psf = psf_fitted.x_0.value + subframe_xmin
+        y_centre_psf = psf_fitted.y_0.value + subframe_ymin
+        fwhm         = psf_fitted.fwhm
+
+    # aperture radius in pixel
+    aperture_radius_pix  = fwhm * aperture_radius_fwhm
+    skyannulus_inner_pix = fwhm * skyannulus_inner_fwhm
+    skyannulus_outer_pix = fwhm * skyannulus_outer_fwhm
+
+    # region of sub-frame for photometry
+    # (covering sky annulus and the region of diagnostic plot)
+    size_phot = int (skyannulus_outer_pix * 1.2) + 2
+    phot_xmin = max (int (x_centre_psf) - size_phot, 0)
+    phot_xmax = min (int (x_centre_psf) + size_phot + 1, image_size_x)
+    phot_ymin = max (int (y_centre_psf) - size_phot, 0)
+    phot_ymax = min (int (y_centre_psf) + size_phot + 1, image_size_y)
+
+    # reading sub-frame for photometry
+    data = read_subframe (file_fits, phot_xmin, phot_xmax, \
+                          phot_ymin, phot_ymax)
+
+    # position of centre of star in pixel coordinate of the sub-frame
+    position_pix = (x_centre_psf - phot_xmin, y_centre_psf - phot_ymin)
+
+    # making aperture
+    apphot_aperture \
+        = photutils.aperture.CircularAperture (position_pix, \
+                                               r=aperture_radius_pix)
+    apphot_annulus \
+        = photutils.aperture.CircularAnnulus (position_pix, \
+                                              r_in=skyannulus_inner_pix, \
+                                              r_out=skyannulus_outer_pix)
+
+    # sky background estimate
+    sigma_clip = astropy.stats.SigmaClip (sigma=threshold, maxiters=maxiters)
+    apphot_sky_stats \
+        = photutils.aperture.ApertureStats (data, apphot_annulus, \
+                                            sigma_clip=sigma_clip)
+    skybg_per_pix     = apphot_sky_stats.mean
+    skybg_err_per_pix = apphot_sky_stats.std
+
+    # aperture photometry
+    phot_star    = photutils.aperture.aperture_photometry (data, \
+                                                           apphot_aperture)
+    raw_flux     = float (phot_star['aperture_sum'][0])
+    npix         = apphot_aperture.area
+    net_flux     = raw_flux - skybg_per_pix * npix
+    net_flux_err = numpy.sqrt (raw_flux + npix * skybg_err_per_pix**2)
+
+    # instrumental magnitude
+    instmag     = -2.5 * numpy.log10 (net_flux / exptime)
+    instmag_err = 2.5 / numpy.log (10) * net_flux_err / net_flux
+
+    # making diagnostic plot
+    if (make_graphic):
+        wcs_phot = wcs[phot_ymin:phot_ymax, phot_xmin:phot_xmax]
+        plot_frame (file_fits, wcs_phot, data, \
+                    position_pix[0], position_pix[1], \
+                    aperture_radius_pix, skyannulus_inner_pix, \
+                    skyannulus_outer_pix)
+
+    # returning results
+    return ( {'file': file_fits, 'exptime': exptime, \
+              'filter': header[keyword_filter], \
+              'x': x_centre_psf, 'y': y_centre_psf, 'fwhm': fwhm, \
+              'net_flux': net_flux, 'net_flux_err': net_flux_err, \
+              'instmag': instmag, 'instmag_err': instmag_err, \
+              'airmass': airmass} )
+
+#
+# function to make a diagnostic plot of aperture and sky annulus
+#
+def plot_frame (file_fits, wcs, data, x_centre_psf, y_centre_psf, \
+                aperture_radius_pix, skyannulus_inner_pix, \
+                skyannulus_outer_pix):
+    # output graphic file name
+    file_graphic = make_file_frame (file_fits, '.pdf')
+
+    # making objects "fig" and "ax"
+    fig    = matplotlib.figure.Figure ()
+    canvas = matplotlib.backends.backend_agg.FigureCanvasAgg (fig)
+    ax     = fig.add_subplot (111, projection=wcs)
+
+    # axes
+    ax.set_xlabel ('RA')
+    ax.set_ylabel ('Dec')
+    ax.set_xlim (int (x_centre_psf - skyannulus_outer_pix * 1.2),
+                 int (x_centre_psf + skyannulus_outer_pix * 1.2) )
+    ax.set_ylim (int (y_centre_psf - skyannulus_outer_pix * 1.2),
+                 int (y_centre_psf + skyannulus_outer_pix * 1.2) )
+
+    # plotting image
+    norm \
+        = astropy.visualization.mpl_normalize.ImageNormalize \
+        ( stretch=astropy.visualization.HistEqStretch (data) )
+    im = ax.imshow (data, origin='lower', cmap='bone', norm=norm)
+    fig.colorbar (im)
+
+    # making circles to indicate aperture and sky annulus
+    for radius, colour in ( (aperture_radius_pix, 'red'), \
+                            (skyannulus_inner_pix, 'cyan'), \
+                            (skyannulus_outer_pix, 'cyan') ):
+        circle = matplotlib.patches.Circle (xy=(x_centre_psf, y_centre_psf), \
+                                            radius=radius, fill=False, \
+                                            color=colour, linewidth=2)
+        ax.add_patch (circle)
+
+    # invert Y-axis
+    ax.invert_yaxis ()
+
+    # saving file
+    fig.savefig (file_graphic, dpi=resolution)
+
+#
+# function to write results into a file
+#
+#   Data lines have the same format as those of advobs202302_s15_03_00.py,
+#   so that the file can be read by advobs202302_s15_03_02.py.
+#
+def write_results (file_output, list_results):
+    # opening file for writing
+    with open (file_output, 'w') as fh:
+        fh.write ("#\n")
+        fh.write ("# Result of Aperture Photometry\n")
+        fh.write ("#\n")
+        fh.write ("#  Date/Time of Analysis\n")
+        fh.write ("#   Date/Time = %s\n" % now)
+        fh.write ("#\n")
+        fh.write ("#  Input Parameters\n")
+        fh.write ("#   target name                  = %s\n" % target_name)
+        fh.write ("#   filter name                  = %s\n" % filter_name)
+        fh.write ("#   RA                           = %f deg\n" \
+                  % target_ra_deg)
+        fh.write ("#   Dec                          = %f deg\n" \
+                  % target_dec_deg)
+        fh.write ("#   aperture radius              = %f in FWHM\n" \
+                  % aperture_radius_fwhm)
+        fh.write ("#   inner sky annulus            = %f in FWHM\n" \
+                  % skyannulus_inner_fwhm)
+        fh.write ("#   outer sky annulus            = %f in FWHM\n" \
+                  % skyannulus_outer_fwhm)
+        fh.write ("#   half-width for centroid      = %f pixel\n" \
+                  % halfwidth)
+        fh.write ("#   threshold for sigma-clipping = %f in sigma\n" \
+                  % threshold)
+        fh.write ("#   number of max iterations     = %d\n" % maxiters)
+        fh.write ("#\n")
+        fh.write ("#  Results\n")
+        fh.write ("#   file, exptime, filter, centre_x, centre_y,\n" \
+                  + "#   net_flux, net_flux_err, instmag, instmag_err," \
+                  + " airmass\n")
+        for results in list_results:
+            fh.write ("%s %f %s %f %f %f %f %f %f %f\n" \
+                      % (results['file'], results['exptime'], \
+                         results['filter'], results['x'], results['y'], \
+                         results['net_flux'], results['net_flux_err'], \
+                         results['instmag'], results['instmag_err'], \
+                         results['airmass']) )
+
+#
+# function called for each frame
+#
+#   An error in a frame does not stop processing of other frames. A pair
+#   of results (or None) and a message is returned.
+#
+def process_frame (file_fits):
+    # time at start
+    t0 = time.perf_counter ()
+    # aperture photometry
+    # (for "-s" option, results are written into a file for the frame, and
+    #  the frame is skipped if the file exists)
+    try:
+        if (separate):
+            file_frame = make_file_frame (file_fits, '.phot')
+            if (pathlib.Path (file_frame).exists ()):
+                return (None, f'### the file "{file_frame}" exists!')
+        results = measure_frame (file_fits)
+        if (separate):
+            write_results (file_frame, [results])
+    except Exception as error:
+        return (None, f'### photometry failed for "{file_fits}": {error}')
+    # time at end
+    t1 = time.perf_counter ()
+    # returning results
+    return (results, f'# {file_fits}: instmag = {results["instmag"]:8.4f}' \
+            + f' +/- {results["instmag_err"]:6.4f} ({t1 - t0:6.3f} sec)')
+
+# selecting FITS files
+list_target = []
+for file_fits in files_fits:
+    # making pathlib object
+    path_fits = pathlib.Path (file_fits)
+
+    # if the file is not a FITS file, then skip
+    if not (path_fits.suffix == '.fits'):
+        # skip
+        continue
+    # if the file is not a reduced data, then skip
+    if not (path_fits.stem[-3:] == '_df'):
+        # skip
+        continue
+
+    # opening a FITS file
+    with astropy.io.fits.open (file_fits, memmap=True) as hdu_list:
+        # reading header information
+        header = find_image_hdu (hdu_list).header
+    # checking header information
+    if not ( (header['IMAGETYP'] == 'LIGHT') \
+             and (header['FILTER'] == filter_name) \
+             and (header['EXPTIME'] > exptime_min) \
+             and (header['EXPTIME'] < exptime_max) ):
+        continue
+
+    # appending the file to the list
+    list_target.append (file_fits)
+
+# printing status
+print (f'# {len (list_target)} files are found for photometry')
+print (f'# processing FITS files using {njobs} process(es)...')
+
+# time at start
+time_start = time.perf_counter ()
+
+# carrying out photometry
+list_results = []
+if (njobs > 1):
+    with context.Pool (njobs) as pool:
+        for results, message in pool.imap (process_frame, list_target):
+            print (message)
+            if (results is not None):
+                list_results.append (results)
+else:
+    for file_fits in list_target:
+        results, message = process_frame (file_fits)
+        print (message)
+        if (results is not None):
+            list_results.append (results)
+
+# time at end
+time_end = time.perf_counter ()
+
+# writing results into a file for all the frames
+if not (separate):
+    write_results (file_output, list_results)
+
+# printing status
+print (f'# {len (list_results)} of {len (list_target)} files measured in', \
+       f'{time_end - time_start:8.3f} sec')
+if not (separate):
+    print (f'# results are written into "{file_output}"')
@@ -0,0 +1,592 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/19 17:14:26 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing datetime module
+import datetime
+
+# importing time module
+import time
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.wcs
+import astropy.coordinates
+import astropy.stats
+import astropy.modeling
+
+# importing photutils module
+import photutils.centroids
+import photutils.aperture
+
+# directory of modules shared by scripts of several sessions
+sys.path.append (str (pathlib.Path (__file__).resolve ().parent.parent \
+                      / 'common'))
+
+# importing advobs202302_fitsio module
+from advobs202302_fitsio import choices_format, find_image_hdu, \
+    write_fits_image
+
+# importing advobs202302_header module
+from advobs202302_header import scan_header_offset
+
+# importing advobs202302_calcache module
+from advobs202302_calcache import make_calibration_cache, \
+    read_calibration_frame
+
+# constructing parser object
+desc   = "reducing and measuring new frames in a directory as they arrive"
+parser = argparse.ArgumentParser (description=desc)
+
+# centroid measurement technique
+choices_centroid = ['com', '1dg', '2dg']
+
+# PSF models (Gaussian and Moffat)
+choices_psf = ['2dg', '2dm']
+
+# adding argument
+parser.add_argument ('-i', '--incoming', default='incoming', \
+                     help='directory to watch for new frames' \
+                     + ' (default: incoming)')
+parser.add_argument ('-b', '--calibration', default='.', \
+                     help='directory of master dark (dark_XXXX.fits) and' \
+                     + ' normalised flatfield (nflat_XXX.fits) frames' \
+                     + ' (default: .)')
+parser.add_argument ('-k', '--reduced', default='reduced', \
+                     help='directory for reduced frames (default: reduced)')
+parser.add_argument ('-o', '--output', default='', \
+                     help='live photometry table' \
+                     + ' (default: phot_NAME_live.phot)')
+parser.add_argument ('-n', '--name', default='', help='name of target object')
+parser.add_argument ('-r', '--ra', type=float, default=-999.999, \
+                     help='RA in degree')
+parser.add_argument ('-d', '--dec', type=float, default=-999.999, \
+                     help='Dec in degree')
+parser.add_argument ('-c', '--centroid', choices=choices_centroid, \
+                     default='2dg', \
+                     help='centroid measurement algorithm (default: 2dg)')
+parser.add_argument ('-p', '--psf', choices=choices_psf, default='2dg', \
+                     help='PSF model [2dg=Gaussian, 2dm=Moffat] (default: 2dg)')
+parser.add_argument ('-a', '--aperture', type=float, default=2.0, \
+                     help='aperture radius in FWHM (default: 2.0)')
+parser.add_argument ('-w', '--halfwidth', type=int, default=20, \
+                     help='half-width for centroid measurement (default: 20)')
+parser.add_argument ('-s1', '--skyannulus1', type=float, default=4.0, \
+                     help='inner sky annulus radius in FWHM (default: 4)')
+parser.add_argument ('-s2', '--skyannulus2', type=float, default=7.0, \
+                     help='outer sky annulus radius in FWHM (default: 7)')
+parser.add_argument ('-t', '--threshold', type=float, default=4.0, \
+                     help='threshold for sigma-clipping in sigma (default: 4)')
+parser.add_argument ('-m', '--maxiters', type=int, default=100, \
+                     help='maximum number of iterations (default: 100)')
+parser.add_argument ('-e', '--poll', type=float, default=0.5, \
+                     help='interval of polling the directory in sec' \
+                     + ' (default: 0.5)')
+parser.add_argument ('-x', '--exit-idle', type=float, default=0.0, \
+                     help='exiting after given idle time in sec' \
+                     + ' (default: 0 = never)')
+parser.add_argument ('-z', '--output-format', choices=choices_format, \
+                     default='native', \
+                     help='format of reduced FITS files (default: native)')
+parser.add_argument ('-q', '--quantize-level', type=float, default=16.0, \
+                     help='quantization level for rice and hcompress' \
+                     + ' (default: 16)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+dir_incoming          = args.incoming
+dir_calibration       = args.calibration
+dir_reduced           = args.reduced
+file_output           = args.output
+target_name           = args.name
+target_ra_deg         = args.ra
+target_dec_deg        = args.dec
+centroid              = args.centroid
+psf_model             = args.psf
+aperture_radius_fwhm  = args.aperture
+halfwidth             = args.halfwidth
+skyannulus_inner_fwhm = args.skyannulus1
+skyannulus_outer_fwhm = args.skyannulus2
+threshold             = args.threshold
+maxiters              = args.maxiters
+interval_poll         = args.poll
+time_exit_idle        = args.exit_idle
+output_format         = args.output_format
+quantize_level        = args.quantize_level
+
+# FITS keywords
+keyword_datatype = 'IMAGETYP'
+keyword_exptime  = 'EXPTIME'
+keyword_filter   = 'FILTER'
+keyword_airmass  = 'AIRMASS'
+
+# checking "target_name"
+if (target_name == ''):
+    # printing message
+    print (f'You have to specify target object name by using -n option!')
+    # exit
+    sys.exit ()
+
+# check of RA and Dec
+if ( (target_ra_deg < 0.0) or (target_ra_deg > 360.0) \
+     or (target_dec_deg < -90.0) or (target_dec_deg > 90.0) ):
+    # printing message
+    print (f'Something is wrong with RA or Dec!')
+    print (f'Check RA and Dec you specify.')
+    print (f'RA  = {target_ra_deg} deg')
+    print (f'Dec = {target_dec_deg} deg')
+    # exit
+    sys.exit ()
+
+# checking directories
+if not (pathlib.Path (dir_incoming).is_dir ()):
+    # printing message
+    print (f'The directory "{dir_incoming}" does not exist!')
+    # exit
+    sys.exit ()
+if not (pathlib.Path (dir_calibration).is_dir ()):
+    # printing message
+    print (f'The directory "{dir_calibration}" does not exist!')
+    # exit
+    sys.exit ()
+pathlib.Path (dir_reduced).mkdir (parents=True, exist_ok=True)
+
+# live photometry table
+if (file_output == ''):
+    file_output = f'phot_{target_name}_live.phot'
+
+# command name
+command = sys.argv[0]
+
+# sky coordinate of target object
+coord_sky = astropy.coordinates.SkyCoord (target_ra_deg, target_dec_deg, \
+                                          unit='deg')
+
+# cache of master calibration frames
+# (frames are kept as read-only arrays of 32-bit floating point numbers, and
+#  a master frame replaced during the night is read again)
+cache_calibration = make_calibration_cache (dtype=numpy.float32)
+
+#
+# function to carry out dark subtraction and flatfielding
+#
+#   The algorithm is the same as that of advobs202302_s09_05_02.py. Raw
+#   data are converted into 32-bit floating point numbers once, and dark
+#   subtraction and flatfielding are carried out in-place.
+#
+def reduce_frame (file_raw, header, data_raw):
+    # exposure time and filter name
+    exptime     = header[keyword_exptime]
+    filter_name = header[keyword_filter]
+
+    # master frames
+    file_dark  = pathlib.Path (dir_calibration) \
+        / f'dark_{int (exptime):04d}.fits'
+    file_nflat = pathlib.Path (dir_calibration) / f'nflat_{filter_name}.fits'
+    (header_dark, data_dark) \
+        = read_calibration_frame (cache_calibration, 'DARK', exptime, \
+                                  '__NONE__', file_dark)
+    (header_nflat, data_nflat) \
+        = read_calibration_frame (cache_calibration, 'FLAT', None, \
+                                  filter_name, file_nflat)
+
+    # checking exposure time of dark frame
+    if not (header_dark[keyword_exptime] == exptime):
+        raise ValueError (f'exposure times of "{file_raw}" and' \
+                          + f' "{file_dark}" are not the same')
+
+    # dark subtraction and flatfielding (in-place)
+    data = data_raw.astype (numpy.float32)
+    numpy.subtract (data, data_dark, out=data, casting='unsafe')
+    numpy.divide (data, data_nflat, out=data, casting='unsafe')
+
+    # adding comments to the header
+    now = datetime.datetime.now ().isoformat ()
+    header = header.copy ()
+    header['history'] = f'FITS file created by the command "{command}"'
+    header['history'] = f'Updated on {now}'
+    header['comment'] = f'dark subtraction and flatfielding were carried out'
+    header['comment'] = f'raw data: {file_raw}'
+    header['comment'] = f'dark data: {file_dark.name}'
+    header['comment'] = f'normalised flatfield data: {file_nflat.name}'
+
+    # returning header and data
+    return (header, data)
+
+#
+# function to carry out aperture photometry of target object
+#
+#   The algorithm is the same as that of advobs202302_s15_03_00.py, but the
+#   reduced image in memory is measured, instead of a FITS file.
+#
+def measure_frame (header, data):
+    # WCS information
+    wcs = astropy.wcs.WCS (header)
+
+    # image size
+    (image_size_y, image_size_x) = data.shape
+
+    # extraction of information from FITS header
+    exptime = header[keyword_exptime]
+    airmass = header.get (keyword_airmass, numpy.nan)
+
+    # conversion from sky coordinate into pixel coordinate
+    (init_x, init_y) = wcs.world_to_pixel (coord_sky)
+
+    # region of sub-frame for centroid measurement
+    subframe_xmin = int (init_x - halfwidth)
+    subframe_xmax = int (init_x + halfwidth + 1)
+    subframe_ymin = int (init_y - halfwidth)
+    subframe_ymax = int (init_y + halfwidth + 1)
+
+    # checking region of sub-frame
+    if ( (subframe_xmin < 0) or (subframe_xmax > image_size_x) \
+         or (subframe_ymin < 0) or (subframe_ymax > image_size_y) ):
+        raise ValueError (f'target object is not on the image' \
+                          + f' ({init_x:.1f}, {init_y:.1f})')
+
+    # sub-frame for centroid measurement
+    subframe = data[subframe_ymin:subframe_ymax, subframe_xmin:subframe_xmax]
+
+    # sky subtraction
+    subframe_skysub = subframe - numpy.median (subframe)
+
+    # centroid measurement
+    if (centroid == 'com'):
+        (x_centre, y_centre) = photutils.centroids.centroid_com (subframe)
+    elif (centroid == '1dg'):
+        (x_centre, y_centre) = photutils.centroids.centroid_1dg (subframe)
+    elif (centroid == '2dg'):
+        (x_centre, y_centre) = photutils.centroids.centroid_2dg (subframe)
+
+    # PSF fitting
+    subframe_y, subframe_x = numpy.indices (subframe_skysub.shape)
+    if (psf_model == '2dg'):
+        psf_init = astropy.modeling.models.Gaussian2D (x_mean=x_centre, \
+                                                       y_mean=y_centre)
+    elif (psf_model == '2dm'):
+        psf_init = astropy.modeling.models.Moffat2D (x_0=x_centre, \
+                                                     y_0=y_centre, \
+                                                     amplitude=1.0, \
+                                                     alpha=1.0, gamma=1.0)
+    fit = astropy.modeling.fitting.LevMarLSQFitter ()
+    psf_fitted = fit (psf_init, subframe_x, subframe_y, subframe_skysub, \
+                      maxiter=maxiters)
+
+    # fitted PSF parameters
+    if (psf_model == '2dg'):
+        x_centre_psf = psf_fitted.x_mean.value + subframe_xmin
+        y_centre_psf = psf_fitted.y_mean.value + subframe_ymin
+        fwhm         = (psf_fitted.x_fwhm + psf_fitted.y_fwhm) / 2.0
+    elif (psf_model == '2dm'):
+        x_centre_psf = psf_fitted.x_0.value + subframe_xmin
+        y_centre_psf = psf_fitted.y_0.value + subframe_ymin
+        fwhm         = psf_fitted.fwhm
+
+    # aperture radius in pixel
+    aperture_radius_pix  = fwhm * aperture_radius_fwhm
+    skyannulus_inner_pix = fwhm * skyannulus_inner_fwhm
+    skyannulus_outer_pix = fwhm * skyannulus_outer_fwhm
+
+    # making aperture
+    position_pix = (x_centre_psf, y_centre_psf)
+    apphot_aperture \
+        = photutils.aperture.CircularAperture (position_pix, \
+                                               r=aperture_radius_pix)
+    apphot_annulus \
+        = photutils.aperture.CircularAnnulus (position_pix, \
+                                              r_in=skyannulus_inner_pix, \
+                                              r_out=skyannulus_outer_pix)
+
+    # sky background estimate
+    sigma_clip = astropy.stats.SigmaClip (sigma=threshold, maxiters=maxiters)
+    apphot_sky_stats \
+        = photutils.aperture.ApertureStats (data, apphot_annulus, \
+                                            sigma_clip=sigma_clip)
+    skybg_per_pix     = apphot_sky_stats.mean
+    skybg_err_per_pix = apphot_sky_stats.std
+
+    # aperture photometry
+    phot_star    = photutils.aperture.aperture_photometry (data, \
+                                                           apphot_aperture)
+    raw_flux     = float (phot_star['aperture_sum'][0])
+    npix         = apphot_aperture.area
+    net_flux     = raw_flux - skybg_per_pix * npix
+    net_flux_err = numpy.sqrt (raw_flux + npix * skybg_err_per_pix**2)
+
+    # instrumental magnitude
+    instmag     = -2.5 * numpy.log10 (net_flux / exptime)
+    instmag_err = 2.5 / numpy.log (10) * net_flux_err / net_flux
+
+    # returning results
+    return ( {'exptime': exptime, 'filter': header[keyword_filter], \
+              'x': x_centre_psf, 'y': y_centre_psf, 'fwhm': fwhm, \
+              'net_flux': net_flux, 'net_flux_err': net_flux_err, \
+              'instmag': instmag, 'instmag_err': instmag_err, \
+              'airmass': airmass} )
+
+#
+# function to process a new frame
+#
+#   A raw frame is read, reduced, written into the directory for reduced
+#   frames, and measured. Non-LIGHT frames are skipped. Results (or None)
+#   and a message are returned.
+#
+def process_frame (file_raw):
+    # reading FITS header and data
+    with astropy.io.fits.open (file_raw) as hdu_list:
+        hdu    = find_image_hdu (hdu_list)
+        header = hdu.header
+        data   = hdu.data
+
+    # if the data type is not "LIGHT", then skip
+    if not (header.get (keyword_datatype, '__NONE__') == 'LIGHT'):
+        return (None, f'# {file_raw}: not a LIGHT frame, skipping...')
+
+    # dark subtraction and flatfielding
+    (header_reduced, data_reduced) = reduce_frame (file_raw, header, data)
+
+    # writing reduced frame
+    file_reduced = pathlib.Path (dir_reduced) \
+        / (pathlib.Path (file_raw).stem + '_df.fits')
+    header_reduced['comment'] = f'flatfielded data: {file_reduced.name}'
+    if (file_reduced.exists ()):
+        file_reduced.unlink ()
+    write_fits_image (file_reduced, data_reduced, header_reduced, \
+                      output_format, quantize_level)
+
+    # aperture photometry
+    results = measure_frame (header_reduced, data_reduced)
+    results['file'] = str (file_reduced)
+
+    # returning results
+    return (results, f'# {file_raw}: instmag = {results["instmag"]:8.4f}' \
+            + f' +/- {results["instmag_err"]:6.4f}')
+
+#
+# function to check whether a FITS file has been written up to the end
+#
+#   The file has to be as large as the header plus the data of primary HDU
+#   padded to a multiple of 2880 bytes. A file whose primary HDU has no
+#   image data (e.g. a tile-compressed file) is not checked here.
+#
+def is_written (file_fits, size):
+    # reading header of primary HDU
+    (dict_values, offset) \
+        = scan_header_offset (file_fits, ['BITPIX', 'NAXIS', 'NAXIS1', \
+                                          'NAXIS2'])
+    # if the file ends before END card, then it is not written yet
+    if (offset is None):
+        return (False)
+    # if primary HDU is not a 2-dimensional image, then no more check
+    if not ( (dict_values['NAXIS'] == 2) \
+             and isinstance (dict_values['BITPIX'], int) \
+             and isinstance (dict_values['NAXIS1'], int) \
+             and isinstance (dict_values['NAXIS2'], int) ):
+        return (True)
+    # size of data padded to a multiple of 2880 bytes
+    size_data = dict_values['NAXIS1'] * dict_values['NAXIS2'] \
+        * abs (dict_values['BITPIX']) // 8
+    size_data = (size_data + 2879) // 2880 * 2880
+    # returning result
+    return (size >= offset + size_data)
+
+#
+# function to find new frames which have been completely written
+#
+#   A file is regarded as complete when its size and modification time do
+#   not change between two successive polls, and it is as large as its
+#   header says. Hidden files and files being written under a temporary
+#   name (e.g. "*.part") are ignored.
+#
+#   An entry of "dict_pending" is (signature, time of first detection,
+#   failed), where signature is a pair of size and modification time. A
+#   frame whose processing failed stays in "dict_pending", and is tried
+#   again when its signature changes (e.g. when it is written again).
+#
+dict_pending = {}
+def find_new_frames ():
+    # list of complete frames
+    list_complete = []
+    # scanning the directory
+    for entry in os.scandir (dir_incoming):
+        # skipping directories, hidden files, and non-FITS files
+        if not (entry.is_file () and entry.name.endswith ('.fits') \
+                and not entry.name.startswith ('.') ):
+            continue
+        # skipping processed files
+        if (entry.path in set_processed):
+            continue
+        # size and modification time
+        stat      = entry.stat ()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        # previous signature, time of first detection, and failure
+        (signature_last, time_found, failed) \
+            = dict_pending.get (entry.path, (None, time.time (), False))
+        # skipping failed frames, unless changed since the failure
+        if (failed and (signature == signature_last)):
+            continue
+        # the file is complete, if unchanged since last poll and large
+        # enough
+        if ( (signature == signature_last) \
+             and is_written (entry.path, stat.st_size) ):
+            list_complete.append ( (entry.path, time_found) )
+            del dict_pending[entry.path]
+        # otherwise, remembering size, modification time, and time of the
+        # first detection (a changed failed frame is detected again)
+        else:
+            if (failed):
+                time_found = time.time ()
+            dict_pending[entry.path] = (signature, time_found, False)
+    # returning complete frames, sorted by file name
+    return (sorted (list_complete))
+
+# set of processed files
+# (files already in the live photometry table are not processed again when
+#  the daemon is restarted)
+set_processed = set ()
+path_output   = pathlib.Path (file_output)
+if (path_output.exists ()):
+    with open (file_output, 'r') as fh:
+        for line in fh:
+            if (line[0] == '#'):
+                continue
+            set_processed.add (line.split ()[-1])
+
+# opening live photometry table
+# (data lines have the same format as those of advobs202302_s15_03_00.py,
+#  so that the file can be read by advobs202302_s15_03_02.py, and the name
+#  of raw frame is appended at the end)
+fh_out = open (file_output, 'a')
+if not (path_output.stat ().st_size > 0):
+    fh_out.write ("#\n")
+    fh_out.write ("# Result of Aperture Photometry (live)\n")
+    fh_out.write ("#\n")
+    fh_out.write ("#  Input Parameters\n")
+    fh_out.write ("#   target name                  = %s\n" % target_name)
+    fh_out.write ("#   RA                           = %f deg\n" % target_ra_deg)
+    fh_out.write ("#   Dec                          = %f deg\n" \
+                  % target_dec_deg)
+    fh_out.write ("#   aperture radius              = %f in FWHM\n" \
+                  % aperture_radius_fwhm)
+    fh_out.write ("#   inner sky annulus            = %f in FWHM\n" \
+                  % skyannulus_inner_fwhm)
+    fh_out.write ("#   outer sky annulus            = %f in FWHM\n" \
+                  % skyannulus_outer_fwhm)
+    fh_out.write ("#   half-width for centroid      = %f pixel\n" % halfwidth)
+    fh_out.write ("#   threshold for sigma-clipping = %f in sigma\n" \
+                  % threshold)
+    fh_out.write ("#   number of max iterations     = %d\n" % maxiters)
+    fh_out.write ("#\n")
+    fh_out.write ("#  Results\n")
+    fh_out.write ("#   file, exptime, filter, centre_x, centre_y,\n"
+                  "#   net_flux, net_flux_err, instmag, instmag_err," \
+                  " airmass, raw_file\n")
+    fh_out.flush ()
+
+# printing status
+print (f'# watching "{dir_incoming}" every {interval_poll} sec...')
+print (f'# {len (set_processed)} frames are already in "{file_output}"')
+
+# number of processed frames and sum of latency
+nframes     = 0
+latency_sum = 0.0
+
+# time of last activity
+time_last = time.time ()
+
+# watching the directory
+try:
+    while True:
+        # finding new frames
+        list_new = find_new_frames ()
+
+        # processing new frames
+        for (file_raw, time_found) in list_new:
+            # reducing and measuring the frame
+            # (an error in a frame does not stop the daemon)
+            # (a frame which failed is kept in "dict_pending", and is tried
+            #  again when it is written again)
+            try:
+                (results, message) = process_frame (file_raw)
+                set_processed.add (file_raw)
+            except Exception as error:
+                (results, message) \
+                    = (None, f'### processing failed for "{file_raw}":' \
+                       + f' {error}')
+                try:
+                    stat = os.stat (file_raw)
+                    dict_pending[file_raw] \
+                        = ( (stat.st_size, stat.st_mtime_ns), time_found, \
+                            True )
+                except OSError:
+                    pass
+
+            # appending results to the live photometry table
+            if (results is not None):
+                fh_out.write ("%s %f %s %f %f %f %f %f %f %f %s\n" \
+                              % (results['file'], results['exptime'], \
+                                 results['filter'], \
+                                 results['x'], results['y'], \
+                                 results['net_flux'], \
+                                 results['net_flux_err'], \
+                                 results['instmag'], \
+                                 results['instmag_err'], \
+                                 results['airmass'], file_raw) )
+                fh_out.flush ()
+
+                # latency from detection of the file to photometry
+                latency      = time.time () - time_found
+                nframes     += 1
+                latency_sum += latency
+                message     += f' (latency {latency:6.2f} sec)'
+
+            # printing message
+            print (message, flush=True)
+
+        # time of last activity
+        # (failed frames waiting to be written again are not counted)
+        if ( (len (list_new) > 0) \
+             or any ([not p[2] for p in dict_pending.values ()]) ):
+            time_last = time.time ()
+
+        # exiting after idle time
+        if ( (time_exit_idle > 0.0) \
+             and (time.time () - time_last > time_exit_idle) ):
+            break
+
+        # waiting for next poll
+        time.sleep (interval_poll)
+
+# stopping by Ctrl-C
+except KeyboardInterrupt:
+    pass
+
+# closing live photometry table
+fh_out.close ()
+
+# printing summary
+print (f'# {nframes} frames measured', end='')
+if (nframes > 0):
+    print (f', mean latency = {latency_sum / nframes:6.2f} sec')
+else:
+    print (f'')
@@ -0,0 +1,214 @@
+#!/usr/pkg/bin/python3.9
+
+#
+# Time-stamp: <2026/10/18 23:58:41 (CST) daisuke>
+#
+
+# importing argparse module
+import argparse
+
+# importing sys module
+import sys
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing shutil module
+import shutil
+
+# importing datetime module
+import datetime
+
+# importing time module
+import time
+
+# importing numpy module
+import numpy
+
+# importing astropy module
+import astropy.io.fits
+import astropy.wcs
+
+# constructing parser object
+desc   = "stand-in for a camera, dropping FITS files into a directory"
+parser = argparse.ArgumentParser (description=desc)
+
+# adding argument
+parser.add_argument ('-o', '--incoming', default='incoming', \
+                     help='directory to drop frames into (default: incoming)')
+parser.add_argument ('-b', '--calibration', default='', \
+                     help='directory to write master dark and flatfield' \
+                     + ' frames into (default: none)')
+parser.add_argument ('-n', '--nframes', type=int, default=10, \
+                     help='number of synthetic frames (default: 10)')
+parser.add_argument ('-i', '--interval', type=float, default=2.0, \
+                     help='interval between frames in sec (default: 2)')
+parser.add_argument ('-s', '--size', type=int, default=256, \
+                     help='image size in pixel (default: 256)')
+parser.add_argument ('-e', '--exptime', type=float, default=10.0, \
+                     help='exposure time in sec (default: 10)')
+parser.add_argument ('-f', '--filter', default='rp', \
+                     help='filter name (default: rp)')
+parser.add_argument ('-r', '--ra', type=float, default=180.0, \
+                     help='RA of target object in degree (default: 180)')
+parser.add_argument ('-d', '--dec', type=float, default=30.0, \
+                     help='Dec of target object in degree (default: 30)')
+parser.add_argument ('-p', '--prefix', default='lot', \
+                     help='prefix of file names (default: lot)')
+parser.add_argument ('-w', '--slow-write', action='store_true', \
+                     default=False, \
+                     help='writing files slowly in place, instead of' \
+                     + ' renaming a complete file')
+parser.add_argument ('files', nargs='*', \
+                     help='FITS files to be replayed (default: synthetic)')
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# input parameters
+dir_incoming    = args.incoming
+dir_calibration = args.calibration
+nframes         = args.nframes
+interval        = args.interval
+image_size      = args.size
+exptime         = args.exptime
+filter_name     = args.filter
+target_ra_deg   = args.ra
+target_dec_deg  = args.dec
+prefix          = args.prefix
+slow_write      = args.slow_write
+list_files      = args.files
+
+# making directories
+pathlib.Path (dir_incoming).mkdir (parents=True, exist_ok=True)
+if not (dir_calibration == ''):
+    pathlib.Path (dir_calibration).mkdir (parents=True, exist_ok=True)
+
+# random number generator
+rng = numpy.random.default_rng ()
+
+# dark level, flatfield pattern, and sky level in ADU
+(y, x) = numpy.mgrid[0:image_size, 0:image_size] / image_size
+level_dark = 1000.0 + 5.0 * x
+pattern    = 1.0 - 0.2 * ( (x - 0.5)**2 + (y - 0.5)**2)
+level_sky  = 500.0
+
+# WCS of synthetic frames (0.5 arcsec per pixel, target at the centre)
+wcs = astropy.wcs.WCS (naxis=2)
+wcs.wcs.ctype = ['RA---TAN', 'DEC--TAN']
+wcs.wcs.crval = [target_ra_deg, target_dec_deg]
+wcs.wcs.crpix = [image_size / 2.0 + 0.5, image_size / 2.0 + 0.5]
+wcs.wcs.cdelt = [-0.5 / 3600.0, 0.5 / 3600.0]
+
+#
+# function to make a synthetic LIGHT frame
+#
+#   A Gaussian star of FWHM about 3 pixels is placed at the target position,
+#   and sky background, flatfield pattern, dark level, and noise are added.
+#
+def make_frame (i):
+    # position and flux of the star
+    x0   = image_size / 2.0 + rng.normal (0.0, 1.0)
+    y0   = image_size / 2.0 + rng.normal (0.0, 1.0)
+    flux = 1.0e5 * exptime * (1.0 + 0.05 * numpy.sin (i / 3.0) )
+    # image
+    (iy, ix) = numpy.mgrid[0:image_size, 0:image_size]
+    sigma = 3.0 / 2.35482
+    star  = flux / (2.0 * numpy.pi * sigma**2) \
+        * numpy.exp (-( (ix - x0)**2 + (iy - y0)**2) / (2.0 * sigma**2) )
+    signal = (star + level_sky * exptime / 10.0) * pattern
+    data   = level_dark + rng.normal (signal, numpy.sqrt (signal) )
+    data   = numpy.clip (data, 0, 65535).astype (numpy.uint16)
+    # header
+    now    = datetime.datetime.now (datetime.timezone.utc)
+    header = wcs.to_header ()
+    header['IMAGETYP'] = 'LIGHT'
+    header['EXPTIME']  = exptime
+    header['FILTER']   = filter_name
+    header['AIRMASS']  = 1.2 + 0.01 * i
+    header['DATE-OBS'] = now.strftime ('%Y-%m-%d')
+    header['TIME-OBS'] = now.strftime ('%H:%M:%S.%f')
+    # returning header and data
+    return (header, data)
+
+#
+# function to write a FITS file into the incoming directory
+#
+#   Normally, a file is written under a hidden temporary name and renamed,
+#   so that it appears at once. With "-w" option, the file is written in
+#   place in several pieces, so that the watcher sees a growing file.
+#
+def drop_file (path_src, name):
+    path_dst = pathlib.Path (dir_incoming) / name
+    if (slow_write):
+        with open (path_src, 'rb') as fh_in, open (path_dst, 'wb') as fh_out:
+            while True:
+                block = fh_in.read (65536)
+                if (len (block) == 0):
+                    break
+                fh_out.write (block)
+                fh_out.flush ()
+                time.sleep (0.2)
+    else:
+        path_tmp = pathlib.Path (dir_incoming) / f'.{name}.part'
+        shutil.copyfile (path_src, path_tmp)
+        os.replace (path_tmp, path_dst)
+    # returning file name
+    return (path_dst)
+
+# writing master dark and flatfield frames
+if not (dir_calibration == ''):
+    file_dark  = pathlib.Path (dir_calibration) \
+        / f'dark_{int (exptime):04d}.fits'
+    file_nflat = pathlib.Path (dir_calibration) / f'nflat_{filter_name}.fits'
+    header = astropy.io.fits.Header ()
+    header['IMAGETYP'] = 'DARK'
+    header['EXPTIME']  = exptime
+    astropy.io.fits.writeto (file_dark, level_dark, header=header, \
+                             overwrite=True)
+    header = astropy.io.fits.Header ()
+    header['IMAGETYP'] = 'FLAT'
+    header['FILTER']   = filter_name
+    astropy.io.fits.writeto (file_nflat, pattern / numpy.mean (pattern), \
+                             header=header, overwrite=True)
+    print (f'# wrote "{file_dark}" and "{file_nflat}"')
+
+# files to be dropped
+if (len (list_files) > 0):
+    nframes = len (list_files)
+
+# temporary file for synthetic frames
+path_work = pathlib.Path (dir_incoming) / '.camera_work.fits'
+
+# dropping frames
+date = datetime.datetime.now ().strftime ('%Y%m%d')
+for i in range (nframes):
+    # replaying existing FITS file
+    if (len (list_files) > 0):
+        path_src = pathlib.Path (list_files[i])
+        if not (path_src.exists ()):
+            print (f'### "{path_src}" does not exist, skipping...', \
+                   file=sys.stderr)
+            continue
+        name = path_src.name
+    # making synthetic frame
+    else:
+        (header, data) = make_frame (i)
+        astropy.io.fits.writeto (path_work, data, header=header, \
+                                 overwrite=True)
+        path_src = path_work
+        name     = f'{prefix}_{date}_{i + 1:04d}.fits'
+
+    # dropping the file
+    path_dst = drop_file (path_src, name)
+    print (f'{datetime.datetime.now ().isoformat ()} {path_dst}', flush=True)
+
+    # waiting for next frame
+    if (i < nframes - 1):
+        time.sleep (interval)
+
+# removing temporary file
+path_work.unlink (missing_ok=True)